@@ -3,7 +3,7 @@ Agent IA de Décision pour l'Amélioration de l'OEE - TECPAP
 Application principale Flask
 """
 
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
 from datetime import datetime, timedelta
 import os
 import pandas as pd
@@ -11,19 +11,75 @@ from models.predictor import OEEPredictor
 from models.recommender import LineRecommender
 from models.anomaly_expert import AnomalyExpert
 from models.speed_optimizer import SpeedOptimizer
-from data.data_loader import DataLoader
+from models.training_jobs import ModelSlot, TrainingJobManager
+from data.data_store import get_data_store
+from data.ingestion import DataIngestor
+from data.anomaly_store import AnomalyStore
+from data.historical import HistoricalQuery
+from data.oee_index import line_sort_key
 from data.products_catalog import get_all_products, get_product_by_code
+from utils.response_cache import ResponseCache
+from utils.event_stream import EventBroadcaster
+from utils.request_context import request_memo
+from utils.serialization import NumpyJSONProvider, frame_payload, parse_format
 import json
 
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 app.config['SECRET_KEY'] = 'tecpap-innovation-oee-2025'
 
 # Initialisation des composants IA
-data_loader = DataLoader()
-oee_predictor = OEEPredictor()
+# Les modèles entraînables sont servis via des slots remplaçables à chaud
+data_store = get_data_store()
+data_store.memo = request_memo  # un seul loader par requête HTTP
+data_ingestor = DataIngestor(data_store)
+anomaly_store = AnomalyStore()
+predictor_slot = ModelSlot(OEEPredictor())
+speed_slot = ModelSlot(SpeedOptimizer())
 line_recommender = LineRecommender()
-anomaly_expert = AnomalyExpert()
-speed_optimizer = SpeedOptimizer()
+# Un même modèle et un même résultat par requête HTTP
+predictor_slot.memo = speed_slot.memo = line_recommender.memo = request_memo
+anomaly_expert = AnomalyExpert(anomaly_store)
+training_jobs = TrainingJobManager()
+response_cache = ResponseCache()
+
+def _train_oee_predictor():
+    """Entraîne un nouveau prédicteur OEE (exécuté en arrière-plan)"""
+    predictor = OEEPredictor()
+    if not predictor.train(data_store.get_loader().get_data_for_training()):
+        raise Exception("Performance insuffisante, modèle non promu")
+    return predictor, {'model_version': predictor.model_version}
+
+def _train_speed_optimizer():
+    """Entraîne un nouvel optimiseur de vitesse (exécuté en arrière-plan)"""
+    optimizer = SpeedOptimizer()
+    scores = optimizer.train(data_store.get_loader().get_data_for_training())
+    optimizer.save_model()
+    return optimizer, {key: round(float(value), 4) for key, value in scores.items()}
+
+def _reload_oee_predictor():
+    """Recharge la version active du registre (promue par un autre processus)"""
+    predictor = OEEPredictor()
+    predictor._load_model()
+    return predictor
+
+def _reload_speed_optimizer():
+    """Recharge l'optimiseur sauvegardé par un autre processus"""
+    optimizer = SpeedOptimizer()
+    optimizer.load_model()
+    return optimizer
+
+def _speed_optimizer_file_token():
+    path = os.path.join(speed_slot.get().models_path, 'speed_optimizer.pkl')
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+training_jobs.register('oee_predictor', _train_oee_predictor, predictor_slot)
+training_jobs.register('speed_optimizer', _train_speed_optimizer, speed_slot)
+predictor_slot.on_swap(lambda predictor: setattr(line_recommender, 'predictor', predictor))
+
+# Mode préchargé (gunicorn.conf.py) : aucun thread d'entraînement avant le fork
+if os.environ.get('TECPAP_PRELOAD') == '1':
+    training_jobs.hold()
 
 # Variable pour suivre l'état d'initialisation
 _system_initialized = False
@@ -42,23 +98,29 @@ def initialize_system():
     try:
         # 1. Chargement des données
         print("\n[1/4] Chargement des données...")
-        if not data_loader.load_data():
+        if not data_store.reload():
             print("Erreur lors du chargement des données")
             return False
         print("✓ Données chargées avec succès")
         
         # 2. Chargement/Entraînement du modèle de prédiction
         print("\n[2/4] Chargement du modèle de prédiction OEE...")
-        if oee_predictor._load_model():
-            print("✓ Modèle chargé depuis fichier")
+        oee_predictor = predictor_slot.get()
+        training_df = data_store.get_loader().get_data_for_training()
+        data_hash = oee_predictor.training_fingerprint(training_df)
+        if oee_predictor._load_model(expected_data_hash=data_hash):
+            print(f"✓ Modèle {oee_predictor.model_version} chargé depuis le registre")
+        elif oee_predictor._load_model():
+            # L'ancien modèle sert les requêtes pendant le réentraînement
+            print(f"✓ Modèle {oee_predictor.model_version} chargé, réentraînement en arrière-plan...")
+            training_jobs.submit('oee_predictor')
         else:
-            print("Entraînement du modèle...")
-            oee_predictor.train()
-            print("✓ Modèle entraîné")
+            print("Aucun modèle disponible, entraînement en arrière-plan...")
+            training_jobs.submit('oee_predictor')
         
         # 3. Initialisation du système de recommandation
         print("\n[3/4] Initialisation du système de recommandation...")
-        line_recommender.initialize()
+        line_recommender.initialize(predictor_slot.get())
         print("✓ Recommandation initialisée")
         
         # 4. Chargement de la base de connaissances
@@ -66,11 +128,22 @@ def initialize_system():
         anomaly_expert.load_knowledge_base()
         print("✓ Expert en anomalies prêt")
         
-        # 5. Entraînement de l'optimiseur de vitesse
-        print("\n[5/5] Entraînement de l'optimiseur de vitesse...")
-        training_data = data_loader.get_data_for_training()
-        speed_optimizer.train(training_data)
-        print("✓ Optimiseur de vitesse prêt")
+        # 5. Chargement/Entraînement de l'optimiseur de vitesse
+        print("\n[5/5] Chargement de l'optimiseur de vitesse...")
+        speed_optimizer = speed_slot.get()
+        fingerprint = speed_optimizer.training_fingerprint(data_store.get_loader().oee_data)
+        if speed_optimizer.load_model(expected_fingerprint=fingerprint):
+            print("✓ Optimiseur chargé depuis fichier (données inchangées)")
+        elif speed_optimizer.load_model():
+            print("✓ Optimiseur chargé, réentraînement en arrière-plan...")
+            training_jobs.submit('speed_optimizer')
+        else:
+            print("Aucun optimiseur disponible, entraînement en arrière-plan...")
+            training_jobs.submit('speed_optimizer')
+        
+        # Les modèles persistés par un autre processus sont rechargés automatiquement
+        predictor_slot.watch(predictor_slot.get().registry.current_version, _reload_oee_predictor)
+        speed_slot.watch(_speed_optimizer_file_token, _reload_speed_optimizer)
         
         print("\n" + "=" * 60)
         print("✅ Système opérationnel!")
@@ -85,6 +158,16 @@ def initialize_system():
         traceback.print_exc()
         return False
 
+def on_worker_fork():
+    """
+    Appelé dans chaque worker Gunicorn après le fork (mode préchargé)
+    Seul le worker qui détient le verrou d'entraînement exécute les entraînements
+    mis en attente par le maître ; les autres rechargent les nouveaux modèles
+    depuis le disque.
+    """
+    lock_path = os.path.join(predictor_slot.get().models_path, '.training.lock')
+    training_jobs.release_after_fork(lock_path)
+
 # Initialisation automatique au chargement du module (fonctionne avec Gunicorn)
 initialize_system()
 
@@ -109,33 +192,72 @@ def serve_product_image(filename):
     images_path = os.path.join(os.path.dirname(__file__), 'images', 'produits')
     return send_from_directory(images_path, filename)
 
+def _dashboard_payload():
+    # Données actuelles
+    current_data = data_store.get_loader().get_current_metrics()
+    
+    # Prédictions OEE pour les 7 prochains jours
+    predictions = predictor_slot.get().predict_next_days(days=7)
+    
+    # Recommandation de ligne
+    recommendation = line_recommender.get_best_line()
+    
+    # Alertes critiques
+    alerts = anomaly_expert.get_active_alerts()
+    
+    return {
+        'success': True,
+        'current': current_data,
+        'predictions': predictions,
+        'recommendation': recommendation,
+        'alerts': alerts,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def _dashboard_version():
+    # Vérifie les fichiers et le modèle persisté avant de lire les versions ; la
+    # version des données est celle du loader utilisé par la requête
+    _, data_version = data_store.get_snapshot()
+    predictor_slot.get()
+    return (data_version, predictor_slot.version)
+
+def _dashboard_snapshot():
+    """Dashboard sérialisé pour le flux SSE (même cache que /api/dashboard)"""
+    with app.app_context():
+        body, etag = response_cache.get('dashboard', _dashboard_version(), _dashboard_payload)
+    return etag, body
+
+# Une connexion SSE occupe un thread du worker : plafond sous GUNICORN_THREADS
+dashboard_events = EventBroadcaster('dashboard', _dashboard_snapshot,
+                                    max_clients=int(os.environ.get('SSE_MAX_CLIENTS', '16')))
+predictor_slot.on_swap(lambda predictor: dashboard_events.publish_now())
+
 @app.route('/api/dashboard')
 def get_dashboard_data():
-    """Récupération des données du dashboard"""
+    """Récupération des données du dashboard (recalculée seulement si données/modèle changent)"""
     try:
-        # Données actuelles
-        current_data = data_loader.get_current_metrics()
-        
-        # Prédictions OEE pour les 7 prochains jours
-        predictions = oee_predictor.predict_next_days(days=7)
-        
-        # Recommandation de ligne
-        recommendation = line_recommender.get_best_line()
-        
-        # Alertes critiques
-        alerts = anomaly_expert.get_active_alerts()
-        
-        return jsonify({
-            'success': True,
-            'current': current_data,
-            'predictions': predictions,
-            'recommendation': recommendation,
-            'alerts': alerts,
-            'timestamp': datetime.now().isoformat()
-        })
+        return response_cache.respond('dashboard', _dashboard_version(), _dashboard_payload)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/dashboard/stream')
+def stream_dashboard_data():
+    """Flux SSE : le dashboard est poussé à chaque changement, calculé une fois pour tous les clients"""
+    if not dashboard_events.try_connect():
+        # Trop de flux ouverts sur ce worker : le client passe au rafraîchissement périodique
+        response = jsonify({'success': False, 'error': 'Trop de flux ouverts, utiliser /api/dashboard'})
+        response.headers['Retry-After'] = '300'
+        return response, 503
+
+    stream = dashboard_events.stream(request.headers.get('Last-Event-ID'))
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # pas de mise en tampon par un proxy nginx
+    })
+    # Libération à la fermeture de la réponse, même si le flux n'a jamais été lu
+    response.call_on_close(dashboard_events.disconnect)
+    return response
+
 @app.route('/api/predict', methods=['POST'])
 def predict_oee():
     """Prédiction OEE pour une ligne spécifique"""
@@ -144,7 +266,7 @@ def predict_oee():
         line_id = data.get('line_id', 'L1')
         horizon = data.get('horizon', 7)
         
-        prediction = oee_predictor.predict_line(line_id, horizon)
+        prediction = predictor_slot.get().predict_line(line_id, horizon)
         
         return jsonify({
             'success': True,
@@ -179,45 +301,101 @@ def get_anomalies():
     """Récupération des anomalies et solutions"""
     try:
         period = request.args.get('period', '30')
-        anomalies = anomaly_expert.get_recent_anomalies(int(period))
+        anomalies = anomaly_expert.get_recent_anomalies(int(period), parse_format(request.args.get('format')))
         
         return jsonify({
             'success': True,
             'anomalies': anomalies
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _text_field(data, key):
+    """Champ texte facultatif d'un corps JSON ('' si absent, ValueError si ce n'est pas une chaîne)"""
+    value = data.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"'{key}' doit être une chaîne de caractères")
+    return value or ''
+
 @app.route('/api/anomaly/similar', methods=['POST'])
 def find_similar_anomalies():
     """Recherche d'anomalies similaires et solutions"""
     try:
-        data = request.json
-        description = data.get('description', '')
-        machine_id = data.get('machine_id', '')
-        
-        similar = anomaly_expert.find_similar(description, machine_id)
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Corps JSON attendu: {"description": ...}'}), 400
+        
+        similar = anomaly_expert.find_similar(
+            _text_field(data, 'description'), _text_field(data, 'machine_id'),
+            line_id=_text_field(data, 'line_id') or None,
+            same_machine=bool(data.get('same_machine', False))
+        )
         
         return jsonify({
             'success': True,
             'similar_cases': similar
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/anomaly/similar/batch', methods=['POST'])
+def find_similar_anomalies_batch():
+    """
+    Recherche groupée d'anomalies similaires (notes d'une équipe en un appel)
+    Corps : {"queries": [{"description": ..., "machine_id": ...} ou "description", ...],
+             "line_id": ..., "same_machine": false, "top_k": 5}
+    """
+    try:
+        data = request.get_json(silent=True)
+        queries = data.get('queries') if isinstance(data, dict) else None
+        if not isinstance(queries, list) or not all(isinstance(query, (dict, str)) for query in queries):
+            return jsonify({'success': False, 'error': 'Corps attendu: {"queries": [descriptions]}'}), 400
+        
+        queries = [
+            {'description': query} if isinstance(query, str) else
+            {'description': _text_field(query, 'description'), 'machine_id': _text_field(query, 'machine_id')}
+            for query in queries
+        ]
+        top_k = data.get('top_k', 5)
+        if isinstance(top_k, bool) or not isinstance(top_k, int):
+            raise ValueError("'top_k' doit être un entier")
+        results = anomaly_expert.find_similar_batch(
+            queries,
+            line_id=_text_field(data, 'line_id') or None,
+            same_machine=bool(data.get('same_machine', False)),
+            top_k=top_k
+        )
+        
+        return jsonify({
+            'success': True,
+            'results': [{'similar_cases': similar} for similar in results]
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/historical')
 def get_historical_data():
-    """Données historiques pour analyse"""
+    """
+    Données historiques pour analyse
+    Paramètres : line_id, days, bucket (raw|hourly|shift|daily), agg, columns,
+    max_points (séries agrégées), cursor et limit (enregistrements bruts)
+    """
     try:
-        line_id = request.args.get('line_id', 'all')
-        days = int(request.args.get('days', 90))
-        
-        historical = data_loader.get_historical_data(line_id, days)
+        query = HistoricalQuery.from_args(request.args)
+        historical = data_store.get_loader().get_historical_data(query)
         
         return jsonify({
             'success': True,
-            'data': historical
+            **historical
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -225,7 +403,7 @@ def get_historical_data():
 def calculate_impact():
     """Calcul de l'impact potentiel d'amélioration"""
     try:
-        current_oee = data_loader.get_average_oee()
+        current_oee = data_store.get_loader().get_average_oee()
         improvement = float(request.args.get('improvement', 1.0))
         
         impact = {
@@ -242,16 +420,36 @@ def calculate_impact():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _speed_training_response():
+    """503 à réessayer tant que le premier entraînement de l'optimiseur n'est pas terminé"""
+    if speed_slot.get().is_trained:
+        return None
+    job = training_jobs.pending('speed_optimizer')
+    if job is None:
+        return None
+    response = jsonify({
+        'success': False,
+        'status': 'training',
+        'error': "Entraînement de l'optimiseur en cours, réessayer plus tard",
+        'job': job
+    })
+    response.headers['Retry-After'] = '30'
+    return response, 503
+
 @app.route('/api/speed/optimize', methods=['POST'])
 def optimize_speed():
     """Optimisation de la vitesse machine (Sweet Spot)"""
     try:
+        training = _speed_training_response()
+        if training:
+            return training
+        
         data = request.json
         line_id = data.get('line_id', 'L1')
         product_type = data.get('product_type', 'Fond_Plat')
         
         # Trouver la vitesse optimale
-        result = speed_optimizer.find_optimal_speed(line_id, product_type)
+        result = speed_slot.get().find_optimal_speed(line_id, product_type)
         
         return jsonify({
             'success': True,
@@ -264,10 +462,14 @@ def optimize_speed():
 def compare_speeds():
     """Comparaison des vitesses optimales pour toutes les lignes"""
     try:
+        training = _speed_training_response()
+        if training:
+            return training
+        
         product_type = request.args.get('product_type', 'Fond_Plat')
         
         # Obtenir recommandations pour toutes les lignes
-        comparison = speed_optimizer.get_speed_recommendations_all_lines(product_type)
+        comparison = speed_slot.get().get_speed_recommendations_all_lines(product_type)
         
         return jsonify({
             'success': True,
@@ -280,13 +482,17 @@ def compare_speeds():
 def predict_at_speed():
     """Prédiction de production et qualité pour une vitesse donnée"""
     try:
+        training = _speed_training_response()
+        if training:
+            return training
+        
         data = request.json
         line_id = data.get('line_id', 'L1')
         product_type = data.get('product_type', 'Fond_Plat')
         speed = int(data.get('speed', 1000))
         
         # Prédire à cette vitesse
-        prediction = speed_optimizer.predict_at_speed(line_id, product_type, speed)
+        prediction = speed_slot.get().predict_at_speed(line_id, product_type, speed)
         
         return jsonify({
             'success': True,
@@ -299,6 +505,7 @@ def predict_at_speed():
 def get_speed_ranges():
     """Récupérer les plages de vitesse disponibles par ligne"""
     try:
+        speed_optimizer = speed_slot.get()
         return jsonify({
             'success': True,
             'ranges': speed_optimizer.speed_ranges,
@@ -307,6 +514,39 @@ def get_speed_ranges():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/ingest', methods=['POST'])
+def ingest_records():
+    """
+    Ingestion d'un lot d'enregistrements Evocon (schémas des CSV générés)
+    Corps : {"oee_data": [...], "stops_data": [...], "quality_data": [...]}
+    """
+    try:
+        batch = request.get_json(silent=True)
+        if not isinstance(batch, dict) or not all(isinstance(records, list) for records in batch.values()):
+            return jsonify({'success': False, 'error': 'Corps attendu: {table: [enregistrements]}'}), 400
+        
+        summary, oee_records = data_ingestor.ingest(batch)
+        if any(table['inserted'] for table in summary.values()):
+            dashboard_events.publish_now()
+        
+        # Features glissantes avancées en O(1), puis score de la dernière heure des lignes concernées
+        latest = None
+        if oee_records:
+            predictor = predictor_slot.get()
+            predictor.observe(oee_records, data_store.version)
+            latest = predictor.predict_latest(sorted({record['line_id'] for record in oee_records}, key=line_sort_key))
+        
+        return jsonify({
+            'success': True,
+            'tables': summary,
+            'data_version': data_store.version,
+            'latest_predictions': latest
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ============================================
 # ROUTES ADMINISTRATION - ANOMALIES & PRODUITS
 # ============================================
@@ -318,13 +558,15 @@ def admin_panel():
 
 @app.route('/api/admin/anomalies', methods=['GET'])
 def get_all_anomalies():
-    """Récupérer toutes les anomalies"""
+    """Récupérer toutes les anomalies (format=columns : une liste de valeurs par colonne)"""
     try:
-        anomalies = data_loader.anomalies_data.to_dict('records')
+        anomalies = frame_payload(anomaly_store.frame(), parse_format(request.args.get('format')))
         return jsonify({
             'success': True,
             'anomalies': anomalies
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -332,46 +574,34 @@ def get_all_anomalies():
 def add_anomaly():
     """Ajouter une nouvelle anomalie"""
     try:
-        data = request.json
-        
-        # Générer nouvel ID
-        new_id = data_loader.anomalies_data['anomaly_id'].max() + 1 if len(data_loader.anomalies_data) > 0 else 1
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Corps JSON attendu'}), 400
         
-        # Créer nouvelle anomalie
-        new_anomaly = {
-            'anomaly_id': new_id,
+        # Nouvelle anomalie (identifiant attribué par la base, valeurs validées par la base)
+        new_anomaly = anomaly_store.add({
             'timestamp': datetime.now().isoformat(),
             'line_id': data.get('line_id', 'L1'),
             'machine_id': data.get('machine_id', 'M1-1'),
             'symptom': data.get('symptom', ''),
             'root_cause': data.get('root_cause', ''),
             'solution_applied': data.get('solution_applied', ''),
-            'resolution_time_minutes': int(data.get('resolution_time_minutes', 60)),
-            'impact_oee': int(data.get('impact_oee', -5)),
-            'recurrence_count': int(data.get('recurrence_count', 1)),
+            'resolution_time_minutes': data.get('resolution_time_minutes', 60),
+            'impact_oee': data.get('impact_oee', -5),
+            'recurrence_count': data.get('recurrence_count', 1),
             'priority': data.get('priority', 'Medium'),
             'status': data.get('status', 'Resolved')
-        }
-        
-        # Ajouter au DataFrame
-        data_loader.anomalies_data = pd.concat([
-            data_loader.anomalies_data,
-            pd.DataFrame([new_anomaly])
-        ], ignore_index=True)
-        
-        # Sauvegarder
-        data_loader.anomalies_data.to_csv(
-            os.path.join(data_loader.data_path, 'anomalies_data.csv'),
-            index=False
-        )
+        })
         
-        # Recharger base de connaissances
-        anomaly_expert.load_knowledge_base()
+        # Mise à jour de la base de connaissances (lignes modifiées uniquement)
+        anomaly_expert.refresh_knowledge_base()
         
         return jsonify({
             'success': True,
             'anomaly': new_anomaly
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -379,32 +609,22 @@ def add_anomaly():
 def update_anomaly(anomaly_id):
     """Modifier une anomalie existante"""
     try:
-        data = request.json
-        
-        # Trouver l'anomalie
-        idx = data_loader.anomalies_data[data_loader.anomalies_data['anomaly_id'] == anomaly_id].index
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Corps JSON attendu'}), 400
         
-        if len(idx) == 0:
+        if not anomaly_store.update(anomaly_id, data):
             return jsonify({'success': False, 'error': 'Anomalie non trouvée'}), 404
         
-        # Mettre à jour
-        for key, value in data.items():
-            if key in data_loader.anomalies_data.columns and key != 'anomaly_id':
-                data_loader.anomalies_data.at[idx[0], key] = value
-        
-        # Sauvegarder
-        data_loader.anomalies_data.to_csv(
-            os.path.join(data_loader.data_path, 'anomalies_data.csv'),
-            index=False
-        )
-        
-        # Recharger base de connaissances
-        anomaly_expert.load_knowledge_base()
+        # Mise à jour de la base de connaissances (lignes modifiées uniquement)
+        anomaly_expert.refresh_knowledge_base()
         
         return jsonify({
             'success': True,
             'message': 'Anomalie mise à jour'
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -412,19 +632,11 @@ def update_anomaly(anomaly_id):
 def delete_anomaly(anomaly_id):
     """Supprimer une anomalie"""
     try:
-        # Supprimer l'anomalie
-        data_loader.anomalies_data = data_loader.anomalies_data[
-            data_loader.anomalies_data['anomaly_id'] != anomaly_id
-        ]
-        
-        # Sauvegarder
-        data_loader.anomalies_data.to_csv(
-            os.path.join(data_loader.data_path, 'anomalies_data.csv'),
-            index=False
-        )
+        if not anomaly_store.delete(anomaly_id):
+            return jsonify({'success': False, 'error': 'Anomalie non trouvée'}), 404
         
-        # Recharger base de connaissances
-        anomaly_expert.load_knowledge_base()
+        # Mise à jour de la base de connaissances (lignes modifiées uniquement)
+        anomaly_expert.refresh_knowledge_base()
         
         return jsonify({
             'success': True,
@@ -433,6 +645,53 @@ def delete_anomaly(anomaly_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/admin/training', methods=['POST'])
+def submit_training_job():
+    """Lance un réentraînement en arrière-plan (oee_predictor ou speed_optimizer)"""
+    try:
+        data = request.json or {}
+        job = training_jobs.submit(data.get('model', 'oee_predictor'))
+        
+        return jsonify({
+            'success': True,
+            'job': job
+        }), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/training', methods=['GET'])
+def list_training_jobs():
+    """Liste des jobs d'entraînement et versions des modèles en service"""
+    try:
+        return jsonify({
+            'success': True,
+            'jobs': training_jobs.list_jobs(),
+            'models': {
+                'oee_predictor': predictor_slot.get().model_version,
+                'speed_optimizer': speed_slot.get().data_fingerprint
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/training/<job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """État d'un job d'entraînement"""
+    try:
+        job = training_jobs.get(job_id)
+        
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job non trouvé'}), 404
+        
+        return jsonify({
+            'success': True,
+            'job': job
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/admin/products', methods=['GET'])
 def get_products():
     """Récupère la liste des produits TECPAP"""
@@ -3,5 +3,7 @@ Module d'initialisation pour le package data
 """
 
 from .data_loader import DataLoader
+from .data_store import DataStore, get_data_store, frame_fingerprint
+from .ingestion import DataIngestor
 
-__all__ = ['DataLoader']
+__all__ = ['DataLoader', 'DataStore', 'get_data_store', 'frame_fingerprint', 'DataIngestor']
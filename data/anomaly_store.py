@@ -0,0 +1,236 @@
+"""
+Base SQLite des anomalies documentées (administration)
+Chaque opération d'administration est une écriture indexée sur une seule ligne ;
+les identifiants sont attribués par SQLite (AUTOINCREMENT), sans collision entre
+workers. Un numéro de révision permet aux autres processus de ne relire que les
+lignes modifiées.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+class AnomalyStore:
+    COLUMNS = ['anomaly_id', 'timestamp', 'line_id', 'machine_id', 'symptom', 'root_cause',
+               'solution_applied', 'resolution_time_minutes', 'impact_oee', 'recurrence_count',
+               'priority', 'status']
+    EDITABLE_COLUMNS = COLUMNS[1:]
+    INTEGER_COLUMNS = ['resolution_time_minutes', 'impact_oee', 'recurrence_count']
+    TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS anomalies (
+            anomaly_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            line_id TEXT,
+            machine_id TEXT,
+            symptom TEXT,
+            root_cause TEXT,
+            solution_applied TEXT,
+            resolution_time_minutes INTEGER,
+            impact_oee INTEGER,
+            recurrence_count INTEGER,
+            priority TEXT,
+            status TEXT,
+            revision INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_anomalies_timestamp ON anomalies (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_anomalies_revision ON anomalies (revision);
+        CREATE TABLE IF NOT EXISTS deleted_anomalies (
+            anomaly_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_deleted_revision ON deleted_anomalies (revision);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, db_path=None, seed_csv=None):
+        data_dir = os.path.dirname(__file__)
+        self.db_path = db_path or os.path.join(data_dir, 'generated', 'anomalies.db')
+        self.seed_csv = seed_csv or os.path.join(data_dir, 'generated', 'anomalies_data.csv')
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def revision(self):
+        """Révision courante (incrémentée à chaque écriture, tous processus confondus)"""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row else 0
+
+    def frame(self):
+        """Toutes les anomalies, triées par identifiant"""
+        return self._to_frame(self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM anomalies ORDER BY anomaly_id"
+        ).fetchall())
+
+    def changes_since(self, revision):
+        """
+        Lignes modifiées depuis une révision
+        Returns:
+            (DataFrame des lignes ajoutées/modifiées, identifiants supprimés, révision courante)
+        """
+        connection = self._connection()
+        with self._transaction(connection, immediate=False):
+            current = self.revision()
+            rows = connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM anomalies WHERE revision > ? ORDER BY anomaly_id",
+                (revision,)
+            ).fetchall()
+            deleted = [row[0] for row in connection.execute(
+                "SELECT anomaly_id FROM deleted_anomalies WHERE revision > ?", (revision,)
+            )]
+        return self._to_frame(rows), deleted, current
+
+    def get(self, anomaly_id):
+        row = self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM anomalies WHERE anomaly_id = ?", (anomaly_id,)
+        ).fetchone()
+        return None if row is None else dict(zip(self.COLUMNS, row))
+
+    def add(self, fields):
+        """Insère une anomalie (identifiant attribué par SQLite) et la retourne"""
+        values = self._normalize({column: fields.get(column) for column in self.EDITABLE_COLUMNS})
+        connection = self._connection()
+        with self._transaction(connection):
+            revision = self._next_revision(connection)
+            cursor = connection.execute(
+                f"INSERT INTO anomalies ({', '.join(values)}, revision) "
+                f"VALUES ({', '.join('?' * len(values))}, ?)",
+                [*values.values(), revision]
+            )
+        # Horodatage restitué au format ISO (stockage au format triable)
+        return dict(values, timestamp=pd.Timestamp(values['timestamp']).isoformat(),
+                    anomaly_id=cursor.lastrowid)
+
+    def update(self, anomaly_id, fields):
+        """Met à jour les colonnes fournies ; False si l'anomalie n'existe pas"""
+        values = self._normalize({column: value for column, value in fields.items()
+                                  if column in self.EDITABLE_COLUMNS})
+        connection = self._connection()
+        with self._transaction(connection):
+            revision = self._next_revision(connection)
+            assignments = ''.join(f'{column} = ?, ' for column in values)
+            cursor = connection.execute(
+                f"UPDATE anomalies SET {assignments}revision = ? WHERE anomaly_id = ?",
+                [*values.values(), revision, anomaly_id]
+            )
+            if cursor.rowcount == 0:
+                connection.rollback()
+                return False
+        return True
+
+    def delete(self, anomaly_id):
+        """Supprime une anomalie ; False si elle n'existe pas"""
+        connection = self._connection()
+        with self._transaction(connection):
+            revision = self._next_revision(connection)
+            cursor = connection.execute("DELETE FROM anomalies WHERE anomaly_id = ?", (anomaly_id,))
+            if cursor.rowcount == 0:
+                connection.rollback()
+                return False
+            connection.execute(
+                "INSERT OR REPLACE INTO deleted_anomalies (anomaly_id, revision) VALUES (?, ?)",
+                (anomaly_id, revision)
+            )
+        return True
+
+    def _normalize(self, values):
+        """Valide et convertit les valeurs (mêmes règles en ajout et en modification)"""
+        # Horodatages au même format texte que l'import (tri lexicographique = chronologique)
+        if 'timestamp' in values:
+            try:
+                values['timestamp'] = pd.Timestamp(values['timestamp']).strftime(self.TIMESTAMP_FORMAT)
+            except (TypeError, ValueError):
+                raise ValueError(f"timestamp invalide: {values['timestamp']!r}")
+        for column in self.INTEGER_COLUMNS:
+            if column in values:
+                values[column] = self._to_int(column, values[column])
+        return values
+
+    @staticmethod
+    def _to_int(column, value):
+        # int() accepte les chaînes numériques ; on refuse booléens, nuls et décimaux tronqués
+        if isinstance(value, bool) or value is None:
+            raise ValueError(f"{column} doit être un entier")
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"{column} doit être un entier")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{column} doit être un entier")
+
+    def _to_frame(self, rows):
+        df = pd.DataFrame(rows, columns=self.COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+        return df
+
+    def _next_revision(self, connection):
+        connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+        return connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    @contextmanager
+    def _transaction(self, connection, immediate=True):
+        # BEGIN IMMEDIATE : verrou d'écriture pris d'emblée (pas d'interblocage entre workers)
+        connection.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield
+            if connection.in_transaction:
+                connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    def _connection(self):
+        # Une connexion par thread et par processus (non partageable après un fork)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            self._initialize()
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _initialize(self):
+        """Crée le schéma et importe le CSV initial (une seule fois, tous processus confondus)"""
+        with self._init_lock:
+            if self._initialized:
+                return
+
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            connection = self._connect()
+            try:
+                connection.executescript(self.SCHEMA)
+                with self._transaction(connection):
+                    seeded = connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+                    if seeded is None:
+                        self._seed(connection)
+                        connection.execute("INSERT INTO meta (key, value) VALUES ('revision', 1)")
+            finally:
+                connection.close()
+            self._initialized = True
+
+    def _seed(self, connection):
+        if not os.path.exists(self.seed_csv):
+            return
+
+        df = pd.read_csv(self.seed_csv)
+        df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime(self.TIMESTAMP_FORMAT)
+        df = df[self.COLUMNS].astype(object).where(df[self.COLUMNS].notna(), None)
+        connection.executemany(
+            f"INSERT INTO anomalies ({', '.join(self.COLUMNS)}, revision) "
+            f"VALUES ({', '.join('?' * len(self.COLUMNS))}, 1)",
+            df.itertuples(index=False, name=None)
+        )
@@ -0,0 +1,178 @@
+"""
+Magasin de données partagé en mémoire (versionné)
+Les CSV ne sont relus que lorsque les fichiers changent réellement sur disque
+"""
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+from .data_loader import DataLoader
+
+
+def frame_fingerprint(df, columns=None):
+    """Empreinte du contenu d'un DataFrame (indépendante de l'index)"""
+    if columns is not None:
+        df = df[columns]
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(','.join(map(str, df.columns)).encode())
+    return digest.hexdigest()[:16]
+
+
+class DataStore:
+    """Point d'accès unique aux données pour les modèles et les routes"""
+
+    DATA_FILES = ['oee_data.csv', 'stops_data.csv', 'quality_data.csv']
+    LOCK_FILE = '.ingest.lock'
+
+    def __init__(self, check_interval=1.0, data_path=None, cache_path=None):
+        self.loader = DataLoader(data_path, cache_path)
+        self.check_interval = check_interval  # secondes entre deux vérifications disque
+        self.version = 0
+        self._fingerprint = None
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self._files_lock = threading.RLock()
+        self._files_lock_depth = 0
+        # Mémoïsation par requête fournie par la couche web (app.py : request_memo) ;
+        # la couche données n'importe pas Flask
+        self.memo = _no_memo
+
+    def get_loader(self):
+        """
+        Retourne le DataLoader partagé, rechargé si les fichiers ont changé
+        Au sein d'une requête, tous les composants voient le même loader.
+        """
+        return self.get_snapshot()[0]
+
+    def get_snapshot(self):
+        """
+        (loader, version) lus ensemble : la version est celle du loader retourné,
+        même si un rechargement a lieu entre-temps (clé de cache sûre)
+        """
+        return self.memo(('data_loader', id(self)), self._current_snapshot)
+
+    def _current_snapshot(self):
+        self.refresh_if_changed()
+        with self._lock:
+            return self.loader, self.version
+
+    def refresh_if_changed(self, force=False):
+        """
+        Recharge les données uniquement si les fichiers sources ont été modifiés
+        Args:
+            force: vérifie les fichiers sans attendre l'intervalle minimal
+        """
+        now = time.monotonic()
+        if not force and self._fingerprint is not None and now - self._last_check < self.check_interval:
+            return False
+
+        if self._fingerprint is not None and self._files_fingerprint() == self._fingerprint:
+            self._last_check = now
+            return False
+
+        with self.files_locked(), self._lock:
+            self._last_check = now
+            fingerprint = self._files_fingerprint()
+            if self._fingerprint is not None and fingerprint == self._fingerprint:
+                return False
+
+            # Lignes ajoutées par un autre processus : seule la fin des CSV est lue
+            loader = self.loader.appended_from_disk() if self._fingerprint is not None else None
+            if loader is None:
+                return self.reload()
+            self._install(loader, fingerprint)
+            return True
+
+    def reload(self):
+        """Recharge toutes les données depuis le disque et incrémente la version"""
+        with self.files_locked(), self._lock:
+            fingerprint = self._files_fingerprint()
+            loader = DataLoader(self.loader.data_path, self.loader.cache_path)
+            if not loader.load_data():
+                return False
+            self._install(loader, fingerprint)
+            return True
+
+    def replace_loader(self, loader):
+        """Met en service un loader déjà à jour (données ajoutées en mémoire et sur disque)"""
+        with self._lock:
+            self._install(loader, self._files_fingerprint())
+
+    @contextmanager
+    def files_locked(self, exclusive=False):
+        """
+        Verrou inter-processus (workers Gunicorn) sur les CSV : exclusif pour y
+        ajouter des lignes, partagé pour les lire. Réentrant au sein d'un processus.
+        """
+        with self._files_lock:
+            if self._files_lock_depth > 0 or fcntl is None:
+                self._files_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._files_lock_depth -= 1
+                return
+
+            os.makedirs(self.loader.data_path, exist_ok=True)
+            with open(os.path.join(self.loader.data_path, self.LOCK_FILE), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._files_lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._files_lock_depth = 0
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _install(self, loader, fingerprint):
+        # Remplacement atomique : les lecteurs en cours gardent l'ancien loader.
+        # Empreinte relevée avant la lecture : un ajout concurrent sera revu.
+        self.loader = loader
+        self._fingerprint = fingerprint
+        self._last_check = time.monotonic()
+        self.version += 1
+
+    def mark_updated(self):
+        """Signale une modification faite en mémoire et déjà écrite sur disque"""
+        with self._lock:
+            self._install(self.loader, self._files_fingerprint())
+
+    def _files_fingerprint(self):
+        """Empreinte légère (taille + date de modification) des fichiers sources"""
+        fingerprint = []
+        for filename in self.DATA_FILES:
+            path = os.path.join(self.loader.data_path, filename)
+            try:
+                stat = os.stat(path)
+                fingerprint.append((filename, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((filename, None, None))
+        return tuple(fingerprint)
+
+
+def _no_memo(key, compute):
+    return compute()
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_data_store():
+    """Retourne l'instance partagée du DataStore (créée à la demande)"""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = DataStore()
+    return _shared_store
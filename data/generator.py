@@ -0,0 +1,374 @@
+"""
+Générateur vectorisé de données synthétiques Evocon
+Paramétrable (lignes, machines, années, fréquence) et écrit par blocs sur disque
+
+Usage en ligne de commande (tests de capacité) :
+    python -m data.generator --lines 12 --years 5 --freq 15 --seed 42 --output /tmp/evocon
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+# Profils des lignes historiques (réutilisés cycliquement au-delà de 3 lignes)
+LINE_PROFILES = [
+    {'base_oee': 78, 'optimal_speed': 1000, 'speed_range': (700, 1300), 'machines': 3},
+    {'base_oee': 73, 'optimal_speed': 1100, 'speed_range': (800, 1400), 'machines': 4},
+    {'base_oee': 69, 'optimal_speed': 900, 'speed_range': (600, 1200), 'machines': 2}
+]
+
+# Types de produits TECPAP (sacs papier Kraft)
+PRODUCT_TYPES = [
+    'Fond_Plat',
+    'Fond_Carre_Sans_Poignees',
+    'Fond_Carre_Poignees_Plates',
+    'Fond_Carre_Poignees_Torsadees'
+]
+
+# Types d'arrêts et plages de durée (minutes)
+STOP_DURATIONS = {
+    'Changement_Format': (30, 120),
+    'Panne_Mecanique': (20, 180),
+    'Panne_Electrique': (10, 90),
+    'Reglage': (5, 30),
+    'Nettoyage': (15, 45),
+    'Attente_Materiel': (10, 60),
+    'Bourrage': (5, 25),
+    'Maintenance_Preventive': (60, 240),
+    'Probleme_Qualite': (10, 120),
+    'Attente_Operateur': (5, 30)
+}
+
+DEFECT_TYPES = [
+    'Dimension_Hors_Tolerance', 'Defaut_Surface', 'Pliage_Incorrect',
+    'Impression_Defectueuse', 'Contamination', 'Deformation'
+]
+
+ANOMALY_TEMPLATES = [
+    {
+        'symptom': 'Baisse soudaine de performance de 15%',
+        'root_cause': 'Usure des courroies de transmission',
+        'solution': 'Remplacement des courroies et réalignement',
+        'impact_oee': -15
+    },
+    {
+        'symptom': 'Arrêts micro-répétitifs toutes les 10 minutes',
+        'root_cause': 'Capteur de position défectueux',
+        'solution': 'Remplacement du capteur et recalibration',
+        'impact_oee': -8
+    },
+    {
+        'symptom': 'Augmentation du taux de rebut à 7%',
+        'root_cause': 'Dérive de la température de séchage',
+        'solution': 'Recalibration du système de contrôle thermique',
+        'impact_oee': -5
+    },
+    {
+        'symptom': 'Bourrage fréquent au niveau de l\'alimentation',
+        'root_cause': 'Tension d\'alimentation incorrecte',
+        'solution': 'Ajustement de la tension et nettoyage des rouleaux',
+        'impact_oee': -12
+    },
+    {
+        'symptom': 'Vibrations anormales détectées',
+        'root_cause': 'Roulements usés sur l\'axe principal',
+        'solution': 'Remplacement des roulements et équilibrage',
+        'impact_oee': -10
+    },
+    {
+        'symptom': 'Qualité d\'impression dégradée',
+        'root_cause': 'Viscosité d\'encre non conforme',
+        'solution': 'Ajustement de la viscosité et nettoyage des buses',
+        'impact_oee': -6
+    }
+]
+
+PRIORITIES = ['Low', 'Medium', 'High', 'Critical']
+
+
+class SyntheticDataGenerator:
+    """Génère les quatre tables Evocon par blocs de jours, sans boucle par enregistrement"""
+
+    def __init__(self, output_path, seed=None, n_lines=3, machines_per_line=None,
+                 years=2, freq_minutes=60, chunk_days=60, end_date=None):
+        """
+        Args:
+            output_path: dossier de sortie des CSV
+            seed: graine du générateur aléatoire (reproductibilité)
+            n_lines: nombre de lignes de production
+            machines_per_line: nombre de machines par ligne (défaut: profil historique 3/4/2)
+            years: profondeur d'historique en années
+            freq_minutes: pas d'échantillonnage des enregistrements OEE
+            chunk_days: nombre de jours générés et écrits par bloc
+        Raises:
+            ValueError: paramètre hors domaine (vérifié avant toute génération)
+        """
+        for name, value in [('n_lines', n_lines), ('freq_minutes', freq_minutes), ('chunk_days', chunk_days),
+                            ('machines_per_line', 1 if machines_per_line is None else machines_per_line)]:
+            if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value < 1:
+                raise ValueError(f"{name} doit être un entier strictement positif")
+        if not years > 0 or int(round(365 * years)) < 1:
+            raise ValueError("years doit couvrir au moins un jour")
+        if 60 % freq_minutes != 0 and freq_minutes % 60 != 0:
+            raise ValueError("freq_minutes doit diviser une heure ou en être un multiple")
+        if not any(6 <= minute // 60 <= 22 for minute in range(0, 24 * 60, freq_minutes)):
+            raise ValueError("freq_minutes ne laisse aucun créneau entre 6h et 22h")
+
+        self.output_path = output_path
+        self.rng = np.random.default_rng(seed)
+        self.n_days = int(round(365 * years))
+        self.freq_minutes = freq_minutes
+        self.chunk_days = chunk_days
+
+        end_date = end_date or datetime.now()
+        self.start_date = pd.Timestamp(end_date - timedelta(days=self.n_days)).normalize()
+
+        # Paramètres par ligne (tableaux indexés par numéro de ligne)
+        self.lines = np.array([f'L{i + 1}' for i in range(n_lines)])
+        profiles = [LINE_PROFILES[i % len(LINE_PROFILES)] for i in range(n_lines)]
+        self.base_oee = np.array([p['base_oee'] for p in profiles], dtype=float)
+        self.optimal_speed = np.array([p['optimal_speed'] for p in profiles], dtype=float)
+        self.min_speed = np.array([p['speed_range'][0] for p in profiles], dtype=float)
+        self.max_speed = np.array([p['speed_range'][1] for p in profiles], dtype=float)
+
+        if machines_per_line is None:
+            machine_counts = np.array([p['machines'] for p in profiles])
+        else:
+            machine_counts = np.full(n_lines, int(machines_per_line))
+        self.machine_counts = machine_counts
+        self.machine_offsets = np.concatenate([[0], np.cumsum(machine_counts)[:-1]])
+        self.machine_names = np.array([
+            f'M{line + 1}-{machine + 1}'
+            for line in range(n_lines) for machine in range(machine_counts[line])
+        ])
+
+        self.stop_types = np.array(list(STOP_DURATIONS.keys()))
+        self.stop_min = np.array([r[0] for r in STOP_DURATIONS.values()])
+        self.stop_max = np.array([r[1] for r in STOP_DURATIONS.values()])
+
+        self._next_stop_id = 1
+        self._next_anomaly_id = 1
+
+    def generate(self):
+        """Génère toutes les tables et retourne le nombre d'enregistrements par fichier"""
+        os.makedirs(self.output_path, exist_ok=True)
+        writers = {
+            'oee_data.csv': self._generate_oee,
+            'stops_data.csv': self._generate_stops,
+            'quality_data.csv': self._generate_quality,
+            'anomalies_data.csv': self._generate_anomalies
+        }
+        counts = {filename: 0 for filename in writers}
+
+        for chunk_start in range(0, self.n_days, self.chunk_days):
+            days = np.arange(chunk_start, min(chunk_start + self.chunk_days, self.n_days))
+            for filename, generate_chunk in writers.items():
+                chunk = generate_chunk(days)
+                path = os.path.join(self.output_path, filename)
+                chunk.to_csv(path, mode='w' if chunk_start == 0 else 'a',
+                             header=chunk_start == 0, index=False)
+                counts[filename] += len(chunk)
+
+        return counts
+
+    def _working_days(self, days):
+        """Filtre les jours ouvrés (lundi à vendredi)"""
+        dates = self.start_date + pd.to_timedelta(days, unit='D')
+        return days[dates.dayofweek < 5]
+
+    def _generate_oee(self, days):
+        """Enregistrements OEE : jours ouvrés × créneaux de 6h à 22h × lignes"""
+        rng = self.rng
+        n_lines = len(self.lines)
+        days = self._working_days(days)
+
+        slot_minutes = np.arange(0, 24 * 60, self.freq_minutes)
+        slot_minutes = slot_minutes[(slot_minutes // 60 >= 6) & (slot_minutes // 60 <= 22)]
+
+        day_idx = np.repeat(days, len(slot_minutes) * n_lines)
+        minutes = np.tile(np.repeat(slot_minutes, n_lines), len(days))
+        line_idx = np.tile(np.arange(n_lines), len(days) * len(slot_minutes))
+        hours = minutes // 60
+        n = len(day_idx)
+
+        optimal = self.optimal_speed[line_idx]
+        min_speed = self.min_speed[line_idx]
+        max_speed = self.max_speed[line_idx]
+
+        # 70% du temps proche de l'optimal, 30% éloigné
+        near_optimal = rng.random(n) < 0.7
+        machine_speed = np.where(
+            near_optimal,
+            rng.normal(optimal, 50),
+            rng.uniform(min_speed, max_speed)
+        )
+        machine_speed = np.clip(machine_speed, min_speed, max_speed).astype(int)
+
+        # Variations réalistes + pénalité non-linéaire d'écart à la vitesse optimale
+        seasonal_effect = 5 * np.sin(2 * np.pi * day_idx / 365)
+        hour_effect = np.where((hours < 8) | (hours > 20), -3, 0)
+        random_var = rng.normal(0, 3, n)
+        speed_penalty = (np.abs(machine_speed - optimal) / 100) ** 1.5
+        anomaly = np.where(rng.random(n) < 0.05, -15, 0)
+
+        oee = self.base_oee[line_idx] + seasonal_effect + hour_effect + random_var - speed_penalty + anomaly
+        oee = np.clip(oee, 40, 95)
+
+        # Composantes OEE impactées par la vitesse
+        speed_ratio = machine_speed / optimal
+        too_fast = speed_ratio > 1.15
+        too_slow = speed_ratio < 0.85
+
+        availability = oee * rng.uniform(0.85, 0.95, n) / 0.9
+        performance = oee * rng.uniform(0.88, 0.98, n) / 0.93
+        performance = np.where(too_fast, performance * 1.05, np.where(too_slow, performance * 0.92, performance))
+        quality = oee * rng.uniform(0.92, 0.99, n) / 0.96
+        quality = np.where(too_fast, quality * 0.90, np.where(too_slow, quality * 1.02, quality))
+
+        # Production réelle sur le créneau (vitesse en pièces/heure)
+        actual_production = (machine_speed * (self.freq_minutes / 60) * (oee / 100)).astype(int)
+
+        return pd.DataFrame({
+            'timestamp': self.start_date + pd.to_timedelta(day_idx * 1440 + minutes, unit='m'),
+            'line_id': self.lines[line_idx],
+            'product_type': np.array(PRODUCT_TYPES)[rng.integers(0, len(PRODUCT_TYPES), n)],
+            'machine_speed': machine_speed,
+            'oee': np.round(oee, 2),
+            'availability': np.round(np.clip(availability, 40, 100), 2),
+            'performance': np.round(np.clip(performance, 40, 100), 2),
+            'quality': np.round(np.clip(quality, 40, 100), 2),
+            'production_time': self.freq_minutes,
+            'planned_production_time': self.freq_minutes,
+            'good_pieces': (actual_production * (quality / 100)).astype(int),
+            'total_pieces': actual_production
+        })
+
+    def _generate_stops(self, days):
+        """Arrêts : nombre de Poisson(8) par jour ouvré et par ligne"""
+        rng = self.rng
+        n_lines = len(self.lines)
+        days = self._working_days(days)
+
+        counts = rng.poisson(8, size=len(days) * n_lines)
+        day_idx = np.repeat(np.repeat(days, n_lines), counts)
+        line_idx = np.repeat(np.tile(np.arange(n_lines), len(days)), counts)
+        n = len(day_idx)
+
+        type_idx = rng.integers(0, len(self.stop_types), n)
+        duration = self.stop_min[type_idx] + (
+            rng.random(n) * (self.stop_max[type_idx] - self.stop_min[type_idx])
+        ).astype(int)
+        start_minutes = day_idx * 1440 + rng.integers(6, 22, n) * 60 + rng.integers(0, 60, n)
+        start_time = self.start_date + pd.to_timedelta(start_minutes, unit='m')
+
+        machine_idx = self.machine_offsets[line_idx] + (
+            rng.random(n) * self.machine_counts[line_idx]
+        ).astype(int)
+        stop_type = self.stop_types[type_idx]
+        machine = self.machine_names[machine_idx]
+
+        stop_ids = np.arange(self._next_stop_id, self._next_stop_id + n)
+        self._next_stop_id += n
+
+        return pd.DataFrame({
+            'stop_id': stop_ids,
+            'line_id': self.lines[line_idx],
+            'machine_id': machine,
+            'stop_type': stop_type,
+            'start_time': start_time,
+            'end_time': start_time + pd.to_timedelta(duration, unit='m'),
+            'duration_minutes': duration,
+            'description': np.char.add(np.char.add(stop_type.astype(str), ' sur '), machine.astype(str)),
+            'operator': np.char.add('OP', rng.integers(1, 15, n).astype(str)),
+            'resolved': True
+        })
+
+    def _generate_quality(self, days):
+        """Contrôles qualité : 3 équipes par jour ouvré et par ligne"""
+        rng = self.rng
+        n_lines = len(self.lines)
+        days = self._working_days(days)
+
+        day_idx = np.repeat(days, n_lines * 3)
+        line_idx = np.tile(np.repeat(np.arange(n_lines), 3), len(days))
+        shift = np.tile(np.arange(3), len(days) * n_lines)
+        n = len(day_idx)
+
+        total_produced = rng.integers(8000, 12000, n)
+        defect_rate = rng.uniform(0.01, 0.08, n)
+        total_defects = (total_produced * defect_rate).astype(int)
+
+        return pd.DataFrame({
+            'timestamp': self.start_date + pd.to_timedelta(day_idx * 24 + shift * 8, unit='h'),
+            'line_id': self.lines[line_idx],
+            'shift': shift + 1,
+            'total_produced': total_produced,
+            'total_defects': total_defects,
+            'defect_rate': np.round(defect_rate * 100, 2),
+            'defect_type': np.array(DEFECT_TYPES)[rng.integers(0, len(DEFECT_TYPES), n)],
+            'rework_count': (total_defects * 0.3).astype(int),
+            'scrap_count': (total_defects * 0.7).astype(int)
+        })
+
+    def _generate_anomalies(self, days):
+        """Anomalies documentées : une par semaine environ"""
+        rng = self.rng
+        day_idx = days[days % 7 == 0]
+        n = len(day_idx)
+
+        line_idx = rng.integers(0, len(self.lines), n)
+        machine_idx = self.machine_offsets[line_idx] + (
+            rng.random(n) * self.machine_counts[line_idx]
+        ).astype(int)
+        template_idx = rng.integers(0, len(ANOMALY_TEMPLATES), n)
+        templates = pd.DataFrame(ANOMALY_TEMPLATES).iloc[template_idx].reset_index(drop=True)
+
+        anomaly_ids = np.arange(self._next_anomaly_id, self._next_anomaly_id + n)
+        self._next_anomaly_id += n
+
+        return pd.DataFrame({
+            'anomaly_id': anomaly_ids,
+            'timestamp': self.start_date + pd.to_timedelta(day_idx, unit='D'),
+            'line_id': self.lines[line_idx],
+            'machine_id': self.machine_names[machine_idx],
+            'symptom': templates['symptom'].to_numpy(),
+            'root_cause': templates['root_cause'].to_numpy(),
+            'solution_applied': templates['solution'].to_numpy(),
+            'resolution_time_minutes': rng.integers(30, 480, n),  # 30min à 8h
+            'impact_oee': templates['impact_oee'].to_numpy(),
+            'recurrence_count': rng.integers(1, 5, n),
+            'priority': np.array(PRIORITIES)[rng.integers(0, len(PRIORITIES), n)],
+            'status': 'Resolved'
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques Evocon")
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(__file__), 'generated'))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--lines', type=int, default=3)
+    parser.add_argument('--machines', type=int, default=None, help="machines par ligne")
+    parser.add_argument('--years', type=float, default=2)
+    parser.add_argument('--freq', type=int, default=60, help="pas d'échantillonnage en minutes")
+    parser.add_argument('--chunk-days', type=int, default=60)
+    args = parser.parse_args()
+
+    try:
+        generator = SyntheticDataGenerator(
+            args.output, seed=args.seed, n_lines=args.lines, machines_per_line=args.machines,
+            years=args.years, freq_minutes=args.freq, chunk_days=args.chunk_days
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    counts = generator.generate()
+    for filename, count in counts.items():
+        print(f"✓ {count} enregistrements dans {filename}")
+    print(f"Total: {sum(counts.values())} enregistrements")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Requêtes sur l'historique OEE (/api/historical)
+Deux modes :
+- agrégé : regroupement par heure, équipe (3 x 8h depuis minuit) ou jour, une
+  agrégation par colonne demandée, puis sous-échantillonnage LTTB par ligne si
+  la série dépasse max_points ;
+- brut : enregistrements horaires paginés par curseur (horodatage, ligne).
+La taille de la réponse dépend de la résolution demandée, pas de la longueur
+de l'historique.
+"""
+
+import base64
+
+import numpy as np
+import pandas as pd
+
+from utils.serialization import frame_payload, parse_format
+
+
+class HistoricalQuery:
+    BUCKETS = {'hourly': 'h', 'shift': '8h', 'daily': 'D'}
+    AGGREGATIONS = ('mean', 'median', 'min', 'max', 'sum', 'first', 'last')
+    METRIC_COLUMNS = ['oee', 'availability', 'performance', 'quality', 'machine_speed', 'production_time',
+                      'planned_production_time', 'good_pieces', 'total_pieces']
+    RAW_COLUMNS = ['product_type'] + METRIC_COLUMNS
+    DEFAULT_SERIES_COLUMNS = ['oee', 'availability', 'performance', 'quality']
+    MAX_POINTS = 10000
+    DEFAULT_PAGE_SIZE = 1000
+    MAX_PAGE_SIZE = 10000
+
+    def __init__(self, line_id='all', days=90, bucket='raw', aggregation='mean', columns=None,
+                 max_points=None, cursor=None, limit=None, orient='records'):
+        """
+        Args:
+            line_id: ligne ('all' pour toutes)
+            days: profondeur de l'historique (jours avant le dernier enregistrement)
+            bucket: 'raw' (enregistrements paginés), 'hourly', 'shift' ou 'daily'
+            aggregation: agrégation des enregistrements d'un même intervalle
+            columns: colonnes retournées (par défaut toutes en brut, OEE et ses
+                composantes en agrégé)
+            max_points: nombre maximal de points par ligne (agrégé, LTTB)
+            cursor: curseur de page retourné par la page précédente (brut)
+            limit: taille de page (brut)
+            orient: 'records' (liste d'enregistrements) ou 'columns' (valeurs par colonne)
+        """
+        if days <= 0:
+            raise ValueError("days doit être positif")
+        if bucket != 'raw' and bucket not in self.BUCKETS:
+            raise ValueError(f"bucket inconnu: {bucket} (raw, {', '.join(self.BUCKETS)})")
+        if aggregation not in self.AGGREGATIONS:
+            raise ValueError(f"Agrégation inconnue: {aggregation} ({', '.join(self.AGGREGATIONS)})")
+
+        allowed = self.RAW_COLUMNS if bucket == 'raw' else self.METRIC_COLUMNS
+        if columns is None:
+            columns = list(allowed) if bucket == 'raw' else list(self.DEFAULT_SERIES_COLUMNS)
+        unknown = [column for column in columns if column not in allowed]
+        if unknown or not columns:
+            raise ValueError(f"Colonnes invalides: {', '.join(unknown) or '(aucune)'}")
+
+        if max_points is not None and not 3 <= max_points <= self.MAX_POINTS:
+            raise ValueError(f"max_points doit être compris entre 3 et {self.MAX_POINTS}")
+        limit = self.DEFAULT_PAGE_SIZE if limit is None else limit
+        if not 1 <= limit <= self.MAX_PAGE_SIZE:
+            raise ValueError(f"limit doit être compris entre 1 et {self.MAX_PAGE_SIZE}")
+
+        self.line_id = line_id
+        self.days = days
+        self.bucket = bucket
+        self.aggregation = aggregation
+        self.columns = columns
+        self.max_points = max_points
+        self.cursor = self.decode_cursor(cursor) if cursor else None
+        self.limit = limit
+        self.orient = parse_format(orient)
+
+    @classmethod
+    def from_args(cls, args):
+        """Construit la requête depuis les paramètres d'URL"""
+        def optional_int(name):
+            value = args.get(name)
+            return int(value) if value not in (None, '') else None
+
+        columns = args.get('columns')
+        return cls(
+            line_id=args.get('line_id', 'all'),
+            days=int(args.get('days', 90)),
+            bucket=args.get('bucket', 'raw'),
+            aggregation=args.get('agg', 'mean'),
+            columns=[column.strip() for column in columns.split(',') if column.strip()] if columns else None,
+            max_points=optional_int('max_points'),
+            cursor=args.get('cursor'),
+            limit=optional_int('limit'),
+            orient=args.get('format')
+        )
+
+    def run(self, oee_index):
+        """Exécute la requête sur l'index temporel OEE"""
+        frame = oee_index.window(self.line_id, days=self.days)
+        if self.bucket == 'raw':
+            return self._page(frame)
+        return self._series(frame)
+
+    def _series(self, frame):
+        """Série agrégée par intervalle et par ligne, sous-échantillonnée si nécessaire"""
+        buckets = frame['timestamp'].dt.floor(self.BUCKETS[self.bucket]).rename('timestamp')
+        series = frame.groupby([frame['line_id'], buckets], sort=True)[self.columns] \
+            .agg(self.aggregation).reset_index()
+
+        total = len(series)
+        if self.max_points is not None:
+            kept = []
+            for _, line_series in series.groupby('line_id', sort=True):
+                x = (line_series['timestamp'] - line_series['timestamp'].iloc[0]).dt.total_seconds().to_numpy()
+                y = np.nan_to_num(line_series[self.columns[0]].to_numpy(dtype=np.float64))
+                kept.append(line_series.index.to_numpy()[lttb(x, y, self.max_points)])
+            series = series.loc[np.concatenate(kept)] if kept else series
+
+        series = series.sort_values(['timestamp', 'line_id'], kind='stable')
+        series['timestamp'] = series['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+        return {
+            'bucket': self.bucket,
+            'aggregation': self.aggregation,
+            'columns': self.columns,
+            'points': len(series),
+            'downsampled': len(series) < total,
+            'format': self.orient,
+            'data': frame_payload(series[['timestamp', 'line_id'] + self.columns], self.orient)
+        }
+
+    def _page(self, frame):
+        """Page d'enregistrements bruts, triés par (horodatage, ligne), après le curseur"""
+        timestamps = frame['timestamp'].to_numpy().astype('datetime64[ns]')
+        start = 0
+        pending = frame.iloc[0:0]
+        if self.cursor is not None:
+            cursor_timestamp, cursor_line = self.cursor
+            # Enregistrements du même horodatage non encore retournés, puis la suite
+            start = np.searchsorted(timestamps, cursor_timestamp, side='left')
+            end = np.searchsorted(timestamps, cursor_timestamp, side='right')
+            pending = frame.iloc[start:end]
+            pending = pending[pending['line_id'] > cursor_line]
+            start = end
+
+        # Jusqu'à la fin du dernier horodatage entamé, pour trier ses lignes
+        stop = min(start + self.limit, len(frame))
+        if stop > start:
+            stop = np.searchsorted(timestamps, timestamps[stop - 1], side='right')
+        chunk = pd.concat([pending, frame.iloc[start:stop]]) \
+            .sort_values(['timestamp', 'line_id'], kind='stable')
+        page = chunk.iloc[:self.limit]
+
+        next_cursor = None
+        if len(page) > 0 and (len(page) < len(chunk) or stop < len(frame)):
+            last = page.iloc[-1]
+            next_cursor = self.encode_cursor(last['timestamp'], last['line_id'])
+
+        return {
+            'bucket': 'raw',
+            'columns': self.columns,
+            'next_cursor': next_cursor,
+            'format': self.orient,
+            'data': frame_payload(page[['timestamp', 'line_id'] + self.columns], self.orient)
+        }
+
+    @staticmethod
+    def encode_cursor(timestamp, line_id):
+        value = f"{pd.Timestamp(timestamp).value}|{line_id}"
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Curseur -> (horodatage datetime64[ns], ligne)"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            nanoseconds, line_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+            return np.datetime64(int(nanoseconds), 'ns'), line_id
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Curseur invalide")
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets : indices des `threshold` points qui
+    préservent au mieux la forme de la courbe (premier et dernier inclus)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Intervalles 1..threshold-2 répartis entre le premier et le dernier point
+    bounds = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    sizes = np.diff(bounds)
+    mean_x = np.add.reduceat(x[:n - 1], bounds[:-1]) / sizes
+    mean_y = np.add.reduceat(y[:n - 1], bounds[:-1]) / sizes
+    # Point de référence de l'intervalle suivant (le dernier point pour le dernier intervalle)
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        areas = np.abs((x[previous] - next_x[i]) * (y[lo:hi] - y[previous])
+                       - (x[previous] - x[lo:hi]) * (next_y[i] - y[previous]))
+        previous = lo + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
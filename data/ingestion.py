@@ -0,0 +1,186 @@
+"""
+Ingestion en continu des enregistrements Evocon (OEE horaire, arrêts, qualité)
+Chaque lot est validé, dédoublonné, ajouté à la fin des CSV (journal en ajout
+seul) puis appliqué en mémoire : les requêtes voient les nouvelles données sans
+rechargement complet.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class DataIngestor:
+    # Tables alimentées en continu, clé de dédoublonnage et colonnes facultatives
+    TABLES = {
+        'oee_data': {'key': ['line_id', 'timestamp'], 'optional': []},
+        'stops_data': {'key': ['stop_id'], 'optional': ['end_time', 'duration_minutes',
+                                                        'description', 'operator', 'resolved']},
+        'quality_data': {'key': ['line_id', 'timestamp'], 'optional': ['defect_type']}
+    }
+    MAX_BATCH_SIZE = 10000
+
+    def __init__(self, store):
+        self.store = store
+        self._keys = {}  # table -> (loader de référence, ensemble des clés)
+        self._lock = threading.Lock()
+
+    def ingest(self, batch):
+        """
+        Ingère un lot {table: [enregistrements]}
+        Returns:
+            (résumé par table, liste des enregistrements OEE insérés)
+        """
+        unknown = [table for table in batch if table not in self.TABLES]
+        if unknown:
+            raise ValueError(f"Tables inconnues: {', '.join(unknown)}")
+        if sum(len(records) for records in batch.values()) > self.MAX_BATCH_SIZE:
+            raise ValueError(f"Lot trop volumineux (maximum {self.MAX_BATCH_SIZE} enregistrements)")
+
+        # Verrou inter-processus (workers Gunicorn) autour du dédoublonnage + écriture
+        with self._lock, self.store.files_locked(exclusive=True):
+            # Écritures éventuelles d'un autre processus : rechargement avant dédoublonnage
+            self.store.refresh_if_changed(force=True)
+            loader = self.store.loader
+
+            summary = {}
+            frames = {}
+            for table, records in batch.items():
+                rows, rejected = self._normalize(table, records, getattr(loader, table))
+                rows, duplicates = self._deduplicate(table, rows, loader)
+                summary[table] = {
+                    'received': len(records),
+                    'inserted': len(rows),
+                    'duplicates': duplicates,
+                    'rejected': rejected
+                }
+                if len(rows) > 0:
+                    frames[table] = rows
+
+            if not frames:
+                return summary, []
+
+            # Journal d'abord (durabilité), puis application en mémoire
+            for table, rows in frames.items():
+                self._append_csv(loader, table, rows)
+
+            new_loader = loader.appended(frames)
+            new_loader.mark_consumed(frames)
+            self.store.replace_loader(new_loader)
+            for table, rows in frames.items():
+                _, keys = self._keys[table]
+                keys.update(self._row_keys(table, rows))
+                self._keys[table] = (new_loader, keys)
+
+            oee_rows = frames.get('oee_data')
+            return summary, [] if oee_rows is None else oee_rows.to_dict('records')
+
+    def _normalize(self, table, records, existing):
+        """Aligne les enregistrements sur le schéma du CSV ; rejette les incomplets et les invalides"""
+        columns = existing.columns.tolist()
+        df = pd.DataFrame.from_records(records, columns=columns) if records else existing.iloc[0:0].copy()
+
+        invalid = np.zeros(len(df), dtype=bool)
+        for column in columns:
+            dtype = existing[column].dtype
+            provided = df[column].notna().to_numpy()
+            if dtype.kind == 'M':
+                df[column] = self._to_datetime(df[column], dtype)
+            elif dtype.kind in 'iuf':
+                df[column] = pd.to_numeric(df[column].map(_number_or_none), errors='coerce')
+                if dtype.kind in 'iu':
+                    # Valeur non entière : rejetée plutôt que tronquée
+                    values = df[column].to_numpy(dtype=np.float64)
+                    invalid |= ~np.isnan(values) & (values != np.round(values))
+            elif dtype.kind == 'b':
+                invalid |= provided & ~df[column].isin([True, False]).to_numpy()
+            # Valeur fournie mais illisible (texte dans une colonne numérique, date avec fuseau horaire...)
+            invalid |= provided & df[column].isna().to_numpy()
+
+        if table == 'stops_data':
+            # Arrêt en cours : pas encore de fin ni de durée
+            missing_duration = df['duration_minutes'].isna() & df['end_time'].notna()
+            df.loc[missing_duration, 'duration_minutes'] = (
+                (df['end_time'] - df['start_time']).dt.total_seconds() / 60
+            )[missing_duration].round()
+            df['duration_minutes'] = df['duration_minutes'].fillna(0)
+            df['resolved'] = df['resolved'].where(df['resolved'].notna(), df['end_time'].notna())
+
+        required = [col for col in columns if col not in self.TABLES[table]['optional']]
+        valid = df[required].notna().all(axis=1).to_numpy() & ~invalid
+        df = df[valid]
+
+        # Types identiques à la table en mémoire
+        for column in columns:
+            dtype = existing[column].dtype
+            if dtype.kind not in 'Mf':
+                df[column] = df[column].astype(dtype)
+
+        return df.reset_index(drop=True), int((~valid).sum())
+
+    @staticmethod
+    def _to_datetime(values, dtype):
+        """Dates naïves (comme les CSV) ; valeur illisible ou avec fuseau horaire -> NaT"""
+        try:
+            parsed = pd.to_datetime(values, errors='coerce')
+            if parsed.dt.tz is None:
+                return parsed.astype(dtype)
+        except (TypeError, ValueError):
+            pass
+
+        def naive(value):
+            try:
+                timestamp = pd.Timestamp(value)
+            except (TypeError, ValueError):
+                return pd.NaT
+            return timestamp if timestamp is pd.NaT or timestamp.tzinfo is None else pd.NaT
+
+        return pd.Series([naive(value) for value in values], index=values.index, dtype=dtype)
+
+    def _deduplicate(self, table, rows, loader):
+        """Retire les doublons internes au lot et ceux déjà présents"""
+        if len(rows) == 0:
+            return rows, 0
+
+        known = self._known_keys(table, loader)
+        row_keys = self._row_keys(table, rows)
+        seen = set()
+        keep = np.zeros(len(rows), dtype=bool)
+        for i, key in enumerate(row_keys):
+            if key not in known and key not in seen:
+                keep[i] = True
+                seen.add(key)
+
+        return rows[keep].reset_index(drop=True), int((~keep).sum())
+
+    def _known_keys(self, table, loader):
+        cached = self._keys.get(table)
+        if cached is None or cached[0] is not loader:
+            cached = (loader, set(self._row_keys(table, getattr(loader, table))))
+            self._keys[table] = cached
+        return cached[1]
+
+    def _row_keys(self, table, rows):
+        arrays = []
+        for column in self.TABLES[table]['key']:
+            values = rows[column].to_numpy()
+            if values.dtype.kind == 'M':
+                values = values.astype('datetime64[us]').astype(np.int64)
+            arrays.append(values.tolist())
+        return arrays[0] if len(arrays) == 1 else list(zip(*arrays))
+
+    def _append_csv(self, loader, table, rows):
+        """Ajoute les lignes à la fin du CSV (une seule écriture)"""
+        filename, _ = loader.TABLES[table]
+        path = os.path.join(loader.data_path, filename)
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            f.write(rows.to_csv(header=False, index=False))
+
+
+def _number_or_none(value):
+    # Booléens, listes, objets : pas des nombres
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, np.number)):
+        return None
+    return value
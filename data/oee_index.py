@@ -0,0 +1,98 @@
+"""
+Index temporel des données OEE
+Données triées par horodatage et partitionnées par ligne : une fenêtre
+("dernières 24h", "7 derniers jours"...) se résout par recherche dichotomique
+et retourne une tranche, sans masque booléen sur tout l'historique.
+"""
+
+import copy
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def line_sort_key(line_id):
+    """Clé de tri naturel des lignes de production (L2 avant L10)"""
+    prefix, number = re.match(r'(.*?)(\d*)$', str(line_id)).groups()
+    return prefix, int(number) if number else -1
+
+
+class OEETimeIndex:
+    def __init__(self, oee_data):
+        timestamps = oee_data['timestamp']
+        if not timestamps.is_monotonic_increasing:
+            # Tri stable : l'ordre d'origine est conservé à horodatage égal
+            oee_data = oee_data.iloc[np.argsort(timestamps.to_numpy(), kind='stable')]
+
+        self.data = oee_data
+        self.timestamps = oee_data['timestamp'].to_numpy()
+        self.max_timestamp = pd.Timestamp(self.timestamps[-1]) if len(self.timestamps) > 0 else None
+
+        # Partition par ligne (chaque partition reste triée)
+        self.partitions = {}
+        self.partition_timestamps = {}
+        for line_id, line_data in oee_data.groupby('line_id', sort=True):
+            self.partitions[line_id] = line_data
+            self.partition_timestamps[line_id] = line_data['timestamp'].to_numpy()
+
+    def appended(self, rows):
+        """
+        Nouvel index incluant `rows` (l'index courant reste intact)
+        Les lignes postérieures au dernier enregistrement sont ajoutées en fin de
+        partition ; sinon l'index est reconstruit.
+        """
+        if len(rows) == 0:
+            return self
+
+        rows = rows.iloc[np.argsort(rows['timestamp'].to_numpy(), kind='stable')]
+        rows = rows.set_axis(pd.RangeIndex(len(self.data), len(self.data) + len(rows)))
+        if self.max_timestamp is not None and rows['timestamp'].iloc[0] < self.max_timestamp:
+            return OEETimeIndex(pd.concat([self.data, rows]))
+
+        index = copy.copy(self)
+        index.data = pd.concat([self.data, rows])
+        index.timestamps = index.data['timestamp'].to_numpy()
+        index.max_timestamp = pd.Timestamp(index.timestamps[-1])
+        index.partitions = dict(self.partitions)
+        index.partition_timestamps = dict(self.partition_timestamps)
+        for line_id, line_rows in rows.groupby('line_id', sort=True):
+            if line_id in index.partitions:
+                line_rows = pd.concat([index.partitions[line_id], line_rows])
+            index.partitions[line_id] = line_rows
+            index.partition_timestamps[line_id] = line_rows['timestamp'].to_numpy()
+        return index
+
+    @property
+    def lines(self):
+        return sorted(self.partitions, key=line_sort_key)
+
+    def _frame(self, line_id):
+        """Retourne (données, horodatages) pour une ligne ou pour toutes ('all')"""
+        if line_id == 'all':
+            return self.data, self.timestamps
+        if line_id not in self.partitions:
+            return self.data.iloc[0:0], self.timestamps[0:0]
+        return self.partitions[line_id], self.partition_timestamps[line_id]
+
+    def window(self, line_id='all', days=None, hours=None):
+        """Données des derniers `days` jours / `hours` heures avant le dernier enregistrement global"""
+        frame, timestamps = self._frame(line_id)
+        if self.max_timestamp is None:
+            return frame
+
+        cutoff = self.max_timestamp - pd.Timedelta(days=days or 0, hours=hours or 0)
+        start = np.searchsorted(timestamps, cutoff.to_datetime64(), side='left')
+        return frame.iloc[start:]
+
+    def between(self, line_id='all', start=None, end=None):
+        """Données dans l'intervalle [start, end[ (bornes optionnelles)"""
+        frame, timestamps = self._frame(line_id)
+        lo = 0 if start is None else np.searchsorted(timestamps, pd.Timestamp(start).to_datetime64(), side='left')
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, pd.Timestamp(end).to_datetime64(), side='left')
+        return frame.iloc[lo:hi]
+
+    def tail(self, line_id='all', n=24):
+        """Les n derniers enregistrements d'une ligne"""
+        frame, _ = self._frame(line_id)
+        return frame.iloc[-n:] if n > 0 else frame.iloc[0:0]
@@ -0,0 +1,352 @@
+"""
+Agrégats OEE matérialisés
+Cellules ligne x produit x équipe (3 x 8h depuis minuit) x période (jour,
+semaine, mois) : nombre d'enregistrements, sommes et sommes des carrés des
+métriques. Moyennes et écarts-types se déduisent des cellules sans relire les
+enregistrements horaires ; les cellules sont construites au chargement puis
+complétées par les lots ingérés.
+
+Les périodes terminées sont ajoutées à des tableaux partagés entre versions
+(chaque version n'en voit que ses premières lignes) ; seule la période en
+cours est recopiée à chaque lot. Un lot du flux normal coûte donc O(lot) ; un
+lot qui touche une période déjà terminée (rattrapage) reconstruit la table.
+
+Une fenêtre glissante ("dernières 24h", "7 derniers jours"...) combine les
+jours complets (sommes cumulées des totaux journaliers de la ligne) et la
+tranche d'enregistrements bruts, lue dans l'index OEE, entre le début de la
+fenêtre et le jour suivant : le résultat est celui d'un calcul sur les
+enregistrements de la fenêtre.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+class OEERollups:
+    GRAINS = ('day', 'week', 'month')
+    METRICS = ['oee', 'availability', 'performance', 'quality', 'machine_speed', 'production_time',
+               'planned_production_time', 'good_pieces', 'total_pieces']
+    KEYS = ['line_id', 'product_type', 'shift', 'period']
+    TOTALS = ['count'] + [f'sum_{m}' for m in METRICS] + [f'sumsq_{m}' for m in METRICS]
+    SHIFT_HOURS = 8
+
+    def __init__(self, oee_index):
+        """
+        Args:
+            oee_index: OEETimeIndex des enregistrements (bords de fenêtre)
+        """
+        self.index = oee_index
+        self.cells = {grain: _PeriodTable(len(self.TOTALS)) for grain in self.GRAINS}
+        # Par ligne : totaux journaliers et leurs sommes cumulées, dernier enregistrement
+        self.days = {}
+        self.latest_rows = {}
+        self._add(oee_index.data)
+
+    def appended(self, rows, oee_index):
+        """
+        Nouveaux agrégats incluant `rows` (les agrégats courants restent intacts)
+        Args:
+            oee_index: index incluant déjà `rows` (OEETimeIndex.appended)
+        """
+        rollups = copy.copy(self)
+        rollups.index = oee_index
+        rollups._add(rows)
+        return rollups
+
+    @property
+    def lines(self):
+        return self.index.lines
+
+    def window_stats(self, line_id='all', days=None, hours=None):
+        """
+        Statistiques des derniers `days` jours / `hours` heures avant le dernier
+        enregistrement global (mêmes bornes que OEETimeIndex.window)
+        Returns:
+            {'count': n, 'mean': {métrique: valeur}, 'std': {métrique: écart-type}}
+        """
+        totals = np.zeros(len(self.TOTALS))
+        if self.index.max_timestamp is None:
+            return self._describe(totals)
+
+        cutoff = (self.index.max_timestamp - pd.Timedelta(days=days or 0, hours=hours or 0)).to_datetime64()
+        boundary = cutoff.astype('datetime64[D]')
+        if boundary < cutoff:
+            boundary = boundary + np.timedelta64(1, 'D')
+
+        lines = self.lines if line_id == 'all' else [line_id] if line_id in self.days else []
+        for line in lines:
+            # Bord de fenêtre : enregistrements bruts jusqu'au premier jour complet
+            timestamps = self.index.partition_timestamps[line]
+            lo = timestamps.searchsorted(cutoff.astype(timestamps.dtype), side='left')
+            hi = timestamps.searchsorted(boundary.astype(timestamps.dtype), side='left')
+            if hi > lo:
+                edge = self.index.partitions[line].iloc[lo:hi][self.METRICS].to_numpy(dtype=np.float64)
+                totals[0] += hi - lo
+                totals[1:] += np.concatenate([edge.sum(axis=0), (edge ** 2).sum(axis=0)])
+
+            # Jours complets
+            totals += self.days[line].totals_since(int(boundary.astype(np.int64)))
+        return self._describe(totals)
+
+    def latest(self, line_id):
+        """Métriques du dernier enregistrement d'une ligne (None si aucune donnée)"""
+        latest = self.latest_rows.get(line_id)
+        return None if latest is None else dict(zip(self.METRICS, latest[1].tolist()))
+
+    def rollup(self, grain='day', line_id='all', start=None, end=None, by=('product_type', 'shift')):
+        """
+        Statistiques par ligne et par période [start, end[, regroupées selon `by`
+        Args:
+            grain: 'day', 'week' (semaines commençant le lundi) ou 'month'
+            by: sous-ensemble de ('product_type', 'shift') ; () pour une ligne par période
+        Returns:
+            DataFrame (line_id, [by...], period, count, mean_<métrique>, std_<métrique>)
+        """
+        if grain not in self.GRAINS:
+            raise ValueError(f"Période inconnue: {grain} ({', '.join(self.GRAINS)})")
+        unknown = [key for key in by if key not in ('product_type', 'shift')]
+        if unknown:
+            raise ValueError(f"Regroupement inconnu: {', '.join(unknown)}")
+
+        cells = self.cells[grain].frame(self.KEYS, self.TOTALS)
+        mask = np.ones(len(cells), dtype=bool)
+        if line_id != 'all':
+            mask &= (cells['line_id'] == line_id).to_numpy()
+        if start is not None:
+            mask &= (cells['period'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (cells['period'] < pd.Timestamp(end)).to_numpy()
+
+        grouped = cells[mask].groupby(['line_id', *by, 'period'], sort=True)[self.TOTALS].sum()
+        totals = grouped.to_numpy()
+        mean, std = self._moments(totals)
+        result = pd.DataFrame({'count': totals[:, 0].astype(np.int64)}, index=grouped.index)
+        for i, column in enumerate(self.METRICS):
+            result[f'mean_{column}'] = mean[:, i]
+            result[f'std_{column}'] = std[:, i]
+        return result.reset_index()
+
+    def _add(self, rows):
+        """Intègre des enregistrements (nouvelles tables : les versions précédentes restent valides)"""
+        if len(rows) == 0:
+            return
+
+        timestamps = rows['timestamp'].to_numpy().astype('datetime64[ns]')
+        values = rows[self.METRICS].to_numpy(dtype=np.float64)
+        totals = np.column_stack([np.ones(len(values)), values, values ** 2])
+
+        # Cellules ligne x produit x équipe x période : un code entier par cellule
+        line_codes, line_ids = pd.factorize(rows['line_id'].to_numpy(), use_na_sentinel=False)
+        product_codes, products = pd.factorize(rows['product_type'].to_numpy(), use_na_sentinel=False)
+        line_ids, products = np.asarray(line_ids), np.asarray(products)
+        shifts_per_day = 24 // self.SHIFT_HOURS
+        days = timestamps.astype('datetime64[D]')
+        shifts = ((timestamps - days) // np.timedelta64(self.SHIFT_HOURS, 'h')).astype(np.int64)
+        groups = (line_codes * len(products) + product_codes) * shifts_per_day + shifts
+        group_count = len(line_ids) * len(products) * shifts_per_day
+
+        self.cells = dict(self.cells)
+        for grain, period in self._periods(days).items():
+            codes, sums = _reduce(period.view(np.int64) * group_count + groups, totals)
+            cell_periods, cell_groups = np.divmod(codes, group_count)
+            cell_lines, rest = np.divmod(cell_groups, len(products) * shifts_per_day)
+            cell_products, cell_shifts = np.divmod(rest, shifts_per_day)
+            keys = list(zip(line_ids[cell_lines].tolist(), products[cell_products].tolist(), cell_shifts.tolist()))
+            self.cells[grain] = self.cells[grain].merged(cell_periods, keys, sums)
+
+        # Dernier enregistrement par ligne (à horodatage égal, le dernier reçu, comme l'index)
+        self.latest_rows = dict(self.latest_rows)
+        for code, line_id in enumerate(line_ids.tolist()):
+            positions = np.flatnonzero(line_codes == code)
+            last = positions[np.flatnonzero(timestamps[positions] == timestamps[positions].max())[-1]]
+            current = self.latest_rows.get(line_id)
+            if current is None or timestamps[last] >= current[0]:
+                self.latest_rows[line_id] = (timestamps[last], values[last])
+
+        # Totaux journaliers par ligne (sommes cumulées des jours terminés)
+        self.days = dict(self.days)
+        codes, sums = _reduce(days.view(np.int64) * len(line_ids) + line_codes, totals)
+        day_periods, day_lines = np.divmod(codes, len(line_ids))
+        for code, line_id in enumerate(line_ids.tolist()):
+            selected = day_lines == code
+            table = self.days.get(line_id) or _PeriodTable(len(self.TOTALS), cumulative=True)
+            self.days[line_id] = table.merged(day_periods[selected], [None] * int(selected.sum()), sums[selected])
+
+    @staticmethod
+    def _periods(days):
+        return {
+            'day': days,
+            # 1970-01-01 est un jeudi : (jours + 3) % 7 = rang dans la semaine (lundi = 0)
+            'week': days - ((days.view(np.int64) + 3) % 7).astype('timedelta64[D]'),
+            'month': days.astype('datetime64[M]').astype('datetime64[D]')
+        }
+
+    def _moments(self, totals):
+        """(moyennes, écarts-types échantillon) par métrique, à partir de lignes de totaux"""
+        totals = np.atleast_2d(totals)
+        metrics = len(self.METRICS)
+        count = totals[:, :1]
+        sums, squares = totals[:, 1:1 + metrics], totals[:, 1 + metrics:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, sums / count, np.nan)
+            variance = np.where(count > 1, (squares - sums * mean) / (count - 1), np.nan)
+        return mean, np.sqrt(np.maximum(variance, 0))
+
+    def _describe(self, totals):
+        mean, std = self._moments(totals)
+        return {
+            'count': int(totals[0]),
+            'mean': dict(zip(self.METRICS, mean[0].tolist())),
+            'std': dict(zip(self.METRICS, std[0].tolist()))
+        }
+
+
+class _PeriodTable:
+    """
+    Totaux par (période, clé) d'une granularité, en jours depuis 1970
+    Périodes terminées : tableaux en ajout seul partagés entre versions ;
+    période en cours : dict clé -> totaux, recopié à chaque version.
+    """
+
+    def __init__(self, width, cumulative=False):
+        self.width = width
+        self.cumulative = cumulative  # sommes cumulées (une seule clé par période)
+        self.size = 0
+        self.periods = _Rows((), np.int64)
+        self.keys = _Rows(None)
+        self.totals = _Rows((width,))
+        self.prefix = _Rows((width,))
+        if cumulative:
+            self.prefix = self.prefix.appended(0, np.zeros((1, width)))
+        self.open_period = None
+        self.open = {}
+        self._frame = None
+
+    def merged(self, periods, keys, totals):
+        """
+        Nouvelle table où `totals` s'ajoute aux cellules (périodes croissantes)
+        Args:
+            periods: période de chaque cellule (jours depuis 1970, triées)
+            keys: clé de chaque cellule dans sa période
+            totals: lignes de totaux
+        """
+        if len(periods) == 0:
+            return self
+        if self.open_period is not None and periods[0] < self.open_period:
+            return self._rebuilt(periods, keys, totals)
+
+        table = copy.copy(self)
+        table.open = dict(self.open)
+        table._frame = None
+        for period, key, row in zip(periods.tolist(), keys, totals):
+            if table.open_period is None or period > table.open_period:
+                table._seal()
+                table.open_period = period
+            current = table.open.get(key)
+            table.open[key] = row.copy() if current is None else current + row
+        return table
+
+    def totals_since(self, period):
+        """Somme des totaux des périodes >= `period` (tables cumulées)"""
+        prefix = self.prefix.view(self.size + 1)
+        start = self.periods.view(self.size).searchsorted(period, side='left')
+        totals = prefix[-1] - prefix[start]
+        if self.open_period is not None and self.open_period >= period:
+            totals = totals + self.open[None]
+        return totals
+
+    def entries(self):
+        """(périodes, clés, totaux) de toutes les cellules"""
+        periods = np.concatenate([self.periods.view(self.size),
+                                  np.full(len(self.open), self.open_period or 0, dtype=np.int64)])
+        keys = list(self.keys.view(self.size)) + list(self.open)
+        totals = np.vstack([self.totals.view(self.size), np.array(list(self.open.values())).reshape(-1, self.width)])
+        return periods, keys, totals
+
+    def frame(self, key_columns, total_columns):
+        """Cellules sous forme de DataFrame (construit une fois par version)"""
+        if self._frame is None:
+            periods, keys, totals = self.entries()
+            frame = pd.DataFrame(keys, columns=key_columns[:-1])
+            frame[key_columns[-1]] = periods.view('datetime64[D]').astype('datetime64[ns]')
+            frame[total_columns] = totals
+            self._frame = frame
+        return self._frame
+
+    def _seal(self):
+        """Ajoute la période en cours aux périodes terminées"""
+        if self.open_period is None:
+            return
+        count = len(self.open)
+        self.periods = self.periods.appended(self.size, np.full(count, self.open_period, dtype=np.int64))
+        self.keys = self.keys.appended(self.size, list(self.open))
+        rows = np.array(list(self.open.values()))
+        self.totals = self.totals.appended(self.size, rows)
+        if self.cumulative:
+            last = self.prefix.view(self.size + 1)[-1]
+            self.prefix = self.prefix.appended(self.size + 1, last + np.cumsum(rows, axis=0))
+        self.size += count
+        self.open = {}
+
+    def _rebuilt(self, periods, keys, totals):
+        """Rattrapage (période déjà terminée) : table reconstruite avec toutes les cellules"""
+        old_periods, old_keys, old_totals = self.entries()
+        merged = {}
+        for period, key, row in zip(np.concatenate([old_periods, periods]).tolist(), old_keys + list(keys),
+                                    np.vstack([old_totals, totals])):
+            current = merged.get((period, key))
+            merged[(period, key)] = row.copy() if current is None else current + row
+
+        ordered = sorted(merged, key=lambda cell: cell[0])
+        table = _PeriodTable(self.width, self.cumulative)
+        return table.merged(np.array([period for period, _ in ordered], dtype=np.int64),
+                            [key for _, key in ordered], np.array([merged[cell] for cell in ordered]))
+
+
+class _Rows:
+    """
+    Tableau en ajout seul partagé entre versions : une version n'en lit que ses
+    `size` premières lignes. Ajouter après des lignes qui ne sont pas les
+    dernières écrites (autre branche) ou au-delà de la capacité crée un
+    nouveau tableau ; les versions existantes gardent le leur.
+    """
+
+    def __init__(self, shape=(), dtype=np.float64, capacity=16):
+        self.shape = shape  # None : liste Python (clés)
+        self.dtype = dtype
+        self.data = [] if shape is None else np.zeros((capacity,) + shape, dtype=dtype)
+        self.length = 0
+
+    def view(self, size):
+        return self.data[:size]
+
+    def appended(self, size, rows):
+        """Tableau contenant les `size` premières lignes suivies de `rows`"""
+        if self.shape is None:
+            target = self
+            if size != self.length:
+                target = _Rows(None)
+                target.data = self.data[:size]
+            target.data.extend(rows)
+            target.length = len(target.data)
+            return target
+
+        rows = np.asarray(rows, dtype=self.dtype).reshape((-1,) + self.shape)
+        needed = size + len(rows)
+        target = self
+        if size != self.length or needed > len(self.data):
+            target = _Rows(self.shape, self.dtype, capacity=max(needed, 2 * size, 16))
+            target.data[:size] = self.data[:size]
+        target.data[size:needed] = rows
+        target.length = needed
+        return target
+
+
+def _reduce(codes, totals):
+    """Somme des lignes de `totals` par code : (codes triés uniques, sommes)"""
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return codes[starts], np.add.reduceat(totals[order], starts, axis=0)
@@ -0,0 +1,32 @@
+"""
+Configuration Gunicorn (mode préchargé)
+L'application est chargée une seule fois dans le processus maître ; les workers
+forkés partagent ensuite ses pages mémoire (données et modèles) en copy-on-write.
+"""
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# Workers à threads : une connexion SSE (/api/dashboard/stream) occupe un thread,
+# pas un worker entier. Au plus SSE_MAX_CLIENTS flux par worker (16 par défaut) :
+# les autres threads restent disponibles pour les requêtes classiques
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '32'))
+timeout = 120
+preload_app = True
+
+# Indique à l'application de différer les entraînements jusqu'au fork
+os.environ['TECPAP_PRELOAD'] = '1'
+
+
+def pre_fork(server, worker):
+    # Objets du maître placés en génération permanente : le ramasse-miettes des
+    # workers ne les parcourt plus et ne duplique donc pas leurs pages mémoire
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.on_worker_fork()
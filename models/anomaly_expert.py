@@ -5,70 +5,129 @@ Système expert pour la gestion et l'analyse des anomalies
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import json
 import os
+import threading
+
+from data.anomaly_store import AnomalyStore
+from models.knowledge_index import KnowledgeIndex
+from utils.serialization import frame_payload
 
 class AnomalyExpert:
-    def __init__(self):
-        self.knowledge_base = None
-        self.vectorizer = TfidfVectorizer(max_features=100)
-        self.symptom_vectors = None
+    MAX_BATCH_QUERIES = 1000
+    MAX_TOP_K = 50
+    RECENT_COLUMNS = ['id', 'date', 'line', 'machine', 'symptom', 'cause', 'solution',
+                      'resolution_time', 'impact', 'priority', 'status']
+    
+    def __init__(self, store=None):
+        self.store = store or AnomalyStore()
+        self.kb_revision = None
+        self.index = KnowledgeIndex(max_features=100)
         self.active_alerts = []
+        self.data_version = None
+        self._rows = {}             # anomaly_id -> enregistrement
+        self._kb_frame = None       # DataFrame matérialisé à la demande
+        self._kb_lock = threading.Lock()
+        self._alerts_lock = threading.Lock()
+    
+    @property
+    def knowledge_base(self):
+        """Base de connaissances sous forme de DataFrame (reconstruite seulement après une modification)"""
+        with self._kb_lock:
+            if self.kb_revision is None:
+                return None
+            if self._kb_frame is None:
+                self._kb_frame = pd.DataFrame.from_records(
+                    list(self._rows.values()), columns=AnomalyStore.COLUMNS
+                ).sort_values('anomaly_id').reset_index(drop=True)
+            return self._kb_frame
     
     def load_knowledge_base(self):
-        """Charge la base de connaissances des anomalies"""
-        from data.data_loader import DataLoader
+        """Charge la base de connaissances des anomalies et génère les alertes"""
+        from data.data_store import get_data_store
         
-        loader = DataLoader()
-        loader.load_data()
+        loader, data_version = get_data_store().get_snapshot()
         
-        if loader.anomalies_data is not None:
-            self.knowledge_base = loader.anomalies_data
-            
-            # Créer des vecteurs pour la recherche de similarité
-            if len(self.knowledge_base) > 0:
-                symptoms = self.knowledge_base['symptom'].fillna('') + ' ' + \
-                          self.knowledge_base['root_cause'].fillna('')
-                self.symptom_vectors = self.vectorizer.fit_transform(symptoms)
+        with self._kb_lock:
+            revision = self.store.revision()
+            knowledge_base = self.store.frame()
+            self._rows = {record['anomaly_id']: record for record in knowledge_base.to_dict('records')}
+            self.index.load({anomaly_id: self._document(record) for anomaly_id, record in self._rows.items()},
+                            {anomaly_id: self._filter_fields(record) for anomaly_id, record in self._rows.items()})
+            self._kb_frame = knowledge_base
+            self.kb_revision = revision
+        
+        # Générer des alertes actives
+        self._refresh_alerts(loader, data_version)
+        
+        return True
+    
+    def refresh_knowledge_base(self):
+        """Applique uniquement les anomalies ajoutées/modifiées/supprimées depuis le dernier chargement"""
+        with self._kb_lock:
+            if self.kb_revision is None or self.store.revision() == self.kb_revision:
+                return False
             
-            # Générer des alertes actives
-            self._generate_active_alerts(loader)
+            rows, deleted, revision = self.store.changes_since(self.kb_revision)
+            for anomaly_id in deleted:
+                self._rows.pop(anomaly_id, None)
+                self.index.remove(anomaly_id)
+            for record in rows.to_dict('records'):
+                self._rows[record['anomaly_id']] = record
+                self.index.upsert(record['anomaly_id'], self._document(record), self._filter_fields(record))
             
+            self._kb_frame = None
+            self.kb_revision = revision
             return True
-        
-        return False
     
-    def _generate_active_alerts(self, loader):
+    @staticmethod
+    def _document(record):
+        """Texte indexé d'une anomalie : symptôme + cause racine"""
+        symptom, root_cause = record.get('symptom'), record.get('root_cause')
+        return f"{symptom if isinstance(symptom, str) else ''} {root_cause if isinstance(root_cause, str) else ''}"
+    
+    @staticmethod
+    def _filter_fields(record):
+        """Champs utilisables comme filtres de recherche"""
+        return {'line_id': record.get('line_id'), 'machine_id': record.get('machine_id')}
+    
+    def _refresh_alerts(self, loader, data_version):
+        """
+        Remplace les alertes par celles de `loader` (version `data_version`)
+        La liste est construite à part puis installée en une affectation avec sa
+        version : un lecteur concurrent voit l'ancienne liste ou la nouvelle, complète.
+        """
+        alerts = self._build_alerts(loader)
+        with self._alerts_lock:
+            # Une version plus récente a pu être installée par un autre thread
+            if self.data_version is None or data_version > self.data_version:
+                self.active_alerts = alerts
+                self.data_version = data_version
+    
+    def _build_alerts(self, loader):
         """Génère des alertes basées sur les données récentes"""
+        alerts = []
         if loader.oee_data is None:
-            return
-        
-        # Analyser les dernières 24h
-        recent = loader.oee_data[
-            loader.oee_data['timestamp'] >= 
-            loader.oee_data['timestamp'].max() - timedelta(days=1)
-        ]
-        
-        self.active_alerts = []
+            return alerts
         
-        for line in ['L1', 'L2', 'L3']:
-            line_data = recent[recent['line_id'] == line]
+        for line in loader.oee_index.lines:
+            # Analyser les dernières 24h
+            stats = loader.oee_rollups.window_stats(line, days=1)
             
-            if len(line_data) == 0:
+            if stats['count'] == 0:
                 continue
             
-            current_oee = line_data['oee'].iloc[-1]
-            avg_oee = line_data['oee'].mean()
-            std_oee = line_data['oee'].std()
+            latest = loader.oee_rollups.latest(line)
+            current_oee = latest['oee']
+            avg_oee = stats['mean']['oee']
+            std_oee = stats['std']['oee']
             
             # Détection d'anomalies
             
             # 1. Baisse soudaine de l'OEE
             if current_oee < avg_oee - 2 * std_oee and current_oee < 65:
-                self.active_alerts.append({
-                    'id': len(self.active_alerts) + 1,
+                alerts.append({
+                    'id': len(alerts) + 1,
                     'line_id': line,
                     'severity': 'Critical',
                     'type': 'Performance_Drop',
@@ -82,8 +141,8 @@ class AnomalyExpert:
             
             # 2. OEE en dessous du seuil
             elif current_oee < 70:
-                self.active_alerts.append({
-                    'id': len(self.active_alerts) + 1,
+                alerts.append({
+                    'id': len(alerts) + 1,
                     'line_id': line,
                     'severity': 'High',
                     'type': 'Low_OEE',
@@ -96,8 +155,8 @@ class AnomalyExpert:
             
             # 3. Variabilité élevée
             if std_oee > 8:
-                self.active_alerts.append({
-                    'id': len(self.active_alerts) + 1,
+                alerts.append({
+                    'id': len(alerts) + 1,
                     'line_id': line,
                     'severity': 'Medium',
                     'type': 'High_Variability',
@@ -108,96 +167,145 @@ class AnomalyExpert:
                 })
             
             # 4. Disponibilité faible
-            if len(line_data) > 0 and line_data['availability'].iloc[-1] < 80:
-                self.active_alerts.append({
-                    'id': len(self.active_alerts) + 1,
+            if latest['availability'] < 80:
+                alerts.append({
+                    'id': len(alerts) + 1,
                     'line_id': line,
                     'severity': 'High',
                     'type': 'Low_Availability',
                     'message': f'Disponibilité insuffisante sur {line}',
-                    'current_value': round(line_data['availability'].iloc[-1], 2),
+                    'current_value': round(latest['availability'], 2),
                     'timestamp': datetime.now().isoformat(),
                     'recommended_action': 'Vérifier les arrêts non planifiés'
                 })
             
             # 5. Problème de qualité
-            if len(line_data) > 0 and line_data['quality'].iloc[-1] < 93:
-                self.active_alerts.append({
-                    'id': len(self.active_alerts) + 1,
+            if latest['quality'] < 93:
+                alerts.append({
+                    'id': len(alerts) + 1,
                     'line_id': line,
                     'severity': 'Medium',
                     'type': 'Quality_Issue',
                     'message': f'Taux de qualité en baisse sur {line}',
-                    'current_value': round(line_data['quality'].iloc[-1], 2),
+                    'current_value': round(latest['quality'], 2),
                     'timestamp': datetime.now().isoformat(),
                     'recommended_action': 'Contrôle qualité renforcé requis'
                 })
+        
+        return alerts
+    
+    def _ensure_current(self):
+        """Met à jour les alertes (données OEE) et la base d'anomalies si elles ont changé"""
+        from data.data_store import get_data_store
+        
+        if self.kb_revision is None:
+            self.load_knowledge_base()
+            return
+        
+        loader, data_version = get_data_store().get_snapshot()
+        if data_version != self.data_version:
+            self._refresh_alerts(loader, data_version)
+        
+        # Écritures d'administration (ce processus ou un autre worker)
+        self.refresh_knowledge_base()
     
     def get_active_alerts(self):
         """Retourne les alertes actives"""
+        self._ensure_current()
         return self.active_alerts
     
-    def get_recent_anomalies(self, days=30):
-        """Récupère les anomalies récentes"""
-        if self.knowledge_base is None:
-            return []
+    def get_recent_anomalies(self, days=30, orient='records'):
+        """
+        Récupère les anomalies récentes (les plus récentes d'abord)
+        Args:
+            orient: 'records' (liste de dicts) ou 'columns' (valeurs par colonne)
+        """
+        self._ensure_current()
+        knowledge_base = self.knowledge_base
+        if knowledge_base is None:
+            return frame_payload(pd.DataFrame(columns=self.RECENT_COLUMNS), orient)
         
         cutoff = datetime.now() - timedelta(days=days)
-        recent = self.knowledge_base[
-            pd.to_datetime(self.knowledge_base['timestamp']) >= cutoff
-        ]
+        recent = knowledge_base[pd.to_datetime(knowledge_base['timestamp']) >= cutoff]
         
-        anomalies = []
-        for _, row in recent.iterrows():
-            anomalies.append({
-                'id': int(row['anomaly_id']),
-                'date': row['timestamp'],
-                'line': row['line_id'],
-                'machine': row['machine_id'],
-                'symptom': row['symptom'],
-                'cause': row['root_cause'],
-                'solution': row['solution_applied'],
-                'resolution_time': int(row['resolution_time_minutes']),
-                'impact': float(row['impact_oee']),
-                'priority': row['priority'],
-                'status': row['status']
-            })
+        anomalies = pd.DataFrame({
+            'id': recent['anomaly_id'].astype(int),
+            'date': recent['timestamp'],
+            'line': recent['line_id'],
+            'machine': recent['machine_id'],
+            'symptom': recent['symptom'],
+            'cause': recent['root_cause'],
+            'solution': recent['solution_applied'],
+            'resolution_time': recent['resolution_time_minutes'].astype(int),
+            'impact': recent['impact_oee'].astype(float),
+            'priority': recent['priority'],
+            'status': recent['status']
+        }).sort_values('date', ascending=False, kind='stable')
         
-        return sorted(anomalies, key=lambda x: x['date'], reverse=True)
+        return frame_payload(anomalies, orient)
     
-    def find_similar(self, description, machine_id=''):
-        """Trouve des anomalies similaires dans l'historique"""
-        if self.knowledge_base is None or self.symptom_vectors is None:
-            return []
-        
-        # Vectoriser la description
-        query_vector = self.vectorizer.transform([description + ' ' + machine_id])
+    def find_similar(self, description, machine_id='', line_id=None, same_machine=False):
+        """
+        Trouve des anomalies similaires dans l'historique
+        Args:
+            description: symptôme observé
+            machine_id: machine concernée (ajoutée au texte de recherche)
+            line_id: si fourni, limite la recherche aux anomalies de cette ligne
+            same_machine: si True, limite la recherche aux anomalies de machine_id
+        """
+        return self.find_similar_batch(
+            [{'description': description, 'machine_id': machine_id}], line_id, same_machine
+        )[0]
+    
+    def find_similar_batch(self, queries, line_id=None, same_machine=False, top_k=5):
+        """
+        Recherche groupée de cas similaires (une vectorisation et un produit
+        matriciel pour toutes les descriptions)
+        Args:
+            queries: liste de dicts {'description', 'machine_id' (facultatif)}
+            line_id, same_machine: filtres, comme pour find_similar
+            top_k: nombre de cas retournés par description
+        Returns:
+            liste des cas similaires, alignée sur queries
+        """
+        if len(queries) > self.MAX_BATCH_QUERIES:
+            raise ValueError(f"Lot trop volumineux (maximum {self.MAX_BATCH_QUERIES} descriptions)")
+        if not 1 <= top_k <= self.MAX_TOP_K:
+            raise ValueError(f"top_k doit être compris entre 1 et {self.MAX_TOP_K}")
         
-        # Calculer les similarités
-        similarities = cosine_similarity(query_vector, self.symptom_vectors)[0]
+        self._ensure_current()
         
-        # Trouver les top 5 cas similaires
-        top_indices = np.argsort(similarities)[-5:][::-1]
+        texts, filters = [], []
+        for query in queries:
+            machine_id = query.get('machine_id') or ''
+            texts.append((query.get('description') or '') + ' ' + machine_id)
+            filters.append({'line_id': line_id, 'machine_id': machine_id if same_machine else None})
         
-        similar_cases = []
-        for idx in top_indices:
-            if similarities[idx] > 0.1:  # Seuil de similarité
-                row = self.knowledge_base.iloc[idx]
-                similar_cases.append({
-                    'similarity': round(float(similarities[idx]) * 100, 1),
-                    'anomaly_id': int(row['anomaly_id']),
-                    'line': row['line_id'],
-                    'machine': row['machine_id'],
-                    'symptom': row['symptom'],
-                    'root_cause': row['root_cause'],
-                    'solution': row['solution_applied'],
-                    'resolution_time': int(row['resolution_time_minutes']),
-                    'impact': float(row['impact_oee']),
-                    'recurrence': int(row['recurrence_count']),
-                    'effectiveness': 'High' if row['recurrence_count'] < 2 else 'Medium'
-                })
+        results = self.index.search(texts, k=top_k, min_score=0.1, filters=filters)  # Seuil de similarité
         
-        return similar_cases
+        with self._kb_lock:
+            return [
+                [self._similar_case(self._rows[anomaly_id], similarity)
+                 for anomaly_id, similarity in zip(anomaly_ids.tolist(), similarities.tolist())
+                 if anomaly_id in self._rows]  # sinon supprimée entre-temps
+                for anomaly_ids, similarities in results
+            ]
+    
+    @staticmethod
+    def _similar_case(row, similarity):
+        return {
+            'similarity': round(similarity * 100, 1),
+            'anomaly_id': int(row['anomaly_id']),
+            'line': row['line_id'],
+            'machine': row['machine_id'],
+            'symptom': row['symptom'],
+            'root_cause': row['root_cause'],
+            'solution': row['solution_applied'],
+            'resolution_time': int(row['resolution_time_minutes']),
+            'impact': float(row['impact_oee']),
+            'recurrence': int(row['recurrence_count']),
+            'effectiveness': 'High' if row['recurrence_count'] < 2 else 'Medium'
+        }
     
     def suggest_solution(self, symptom, line_id='', machine_id=''):
         """Suggère une solution basée sur l'historique"""
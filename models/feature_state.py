@@ -0,0 +1,151 @@
+"""
+État incrémental des features glissantes pour l'inférence temps réel
+Chaque ligne garde ses dernières valeurs d'OEE dans des buffers circulaires avec
+sommes courantes : un nouvel enregistrement horaire met à jour oee_ma_7,
+oee_ma_24 et oee_std_7 en O(1), sans rejouer l'historique.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RollingWindow:
+    """Fenêtre glissante de taille fixe (buffer circulaire + sommes courantes)"""
+
+    # Resynchronisation périodique des sommes pour borner l'erreur d'arrondi
+    RESYNC_EVERY = 4096
+
+    def __init__(self, size):
+        self.size = size
+        self.values = np.zeros(size)
+        self.count = 0
+        self.position = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._updates = 0
+
+    def push(self, value):
+        value = float(value)
+        if self.count == self.size:
+            old = self.values[self.position]
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+
+        self.values[self.position] = value
+        self.position = (self.position + 1) % self.size
+        self.total += value
+        self.total_sq += value * value
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            current = self.values[:self.count]
+            self.total = float(current.sum())
+            self.total_sq = float((current * current).sum())
+
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def std(self):
+        """Écart-type échantillon (ddof=1, comme pandas) ; 0 si moins de 2 valeurs"""
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class LineFeatureState:
+    """Features courantes d'une ligne, mises à jour enregistrement par enregistrement"""
+
+    def __init__(self, line_id):
+        self.line_id = line_id
+        self.ma_7 = RollingWindow(7)
+        self.ma_24 = RollingWindow(24)
+        self.last_record = None
+
+    def update(self, record):
+        """Intègre un nouvel enregistrement horaire (dict avec timestamp, oee, ...)"""
+        oee = record.get('oee')
+        if oee is not None and not pd.isna(oee):
+            self.ma_7.push(oee)
+            self.ma_24.push(oee)
+        self.last_record = record
+
+    def features(self, timestamp=None):
+        """
+        Vecteur de features (mêmes noms que OEEPredictor.prepare_features)
+        Args:
+            timestamp: horodatage à scorer (par défaut celui du dernier enregistrement)
+        """
+        if self.last_record is None:
+            return None
+
+        record = self.last_record
+        timestamp = pd.Timestamp(timestamp if timestamp is not None else record['timestamp'])
+        availability = float(record.get('availability', 0))
+        performance = float(record.get('performance', 0))
+        quality = float(record.get('quality', 0))
+
+        return {
+            'hour': timestamp.hour,
+            'day_of_week': timestamp.dayofweek,
+            'month': timestamp.month,
+            'day_of_year': timestamp.dayofyear,
+            'week_of_year': timestamp.isocalendar()[1],
+            'line_L1': int(self.line_id == 'L1'),
+            'line_L2': int(self.line_id == 'L2'),
+            'line_L3': int(self.line_id == 'L3'),
+            'availability': availability,
+            'performance': performance,
+            'quality': quality,
+            'oee_ma_7': self.ma_7.mean(),
+            'oee_ma_24': self.ma_24.mean(),
+            'oee_std_7': self.ma_7.std(),
+            'avail_perf_ratio': availability / (performance + 0.01),
+            'perf_quality_ratio': performance / (quality + 0.01),
+            'stop_count': _zero_if_missing(record.get('stop_count')),
+            'stop_duration': _zero_if_missing(record.get('stop_duration'))
+        }
+
+
+class FeatureState:
+    """États par ligne, initialisés depuis l'historique puis mis à jour en continu"""
+
+    WARMUP_ROWS = 24  # plus grande fenêtre glissante
+
+    def __init__(self):
+        self.lines = {}
+
+    @classmethod
+    def from_index(cls, oee_index):
+        """Initialise l'état à partir des derniers enregistrements de chaque ligne"""
+        state = cls()
+        for line_id in oee_index.lines:
+            for record in oee_index.tail(line_id, cls.WARMUP_ROWS).to_dict('records'):
+                state.update(record)
+        return state
+
+    def update(self, record):
+        line_id = record['line_id']
+        if line_id not in self.lines:
+            self.lines[line_id] = LineFeatureState(line_id)
+        self.lines[line_id].update(record)
+
+    def last_timestamp(self, line_id):
+        """Horodatage du dernier enregistrement intégré pour une ligne (None si aucun)"""
+        line = self.lines.get(line_id)
+        if line is None or line.last_record is None:
+            return None
+        return pd.Timestamp(line.last_record['timestamp'])
+
+    def features(self, line_id, timestamp=None):
+        if line_id not in self.lines:
+            return None
+        return self.lines[line_id].features(timestamp)
+
+
+def _zero_if_missing(value):
+    return 0.0 if value is None or pd.isna(value) else float(value)
@@ -0,0 +1,379 @@
+"""
+Index TF-IDF incrémental de la base de connaissances des anomalies
+Ajouts, modifications et suppressions se font document par document (mise à
+jour de compteurs) ; chaque texte distinct n'est analysé qu'une fois. Le
+vocabulaire et l'IDF sont recalculés à la demande, au moment d'une recherche,
+sur les seuls textes distincts. Les scores sont ceux d'un
+TfidfVectorizer(max_features=...) réentraîné sur tout le corpus.
+
+Les textes identiques une fois restreints au vocabulaire partagent un vecteur.
+La recherche passe par un index inversé (terme -> vecteurs qui le contiennent) :
+seuls les vecteurs partageant un terme avec la requête sont scorés (un seul
+produit creux pour un lot de requêtes), les filtres (ligne, machine) sont
+appliqués avant la sélection et les k meilleurs documents sont pris parmi les
+vecteurs de meilleur score, sans trier tous les documents.
+"""
+
+import threading
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+
+class KnowledgeIndex:
+    def __init__(self, max_features=100):
+        self.max_features = max_features
+        self._analyzer = TfidfVectorizer().build_analyzer()
+        self._docs = {}              # identifiant -> texte
+        self._fields = {}            # identifiant -> {champ: valeur} (filtres)
+        self._postings = {}          # champ -> valeur -> identifiants (index des filtres)
+        self._texts = {}             # texte -> [identifiants des termes, comptes, nombre de documents]
+        self._term_ids = {}          # terme -> identifiant (jamais réattribué)
+        self._term_names = []
+        self._doc_freq = np.zeros(0, dtype=np.int64)   # documents contenant le terme
+        self._term_freq = np.zeros(0, dtype=np.int64)  # occurrences dans le corpus
+        self._lock = threading.Lock()
+        self._snapshot = None        # état calculé pour la recherche (None = à recalculer)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def load(self, docs, fields=None):
+        """
+        Remplace tout le contenu de l'index
+        Args:
+            docs: dict identifiant -> texte
+            fields: dict identifiant -> {champ: valeur} utilisé par les filtres de recherche
+        """
+        with self._lock:
+            self._docs = dict(docs)
+            self._fields = {}
+            self._postings = {}
+            for doc_id, values in (fields or {}).items():
+                self._set_fields(doc_id, values)
+
+            self._texts = {}
+            for text, n_docs in Counter(self._docs.values()).items():
+                self._texts[text] = [*self._analyze(text), n_docs]
+
+            # Fréquences en une passe vectorisée
+            self._doc_freq[:] = 0
+            self._term_freq[:] = 0
+            if self._texts:
+                entries = list(self._texts.values())
+                term_ids = np.concatenate([entry[0] for entry in entries])
+                n_docs = np.repeat([entry[2] for entry in entries], [len(entry[0]) for entry in entries])
+                counts = np.concatenate([entry[1] for entry in entries])
+                np.add.at(self._doc_freq, term_ids, n_docs)
+                np.add.at(self._term_freq, term_ids, counts * n_docs)
+            self._snapshot = None
+
+    def upsert(self, doc_id, text, fields=None):
+        """Ajoute ou remplace le texte (et les champs filtrables) d'un document"""
+        with self._lock:
+            if fields is not None and self._fields.get(doc_id) != fields:
+                self._set_fields(doc_id, fields)
+                self._snapshot = None
+            if self._docs.get(doc_id) == text:
+                return
+            self._remove(doc_id)
+
+            entry = self._texts.get(text)
+            if entry is None:
+                # Texte jamais vu : seule analyse lexicale
+                entry = self._texts[text] = [*self._analyze(text), 0]
+            entry[2] += 1
+            self._count(entry, 1)
+
+            self._docs[doc_id] = text
+            self._snapshot = None
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._set_fields(doc_id, None)
+            if self._remove(doc_id):
+                self._snapshot = None
+
+    def top_k(self, query, k=5, min_score=0.0, **filters):
+        """
+        Documents les plus similaires à la requête (similarité cosinus)
+        Args:
+            query: texte de la requête
+            k: nombre maximal de résultats
+            min_score: seuil strict de similarité
+            **filters: champ=valeur (ex: line_id='L1'), appliqués avant le score
+        Returns:
+            (identifiants, similarités) par similarité décroissante ; à similarité
+            égale, l'identifiant le plus récent d'abord
+        """
+        return self.search([query], k, min_score, filters)[0]
+
+    def search(self, queries, k=5, min_score=0.0, filters=None):
+        """
+        Recherche groupée : toutes les requêtes sont vectorisées ensemble et
+        scorées par un seul produit creux
+        Args:
+            queries: liste de textes
+            filters: dict commun à toutes les requêtes, ou liste de dicts (un par requête)
+        Returns:
+            liste de (identifiants, similarités), alignée sur queries
+        """
+        if filters is None or isinstance(filters, dict):
+            filters = [filters or {}] * len(queries)
+        if len(filters) != len(queries):
+            raise ValueError("Un jeu de filtres par requête est attendu")
+
+        snapshot = self._get_snapshot()
+        if snapshot is None or not queries:
+            return [(np.array([], dtype=np.int64), np.array([])) for _ in queries]
+
+        # Requêtes x vecteurs distincts : seuls les vecteurs partageant un terme
+        # avec une requête apparaissent (index inversé terme -> vecteurs)
+        vector_scores = (self._query_matrix(queries, snapshot) @ snapshot['postings']).tocsr()
+
+        results = []
+        for i, query_filters in enumerate(filters):
+            start, end = vector_scores.indptr[i], vector_scores.indptr[i + 1]
+            groups = self._candidates(snapshot, query_filters)
+            positions, scores = self._select(vector_scores.indices[start:end], vector_scores.data[start:end],
+                                             groups, k, min_score)
+            results.append((snapshot['doc_ids'][positions], scores))
+        return results
+
+    @staticmethod
+    def _select(slots, scores, groups, k, min_score):
+        """
+        k meilleurs documents à partir des scores par vecteur
+        Les vecteurs sont parcourus par score décroissant ; à score égal, les
+        documents de plus grande position (identifiant le plus récent) d'abord.
+        """
+        doc_positions, bounds = groups
+        keep = (scores > min_score) & (_group_sizes(bounds, slots) > 0)
+        slots, scores = slots[keep], scores[keep]
+        if len(slots) > k:
+            # Chaque vecteur a au moins un document : le k-ième meilleur score
+            # de vecteur borne inférieurement les scores retenus
+            threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= threshold
+            slots, scores = slots[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')
+        slots, scores = slots[order], scores[order]
+
+        positions, selected_scores = [], []
+        taken, i = 0, 0
+        while taken < k and i < len(slots):
+            # Tous les vecteurs ex æquo à ce niveau de score
+            j = i + int(np.searchsorted(-scores[i:], -scores[i], side='right'))
+            starts, sizes = bounds[slots[i:j]], _group_sizes(bounds, slots[i:j])
+            offsets = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+            level = doc_positions[offsets]
+            wanted = k - taken
+            if len(level) > wanted:
+                level = np.partition(level, len(level) - wanted)[len(level) - wanted:]
+            level = np.sort(level)[::-1]
+            positions.append(level)
+            selected_scores.append(np.full(len(level), scores[i]))
+            taken += len(level)
+            i = j
+
+        if not positions:
+            return np.array([], dtype=np.int64), np.array([])
+        return np.concatenate(positions), np.concatenate(selected_scores)
+
+    def _candidates(self, snapshot, filters):
+        """
+        Documents satisfaisant tous les filtres, groupés par vecteur (calculé une fois par état)
+        Returns:
+            (positions des documents triées par vecteur, bornes de chaque vecteur)
+        """
+        active = tuple(sorted((field, value) for field, value in filters.items()
+                              if value is not None and value != ''))
+        cache = snapshot['filters']
+        groups = cache.get(active)
+        if groups is None:
+            positions = None
+            for field, value in active:
+                matching = self._filter_positions(snapshot, field, value)
+                positions = matching if positions is None else \
+                    np.intersect1d(positions, matching, assume_unique=True)
+            if positions is None:
+                positions = np.arange(len(snapshot['doc_ids']))
+
+            slots = snapshot['doc_slots'][positions]
+            order = np.argsort(slots, kind='stable')
+            bounds = np.searchsorted(slots[order], np.arange(snapshot['postings'].shape[1] + 1))
+            groups = cache[active] = (positions[order], bounds)
+        return groups
+
+    def _filter_positions(self, snapshot, field, value):
+        """Positions (croissantes) des documents ayant field == value"""
+        with self._lock:
+            doc_ids = self._postings.get(field, {}).get(value, ())
+            doc_ids = np.sort(np.fromiter(doc_ids, dtype=np.int64, count=len(doc_ids)))
+        # L'index a pu changer depuis l'état : seuls les documents de l'état comptent
+        positions = np.searchsorted(snapshot['doc_ids'], doc_ids)
+        valid = positions < len(snapshot['doc_ids'])
+        positions, doc_ids = positions[valid], doc_ids[valid]
+        return positions[snapshot['doc_ids'][positions] == doc_ids]
+
+    def _set_fields(self, doc_id, fields):
+        for field, value in self._fields.pop(doc_id, {}).items():
+            postings = self._postings[field]
+            postings[value].discard(doc_id)
+            if not postings[value]:
+                del postings[value]
+        if fields:
+            self._fields[doc_id] = fields
+            for field, value in fields.items():
+                self._postings.setdefault(field, {}).setdefault(value, set()).add(doc_id)
+
+    def _analyze(self, text):
+        """Texte -> (identifiants des termes, comptes)"""
+        counts = Counter(self._analyzer(text))
+        term_ids = np.array([self._term_id(term) for term in counts], dtype=np.int64)
+        return term_ids, np.array(list(counts.values()), dtype=np.int64)
+
+    def _term_id(self, term):
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._term_names)
+            self._term_names.append(term)
+            if term_id >= len(self._doc_freq):
+                capacity = max(2 * len(self._doc_freq), 1024)
+                self._doc_freq = np.resize(self._doc_freq, capacity)
+                self._term_freq = np.resize(self._term_freq, capacity)
+                self._doc_freq[term_id:] = 0
+                self._term_freq[term_id:] = 0
+        return term_id
+
+    def _count(self, entry, n_docs):
+        term_ids, counts, _ = entry
+        self._doc_freq[term_ids] += n_docs
+        self._term_freq[term_ids] += counts * n_docs
+
+    def _remove(self, doc_id):
+        text = self._docs.pop(doc_id, None)
+        if text is None:
+            return False
+
+        entry = self._texts[text]
+        entry[2] -= 1
+        self._count(entry, -1)
+        if entry[2] == 0:
+            del self._texts[text]
+        return True
+
+    def _get_snapshot(self):
+        with self._lock:
+            if self._snapshot is None and self._docs:
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    def _build_snapshot(self):
+        # Vocabulaire : même sélection que CountVectorizer (termes triés, puis les
+        # max_features plus fréquents)
+        live = np.flatnonzero(self._doc_freq[:len(self._term_names)] > 0)
+        names = [self._term_names[term_id] for term_id in live.tolist()]
+        order = sorted(range(len(names)), key=names.__getitem__)
+        terms = live[order]
+        if self.max_features is not None and len(terms) > self.max_features:
+            kept = np.zeros(len(terms), dtype=bool)
+            kept[(-self._term_freq[terms]).argsort()[:self.max_features]] = True
+            terms = terms[kept]
+        columns = np.full(len(self._term_names), -1, dtype=np.int64)
+        columns[terms] = np.arange(len(terms))
+
+        # IDF lissé, identique à TfidfTransformer (smooth_idf=True)
+        n_docs = len(self._docs)
+        doc_freq = self._doc_freq[terms].astype(np.float64) + 1.0
+        idf = np.full_like(doc_freq, fill_value=n_docs + 1)
+        idf /= doc_freq
+        np.log(idf, out=idf)
+        idf += 1.0
+
+        # Comptes restreints au vocabulaire, un par texte distinct ; les textes qui ne
+        # diffèrent que par des termes hors vocabulaire partagent le même vecteur
+        entries = list(self._texts.values())
+        text_slots = {text: i for i, text in enumerate(self._texts)}
+        lengths = np.fromiter((len(entry[0]) for entry in entries), dtype=np.int64, count=len(entries))
+        term_ids = np.concatenate([entry[0] for entry in entries])
+        counts = np.concatenate([entry[1] for entry in entries])
+        rows = np.repeat(np.arange(len(entries)), lengths)
+        text_counts = self._count_matrix(rows, columns[term_ids], counts, len(entries), len(terms))
+        representatives, vector_slots = self._unique_rows(text_counts)
+        vectors = self._tfidf(text_counts[representatives], idf)
+
+        doc_ids = np.fromiter(self._docs.keys(), dtype=np.int64, count=n_docs)
+        doc_slots = np.fromiter((text_slots[text] for text in self._docs.values()), dtype=np.int64, count=n_docs)
+        doc_slots = vector_slots[doc_slots]
+        doc_order = np.argsort(doc_ids, kind='stable')
+
+        return {
+            'doc_ids': doc_ids[doc_order],
+            'doc_slots': doc_slots[doc_order],
+            'postings': vectors.T.tocsr(),  # index inversé : terme -> vecteurs
+            'columns': columns,
+            'idf': idf,
+            'filters': {}  # filtres actifs -> documents groupés par vecteur, rempli à la demande
+        }
+
+    def _query_matrix(self, queries, snapshot):
+        """Requêtes -> matrice TF-IDF normalisée L2 (une ligne par requête)"""
+        rows, term_ids, counts = [], [], []
+        for row, query in enumerate(queries):
+            for term, count in Counter(self._analyzer(query)).items():
+                term_id = self._term_ids.get(term)
+                if term_id is not None and term_id < len(snapshot['columns']):
+                    rows.append(row)
+                    term_ids.append(term_id)
+                    counts.append(count)
+
+        idf = snapshot['idf']
+        return self._tfidf(self._count_matrix(np.array(rows, dtype=np.int64),
+                                              snapshot['columns'][np.array(term_ids, dtype=np.int64)],
+                                              np.array(counts, dtype=np.int64), len(queries), len(idf)), idf)
+
+    @staticmethod
+    def _count_matrix(rows, columns, counts, n_rows, n_columns):
+        """Matrice creuse des comptes (colonnes -1 = hors vocabulaire, ignorées)"""
+        keep = columns >= 0
+        matrix = sp.csr_matrix(
+            (counts[keep].astype(np.float64), (rows[keep], columns[keep])),
+            shape=(n_rows, n_columns)
+        )
+        matrix.sort_indices()
+        return matrix
+
+    @staticmethod
+    def _unique_rows(matrix):
+        """
+        Lignes identiques d'une matrice de comptes (indices triés)
+        Returns:
+            (indice d'une ligne représentante par vecteur distinct, vecteur de chaque ligne)
+        """
+        # Clé par ligne : ses octets (indices puis comptes), mémoire O(nnz)
+        indptr, indices, data = matrix.indptr.tolist(), matrix.indices, matrix.data
+        vector_of = {}
+        representatives = []
+        slots = np.empty(matrix.shape[0], dtype=np.int64)
+        for row in range(matrix.shape[0]):
+            start, end = indptr[row], indptr[row + 1]
+            slot = vector_of.setdefault(indices[start:end].tobytes() + data[start:end].tobytes(), len(vector_of))
+            if slot == len(representatives):
+                representatives.append(row)
+            slots[row] = slot
+        return np.array(representatives, dtype=np.int64), slots
+
+    @staticmethod
+    def _tfidf(matrix, idf):
+        """Comptes -> TF-IDF normalisé L2 (mêmes opérations que TfidfTransformer.transform)"""
+        matrix.data *= idf[matrix.indices]
+        return normalize(matrix, norm='l2', copy=False)
+
+
+def _group_sizes(bounds, slots):
+    """Nombre de documents de chaque vecteur"""
+    return bounds[slots + 1] - bounds[slots]
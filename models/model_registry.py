@@ -0,0 +1,165 @@
+"""
+Registre versionné des artefacts de modèles
+Chaque version est un dossier immuable (un fichier par artefact + métadonnées) ;
+la version active est désignée par un pointeur remplacé atomiquement
+(promotion / rollback).
+"""
+
+import errno
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+import joblib
+
+
+class ModelRegistry:
+    ARTIFACTS_FILE = 'artifacts.pkl'  # ancien format : tous les artefacts dans un fichier
+    METADATA_FILE = 'metadata.json'
+    POINTER_FILE = 'CURRENT.json'
+    REGISTER_ATTEMPTS = 20  # numéros de version pris par d'autres processus avant abandon
+
+    def __init__(self, name, root=None):
+        self.name = name
+        self.root = root or os.path.join(os.path.dirname(__file__), 'saved_models', 'registry', name)
+
+    def register(self, artifacts, metadata):
+        """
+        Enregistre un nouveau lot d'artefacts (sans le promouvoir)
+        Args:
+            artifacts: dict nom -> objet (modèle, scaler, features...), un fichier par nom
+            metadata: dict sérialisable en JSON (hash des données, métriques...)
+        Returns:
+            identifiant de version (ex: 'v0003')
+        """
+        os.makedirs(self.root, exist_ok=True)
+
+        # Préparation dans un dossier temporaire puis renommage atomique
+        tmp_dir = os.path.join(self.root, f'.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}')
+        os.makedirs(tmp_dir)
+        try:
+            for name, artifact in artifacts.items():
+                joblib.dump(artifact, os.path.join(tmp_dir, f'{name}.pkl'))
+
+            for _ in range(self.REGISTER_ATTEMPTS):
+                version = self._next_version()
+                record = dict(metadata, version=version, registered_at=datetime.now().isoformat())
+                with open(os.path.join(tmp_dir, self.METADATA_FILE), 'w', encoding='utf-8') as f:
+                    json.dump(record, f, indent=2)
+                try:
+                    os.rename(tmp_dir, os.path.join(self.root, version))
+                    return version
+                except OSError as e:
+                    # Seul cas réessayé : version prise entre-temps par un autre processus
+                    if not isinstance(e, FileExistsError) and e.errno != errno.ENOTEMPTY:
+                        raise
+            raise RuntimeError(
+                f"Aucune version libre pour {self.name} après {self.REGISTER_ATTEMPTS} tentatives"
+            )
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def promote(self, version):
+        """Active une version (remplacement atomique du pointeur)"""
+        if version not in self.list_versions():
+            raise ValueError(f"Version inconnue: {version}")
+
+        pointer = self._read_pointer()
+        history = pointer.get('history', [])
+        if pointer.get('version') and pointer['version'] != version:
+            history = history + [pointer['version']]
+
+        self._write_pointer({
+            'version': version,
+            'history': history,
+            'promoted_at': datetime.now().isoformat()
+        })
+        return version
+
+    def rollback(self):
+        """Réactive la version promue précédemment"""
+        pointer = self._read_pointer()
+        history = list(pointer.get('history', []))
+        if not history:
+            raise ValueError("Aucune version précédente pour le rollback")
+
+        version = history.pop()
+        self._write_pointer({
+            'version': version,
+            'history': history,
+            'promoted_at': datetime.now().isoformat()
+        })
+        return version
+
+    def current_version(self):
+        """Version active (None si aucune version promue)"""
+        return self._read_pointer().get('version')
+
+    def list_versions(self):
+        """Versions enregistrées, de la plus ancienne à la plus récente"""
+        if not os.path.exists(self.root):
+            return []
+        return sorted(
+            entry for entry in os.listdir(self.root)
+            if entry.startswith('v') and os.path.isdir(os.path.join(self.root, entry))
+        )
+
+    def metadata(self, version=None):
+        """Métadonnées d'une version (version active par défaut)"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        with open(os.path.join(self.root, version, self.METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, version=None, mmap_mode=None, names=None):
+        """
+        Charge les artefacts d'une version (version active par défaut)
+        Args:
+            names: artefacts à charger (tous par défaut) ; les absents sont ignorés
+        Returns:
+            (artifacts, metadata) ou (None, None) si rien n'est disponible
+        """
+        version = version or self.current_version()
+        if version is None:
+            return None, None
+
+        version_dir = os.path.join(self.root, version)
+        legacy_file = os.path.join(version_dir, self.ARTIFACTS_FILE)
+        if os.path.exists(legacy_file):
+            artifacts = joblib.load(legacy_file, mmap_mode=mmap_mode)
+            if names is not None:
+                artifacts = {name: artifacts[name] for name in names if name in artifacts}
+            return artifacts, self.metadata(version)
+
+        if names is None:
+            names = [entry[:-4] for entry in os.listdir(version_dir) if entry.endswith('.pkl')]
+        artifacts = {}
+        for name in names:
+            path = os.path.join(version_dir, f'{name}.pkl')
+            if os.path.exists(path):
+                artifacts[name] = joblib.load(path, mmap_mode=mmap_mode)
+        return artifacts, self.metadata(version)
+
+    def _next_version(self):
+        versions = self.list_versions()
+        last = int(versions[-1][1:]) if versions else 0
+        return f'v{last + 1:04d}'
+
+    def _read_pointer(self):
+        path = os.path.join(self.root, self.POINTER_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_pointer(self, pointer):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, self.POINTER_FILE)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pointer, f, indent=2)
+        os.replace(tmp_path, path)
@@ -10,88 +10,149 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
+from data.oee_index import line_sort_key
+from models.feature_state import FeatureState
+from models.model_registry import ModelRegistry
+from models.tree_engine import CompiledTreeEnsemble
+
 class OEEPredictor:
+    # Colonnes des données d'entraînement prises en compte dans le hash du registre
+    TRAINING_COLUMNS = ['timestamp', 'line_id', 'oee', 'availability', 'performance',
+                        'quality', 'stop_count', 'stop_duration']
+    
     def __init__(self):
         self.model = None
+        self.engine = None  # ensemble compilé utilisé pour l'inférence
         self.scaler = StandardScaler()
         self.feature_columns = []
         self.models_path = os.path.join(os.path.dirname(__file__), 'saved_models')
+        self.registry = ModelRegistry('oee_predictor')
+        self.model_version = None
         self.trained = False
         
+        # Cache LRU des prévisions : (ligne, version données, version modèle) -> jours
+        self.forecast_cache_size = 32
+        self._forecast_cache = OrderedDict()
+        self._forecast_lock = threading.Lock()
+        
+        # État incrémental des features glissantes (inférence temps réel)
+        self._feature_state = None
+        self._feature_state_version = None
+        self._feature_lock = threading.Lock()
+        
         # Créer le dossier des modèles s'il n'existe pas
         if not os.path.exists(self.models_path):
             os.makedirs(self.models_path)
     
     def prepare_features(self, df):
-        """Prépare les features pour l'entraînement"""
-        features = df.copy()
-        
-        # Features temporelles
-        if 'timestamp' in features.columns:
-            features['hour'] = pd.to_datetime(features['timestamp']).dt.hour
-            features['day_of_week'] = pd.to_datetime(features['timestamp']).dt.dayofweek
-            features['month'] = pd.to_datetime(features['timestamp']).dt.month
-            features['day_of_year'] = pd.to_datetime(features['timestamp']).dt.dayofyear
-            features['week_of_year'] = pd.to_datetime(features['timestamp']).dt.isocalendar().week
-        
-        # Encoding de la ligne
-        features['line_L1'] = (features['line_id'] == 'L1').astype(int)
-        features['line_L2'] = (features['line_id'] == 'L2').astype(int)
-        features['line_L3'] = (features['line_id'] == 'L3').astype(int)
-        
-        # Features de tendance (moyennes mobiles)
-        if 'oee' in features.columns:
-            features['oee_ma_7'] = features.groupby('line_id')['oee'].transform(
-                lambda x: x.rolling(window=7, min_periods=1).mean()
-            )
-            features['oee_ma_24'] = features.groupby('line_id')['oee'].transform(
-                lambda x: x.rolling(window=24, min_periods=1).mean()
-            )
-            features['oee_std_7'] = features.groupby('line_id')['oee'].transform(
-                lambda x: x.rolling(window=7, min_periods=1).std()
-            ).fillna(0)
+        """Prépare les features pour l'entraînement (sans copie du DataFrame source)"""
+        features = {}
+        
+        # Features temporelles (une seule conversion des dates)
+        if 'timestamp' in df.columns:
+            timestamps = pd.DatetimeIndex(pd.to_datetime(df['timestamp']))
+            features['hour'] = timestamps.hour
+            features['day_of_week'] = timestamps.dayofweek
+            features['month'] = timestamps.month
+            features['day_of_year'] = timestamps.dayofyear
+            features['week_of_year'] = timestamps.isocalendar().week.to_numpy()
+        
+        # Encoding de la ligne (comparaison sur les codes, pas sur les chaînes)
+        line_codes, line_names = pd.factorize(df['line_id'])
+        for line in ['L1', 'L2', 'L3']:
+            matches = np.flatnonzero(line_names == line)
+            code = matches[0] if len(matches) > 0 else -2
+            features[f'line_{line}'] = (line_codes == code).astype(int)
+        
+        # Features de tendance (moyennes mobiles par ligne)
+        if 'oee' in df.columns:
+            features.update(self._rolling_oee_features(line_codes, df['oee'].to_numpy(dtype=float)))
         
         # Features de performance
-        if 'availability' in features.columns:
-            features['avail_perf_ratio'] = features['availability'] / (features['performance'] + 0.01)
-            features['perf_quality_ratio'] = features['performance'] / (features['quality'] + 0.01)
+        if 'availability' in df.columns:
+            availability = df['availability'].to_numpy()
+            performance = df['performance'].to_numpy()
+            quality = df['quality'].to_numpy()
+            features['availability'] = availability
+            features['performance'] = performance
+            features['quality'] = quality
+            features['avail_perf_ratio'] = availability / (performance + 0.01)
+            features['perf_quality_ratio'] = performance / (quality + 0.01)
+        
+        if 'stop_count' in df.columns:
+            features['stop_count'] = df['stop_count'].fillna(0).to_numpy()
+            features['stop_duration'] = df['stop_duration'].fillna(0).to_numpy()
         
         # Sélection des colonnes numériques
         numeric_features = ['hour', 'day_of_week', 'month', 'day_of_year', 'week_of_year',
                           'line_L1', 'line_L2', 'line_L3']
         
-        if 'availability' in features.columns:
+        if 'availability' in df.columns:
             numeric_features.extend(['availability', 'performance', 'quality',
                                    'oee_ma_7', 'oee_ma_24', 'oee_std_7',
                                    'avail_perf_ratio', 'perf_quality_ratio'])
         
-        if 'stop_count' in features.columns:
+        if 'stop_count' in df.columns:
             numeric_features.extend(['stop_count', 'stop_duration'])
-            features['stop_count'] = features['stop_count'].fillna(0)
-            features['stop_duration'] = features['stop_duration'].fillna(0)
         
         # Garder seulement les colonnes qui existent
-        numeric_features = [col for col in numeric_features if col in features.columns]
+        numeric_features = [col for col in numeric_features if col in features]
         
-        return features[numeric_features]
+        return pd.DataFrame({col: features[col] for col in numeric_features}, index=df.index)
     
-    def train(self):
+    @staticmethod
+    def _rolling_oee_features(line_codes, oee):
+        """
+        Moyennes mobiles 7/24 et écart-type 7 de l'OEE, par ligne, dans l'ordre des lignes
+        Les lignes sont regroupées par un tri stable pour un seul passage des noyaux
+        de fenêtre glissante (au lieu d'un appel Python par groupe).
+        """
+        order = np.argsort(line_codes, kind='stable')
+        grouped = pd.Series(oee[order]).groupby(line_codes[order], sort=True)
+        
+        rolling = {
+            'oee_ma_7': grouped.rolling(window=7, min_periods=1).mean(),
+            'oee_ma_24': grouped.rolling(window=24, min_periods=1).mean(),
+            'oee_std_7': grouped.rolling(window=7, min_periods=1).std().fillna(0)
+        }
+        
+        # Retour à l'ordre d'origine
+        result = {}
+        for name, values in rolling.items():
+            column = np.empty(len(oee))
+            column[order] = values.to_numpy()
+            result[name] = column
+        return result
+    
+    def training_fingerprint(self, df):
+        """Hash des données d'entraînement (associé à chaque version du registre)"""
+        from data.data_store import frame_fingerprint
+        
+        columns = [col for col in self.TRAINING_COLUMNS if col in df.columns]
+        return frame_fingerprint(df, columns)
+    
+    def train(self, df=None):
         """Entraîne le modèle de prédiction"""
-        from data.data_loader import DataLoader
+        from data.data_store import get_data_store
         
         print("Entraînement du modèle de prédiction OEE...")
+        started = time.time()
         
-        # Charger les données
-        loader = DataLoader()
-        loader.load_data()
-        df = loader.get_data_for_training()
+        # Charger les données (magasin partagé)
+        if df is None:
+            df = get_data_store().get_loader().get_data_for_training()
         
         if df is None or len(df) == 0:
             print("Erreur: Pas de données disponibles pour l'entraînement")
             return False
         
+        data_hash = self.training_fingerprint(df)
+        
         # Préparation des features et target
         X = self.prepare_features(df)
         y = df['oee']
@@ -140,25 +201,42 @@ class OEEPredictor:
         print(f"  - MAE: {mae:.2f}%")
         print(f"  - R²: {r2:.3f}")
         
-        # Utiliser le meilleur modèle individuel ou l'ensemble
-        if r2 > 0.75:
-            # Créer un modèle ensembliste
-            self.model = {
-                'rf': rf_model,
-                'gb': gb_model,
-                'weights': [0.6, 0.4]
+        # Modèle ensembliste, enregistré dans le registre avec ses métadonnées
+        model = {
+            'rf': rf_model,
+            'gb': gb_model,
+            'weights': [0.6, 0.4]
+        }
+        engine = CompiledTreeEnsemble.from_oee_ensemble(model)
+        version = self.registry.register(
+            {
+                'model': model,
+                'engine': engine.to_arrays(),
+                'scaler': self.scaler,
+                'features': self.feature_columns
+            },
+            {
+                'data_hash': data_hash,
+                'metrics': {'mae': round(float(mae), 4), 'r2': round(float(r2), 4)},
+                'features': self.feature_columns,
+                'n_samples': int(len(df)),
+                'trained_at': datetime.now().isoformat(),
+                'training_seconds': round(time.time() - started, 2)
             }
+        )
+        
+        # Promotion uniquement si la performance est suffisante
+        if r2 > 0.75:
+            self.registry.promote(version)
+            self.model = model
+            self.engine = engine
+            self.model_version = version
             self.trained = True
             
-            # Sauvegarder
-            joblib.dump(self.model, os.path.join(self.models_path, 'oee_model.pkl'))
-            joblib.dump(self.scaler, os.path.join(self.models_path, 'scaler.pkl'))
-            joblib.dump(self.feature_columns, os.path.join(self.models_path, 'features.pkl'))
-            
-            print("  - Modèle entraîné et sauvegardé avec succès")
+            print(f"  - Modèle {version} entraîné et promu avec succès")
             return True
         else:
-            print("  - Performance insuffisante, réentraînement nécessaire")
+            print(f"  - Performance insuffisante ({version} non promu), réentraînement nécessaire")
             return False
     
     def predict(self, features_df):
@@ -166,12 +244,14 @@ class OEEPredictor:
         if not self.trained:
             self._load_model()
         
-        if self.model is None:
+        if self.engine is None and self.model is None:
             return None
         
         # Préparer les features
-        X = self.prepare_features(features_df)
-        
+        return self._predict_features(self.prepare_features(features_df))
+    
+    def _predict_features(self, X):
+        """Prédiction à partir de features déjà calculées"""
         # Assurer que toutes les colonnes sont présentes
         for col in self.feature_columns:
             if col not in X.columns:
@@ -180,81 +260,206 @@ class OEEPredictor:
         X = X[self.feature_columns]
         X_scaled = self.scaler.transform(X)
         
-        # Prédiction ensembliste
-        rf_pred = self.model['rf'].predict(X_scaled)
-        gb_pred = self.model['gb'].predict(X_scaled)
-        
-        predictions = (self.model['weights'][0] * rf_pred + 
-                      self.model['weights'][1] * gb_pred)
+        # Prédiction ensembliste (moteur compilé, équivalent à RF/GB sklearn)
+        if self.engine is not None:
+            predictions = self.engine.predict(X_scaled)
+        else:
+            rf_pred = self.model['rf'].predict(X_scaled)
+            gb_pred = self.model['gb'].predict(X_scaled)
+            
+            predictions = (self.model['weights'][0] * rf_pred + 
+                          self.model['weights'][1] * gb_pred)
         
         # Contraintes réalistes
         predictions = np.clip(predictions, 40, 95)
         
         return predictions
     
-    def predict_next_days(self, days=7):
-        """Prédit l'OEE pour les prochains jours"""
-        from data.data_loader import DataLoader
+    def predict_next_days(self, days=7, lines=None):
+        """
+        Prédit l'OEE pour les prochains jours
+        Les prévisions sont mises en cache par (ligne, version des données, version
+        du modèle) ; un horizon plus court est extrait d'un calcul plus long.
+        """
+        from data.data_store import get_data_store
         
         if not self.trained:
             self._load_model()
         
-        loader = DataLoader()
-        loader.load_data()
-        
-        # Récupérer les dernières données
-        recent_data = loader.oee_data.tail(168)  # Dernière semaine
+        loader, data_version = get_data_store().get_snapshot()
+        lines = lines or loader.oee_index.lines
+        versions = (data_version, self.model_version)
         
         predictions = {}
-        for line in ['L1', 'L2', 'L3']:
-            line_data = recent_data[recent_data['line_id'] == line]
+        missing = []
+        for line in lines:
+            cached = self._cached_forecast(line, versions, days)
+            if cached is not None:
+                predictions[line] = cached
+            else:
+                missing.append(line)
+        
+        if missing:
+            computed = self._forecast(loader, missing, days)
+            for line, daily_preds in computed.items():
+                self._store_forecast(line, versions, daily_preds)
+                predictions[line] = [dict(p) for p in daily_preds]
+        
+        # Ordre des lignes identique à celui demandé
+        return {line: predictions[line] for line in lines if line in predictions}
+    
+    def _forecast(self, loader, lines, days):
+        """Calcule les prévisions journalières de plusieurs lignes (une seule inférence)"""
+        future_features = []
+        line_dates = {}
+        for line in lines:
+            # Dernière semaine de cette ligne (quel que soit le nombre de lignes)
+            line_data = loader.oee_index.tail(line, 168)
             
             if len(line_data) == 0:
                 continue
             
             # Préparer les features futures
             last_timestamp = line_data['timestamp'].max()
-            future_dates = [last_timestamp + timedelta(days=i+1) for i in range(days)]
+            line_dates[line] = last_timestamp
             
-            future_features = []
-            for date in future_dates:
+            availability = line_data['availability'].tail(24).mean()
+            performance = line_data['performance'].tail(24).mean()
+            quality = line_data['quality'].tail(24).mean()
+            for i in range(days):
+                date = last_timestamp + timedelta(days=i+1)
                 # Moyenne des heures de production (8h à 20h)
                 for hour in range(8, 21):
-                    feature_row = {
+                    future_features.append({
                         'timestamp': date + timedelta(hours=hour),
                         'line_id': line,
-                        'availability': line_data['availability'].tail(24).mean(),
-                        'performance': line_data['performance'].tail(24).mean(),
-                        'quality': line_data['quality'].tail(24).mean(),
+                        'availability': availability,
+                        'performance': performance,
+                        'quality': quality,
                         'stop_count': 0,
                         'stop_duration': 0
-                    }
-                    future_features.append(feature_row)
-            
-            future_df = pd.DataFrame(future_features)
+                    })
+        
+        if not future_features:
+            return {}
+        
+        # Prédire
+        preds = self.predict(pd.DataFrame(future_features))
+        if preds is None:
+            return {}
+        
+        predictions = {}
+        for n, (line, last_timestamp) in enumerate(line_dates.items()):
+            line_preds = preds[n*days*13:(n+1)*days*13]
             
-            # Prédire
-            preds = self.predict(future_df)
+            # Agréger par jour
+            daily_preds = []
+            for i in range(days):
+                day_preds = line_preds[i*13:(i+1)*13]
+                daily_preds.append({
+                    'date': (last_timestamp + timedelta(days=i+1)).strftime('%Y-%m-%d'),
+                    'oee_predicted': round(float(np.mean(day_preds)), 2),
+                    'confidence': 'High' if len(day_preds) > 0 else 'Low',
+                    'trend': self._calculate_trend(day_preds)
+                })
             
-            if preds is not None:
-                # Agréger par jour
-                daily_preds = []
-                for i in range(days):
-                    day_preds = preds[i*13:(i+1)*13]
-                    daily_preds.append({
-                        'date': (last_timestamp + timedelta(days=i+1)).strftime('%Y-%m-%d'),
-                        'oee_predicted': round(float(np.mean(day_preds)), 2),
-                        'confidence': 'High' if len(day_preds) > 0 else 'Low',
-                        'trend': self._calculate_trend(day_preds)
-                    })
-                
-                predictions[line] = daily_preds
+            predictions[line] = daily_preds
         
         return predictions
     
+    def _cached_forecast(self, line, versions, days):
+        """Prévision en cache couvrant au moins `days` jours (copie), sinon None"""
+        key = (line,) + versions
+        with self._forecast_lock:
+            daily_preds = self._forecast_cache.get(key)
+            if daily_preds is None or len(daily_preds) < days:
+                return None
+            self._forecast_cache.move_to_end(key)
+            return [dict(p) for p in daily_preds[:days]]
+    
+    def _store_forecast(self, line, versions, daily_preds):
+        key = (line,) + versions
+        with self._forecast_lock:
+            cached = self._forecast_cache.get(key)
+            if cached is None or len(cached) < len(daily_preds):
+                self._forecast_cache[key] = daily_preds
+            self._forecast_cache.move_to_end(key)
+            # Éviction LRU (les entrées d'anciennes versions sortent en premier)
+            while len(self._forecast_cache) > self.forecast_cache_size:
+                self._forecast_cache.popitem(last=False)
+    
+    def feature_state(self):
+        """État incrémental des features, reconstruit si les données ont changé"""
+        from data.data_store import get_data_store
+        
+        loader, data_version = get_data_store().get_snapshot()
+        with self._feature_lock:
+            return self._current_feature_state(loader, data_version)
+    
+    def _current_feature_state(self, loader, data_version):
+        # Appelé sous _feature_lock ; (loader, version) lus ensemble. Un état déjà
+        # avancé au-delà de cette version par observe() est conservé.
+        if self._feature_state is None or self._feature_state_version < data_version:
+            self._feature_state = FeatureState.from_index(loader.oee_index)
+            self._feature_state_version = data_version
+        return self._feature_state
+    
+    def observe(self, records, data_version):
+        """
+        Intègre de nouveaux enregistrements horaires à l'état des features (O(1) chacun)
+        Args:
+            records: nouveaux enregistrements (dans un ordre quelconque)
+            data_version: version des données après leur ajout ; l'état n'est
+                avancé que s'il était à jour juste avant
+        """
+        records = sorted(records, key=lambda record: (record['line_id'], pd.Timestamp(record['timestamp'])))
+        with self._feature_lock:
+            if self._feature_state is None or self._feature_state_version != data_version - 1:
+                return
+            
+            # Enregistrement antérieur au dernier observé (rattrapage) : l'état
+            # sera reconstruit depuis l'index trié au prochain accès
+            state = self._feature_state
+            if any(state.last_timestamp(record['line_id']) is not None
+                   and pd.Timestamp(record['timestamp']) < state.last_timestamp(record['line_id'])
+                   for record in records):
+                self._feature_state = None
+                return
+            
+            for record in records:
+                state.update(record)
+            self._feature_state_version = data_version
+    
+    def predict_latest(self, line_ids=None):
+        """
+        OEE prédit pour le dernier enregistrement de chaque ligne
+        Les features glissantes viennent de l'état incrémental, sans prepare_features.
+        """
+        if not self.trained:
+            self._load_model()
+        
+        if self.engine is None and self.model is None:
+            return None
+        
+        from data.data_store import get_data_store
+        
+        # Features lues sous le verrou (observe() peut avancer l'état en parallèle),
+        # inférence hors verrou
+        loader, data_version = get_data_store().get_snapshot()
+        with self._feature_lock:
+            state = self._current_feature_state(loader, data_version)
+            line_ids = line_ids or sorted(state.lines, key=line_sort_key)
+            rows = {line: state.features(line) for line in line_ids}
+        rows = {line: row for line, row in rows.items() if row is not None}
+        if not rows:
+            return {}
+        
+        preds = self._predict_features(pd.DataFrame(list(rows.values())))
+        return {line: round(float(pred), 2) for line, pred in zip(rows, preds)}
+    
     def predict_line(self, line_id, horizon=7):
         """Prédiction détaillée pour une ligne spécifique"""
-        predictions = self.predict_next_days(days=horizon)
+        predictions = self.predict_next_days(days=horizon, lines=[line_id])
         
         if line_id not in predictions:
             return None
@@ -292,17 +497,49 @@ class OEEPredictor:
         else:
             return 'Stable'
     
-    def _load_model(self):
-        """Charge le modèle sauvegardé"""
+    def _load_model(self, expected_data_hash=None):
+        """
+        Charge la version active du registre
+        Args:
+            expected_data_hash: si fourni, le modèle n'est chargé que s'il a été
+                entraîné sur des données de même hash
+        """
         try:
+            metadata = self.registry.metadata()
+            if metadata is not None:
+                if expected_data_hash is not None and metadata.get('data_hash') != expected_data_hash:
+                    print(f"Modèle {metadata['version']} obsolète (données d'entraînement modifiées)")
+                    return False
+                
+                # Tableaux de l'ensemble compilé mappés en mémoire : pages partagées
+                # entre workers. Les arbres sklearn (objets Cython) ne profitent pas
+                # du mappage ; ils ne sont chargés que si l'ensemble compilé manque.
+                artifacts, metadata = self.registry.load(
+                    metadata['version'], mmap_mode='r', names=['engine', 'scaler', 'features']
+                )
+                if 'engine' in artifacts:
+                    self.model = None
+                    self.engine = CompiledTreeEnsemble.from_arrays(artifacts['engine'])
+                else:
+                    self.model = self.registry.load(metadata['version'], names=['model'])[0]['model']
+                    self.engine = CompiledTreeEnsemble.from_oee_ensemble(self.model)
+                self.scaler = artifacts['scaler']
+                self.feature_columns = artifacts['features']
+                self.model_version = metadata['version']
+                self.trained = True
+                return True
+            
+            # Compatibilité : anciens fichiers hors registre (sans hash des données)
             model_path = os.path.join(self.models_path, 'oee_model.pkl')
             scaler_path = os.path.join(self.models_path, 'scaler.pkl')
             features_path = os.path.join(self.models_path, 'features.pkl')
             
-            if os.path.exists(model_path):
+            if expected_data_hash is None and os.path.exists(model_path):
                 self.model = joblib.load(model_path)
+                self.engine = CompiledTreeEnsemble.from_oee_ensemble(self.model)
                 self.scaler = joblib.load(scaler_path)
                 self.feature_columns = joblib.load(features_path)
+                self.model_version = 'legacy'
                 self.trained = True
                 return True
         except Exception as e:
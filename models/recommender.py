@@ -2,14 +2,32 @@
 Système de recommandation de ligne optimale pour la production
 """
 
+import functools
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import json
 
+from data.oee_index import line_sort_key
+
+
+def _memoized(method):
+    """Mémoïse une méthode par (instance, arguments) via self.memo (fourni par la couche web)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__qualname__, id(self), args, tuple(sorted(kwargs.items())))
+        return self.memo(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
+def _no_memo(key, compute):
+    return compute()
+
+
 class LineRecommender:
     def __init__(self):
-        self.lines = ['L1', 'L2', 'L3']
+        # Profils des lignes historiques (réutilisés cycliquement au-delà de L3,
+        # comme dans le générateur) ; les lignes viennent des données chargées
         self.line_characteristics = {
             'L1': {
                 'speed': 1200,  # pièces/heure
@@ -34,43 +52,39 @@ class LineRecommender:
             }
         }
         self.predictor = None
+        # Mémoïsation par requête fournie par la couche web (app.py : request_memo)
+        self.memo = _no_memo
     
-    def initialize(self):
-        """Initialise le système de recommandation"""
+    def initialize(self, predictor=None):
+        """Initialise le système de recommandation (prédicteur partagé si fourni)"""
         from models.predictor import OEEPredictor
-        self.predictor = OEEPredictor()
+        self.predictor = predictor or OEEPredictor()
         
         # Charger le modèle s'il existe
         if not self.predictor.trained:
             self.predictor._load_model()
     
+    @_memoized
     def get_best_line(self):
         """Recommande la meilleure ligne globale"""
-        from data.data_loader import DataLoader
+        from data.data_store import get_data_store
         
-        loader = DataLoader()
-        loader.load_data()
+        loader = get_data_store().get_loader()
         
-        # Récupérer les performances récentes
-        recent_data = loader.oee_data[
-            loader.oee_data['timestamp'] >= 
-            loader.oee_data['timestamp'].max() - timedelta(days=7)
-        ]
-        
-        # Calculer les scores par ligne
+        # Calculer les scores par ligne (performances des 7 derniers jours)
         scores = {}
-        for line in self.lines:
-            line_data = recent_data[recent_data['line_id'] == line]
+        for line in loader.oee_index.lines:
+            stats = loader.oee_rollups.window_stats(line, days=7)
             
-            if len(line_data) > 0:
+            if stats['count'] > 0:
                 # Score basé sur plusieurs critères
-                oee_score = line_data['oee'].mean()
-                availability_score = line_data['availability'].mean()
-                quality_score = line_data['quality'].mean()
-                performance_score = line_data['performance'].mean()
+                oee_score = stats['mean']['oee']
+                availability_score = stats['mean']['availability']
+                quality_score = stats['mean']['quality']
+                performance_score = stats['mean']['performance']
                 
                 # Variabilité (moins c'est mieux)
-                stability_score = 100 - line_data['oee'].std() * 2
+                stability_score = 100 - stats['std']['oee'] * 2
                 
                 # Score global pondéré
                 total_score = (
@@ -102,12 +116,12 @@ class LineRecommender:
             'reason': self._generate_reason(best_line[0], best_line[1])
         }
     
+    @_memoized
     def recommend(self, product_type='standard', quantity=1000):
         """Recommande la meilleure ligne pour un produit spécifique"""
-        from data.data_loader import DataLoader
+        from data.data_store import get_data_store
         
-        loader = DataLoader()
-        loader.load_data()
+        loader = get_data_store().get_loader()
         
         # Obtenir les prédictions OEE
         if self.predictor and self.predictor.trained:
@@ -118,14 +132,14 @@ class LineRecommender:
         # Calculer le score pour chaque ligne
         recommendations = []
         
-        for line in self.lines:
-            chars = self.line_characteristics[line]
+        for line in loader.oee_index.lines:
+            chars = self._characteristics(line)
             
             # OEE prédit ou récent
             if predictions and line in predictions:
                 predicted_oee = predictions[line][0]['oee_predicted']
             else:
-                recent = loader.oee_data[loader.oee_data['line_id'] == line].tail(24)
+                recent = loader.oee_index.tail(line, 24)
                 predicted_oee = recent['oee'].mean() if len(recent) > 0 else 70
             
             # Calcul du temps de production estimé
@@ -182,7 +196,7 @@ class LineRecommender:
         all_recommendations = self.recommend(product_type, quantity)
         all_lines_data = [all_recommendations['details']] + all_recommendations['alternatives']
         
-        for line in self.lines:
+        for line in sorted((entry['line_id'] for entry in all_lines_data), key=line_sort_key):
             # Trouver les détails pour cette ligne spécifique
             line_details = next(
                 (s for s in all_lines_data if s['line_id'] == line), 
@@ -225,6 +239,14 @@ class LineRecommender:
             }
         }
     
+    def _characteristics(self, line):
+        """Caractéristiques d'une ligne (L4 reprend le profil de L1, L5 celui de L2...)"""
+        if line in self.line_characteristics:
+            return self.line_characteristics[line]
+        profiles = list(self.line_characteristics.values())
+        digits = ''.join(char for char in str(line) if char.isdigit())
+        return profiles[(int(digits) - 1) % len(profiles) if digits else 0]
+    
     def _generate_reason(self, line, scores):
         """Génère une explication de la recommandation"""
         reasons = []
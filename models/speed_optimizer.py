@@ -12,11 +12,20 @@ import joblib
 import os
 
 class SpeedOptimizer:
+    # Colonnes utilisées pour l'entraînement (base de l'empreinte des données)
+    TRAINING_COLUMNS = ['line_id', 'product_type', 'machine_speed', 'total_pieces', 'good_pieces']
+    
     def __init__(self):
         self.model_production = None  # Prédit production_rate = f(speed, line, product)
         self.model_quality = None     # Prédit quality_rate = f(speed, line, product)
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.data_fingerprint = None
+        self.models_path = os.path.join(os.path.dirname(__file__), 'saved_models')
+        
+        # Table précalculée des courbes (ligne, produit) -> vitesses, production, qualité
+        self.speed_table = {}
+        self.table_step = 1  # pas de la grille (pcs/h), interpolation entre deux points
         
         # Vitesses par ligne (pièces/heure)
         self.speed_ranges = {
@@ -50,11 +59,10 @@ class SpeedOptimizer:
         
         # Feature engineering: vitesse relative
         # Ratio vitesse actuelle / vitesse optimale estimée
-        def get_speed_ratio(row):
-            optimal = self.speed_ranges[row['line_id']]['optimal_estimate']
-            return row['machine_speed'] / optimal
-        
-        features['speed_ratio'] = features.apply(get_speed_ratio, axis=1)
+        optimal = features['line_id'].map(
+            {line: r['optimal_estimate'] for line, r in self.speed_ranges.items()}
+        )
+        features['speed_ratio'] = features['machine_speed'] / optimal
         
         # Sélection des features numériques
         numeric_features = [
@@ -75,6 +83,8 @@ class SpeedOptimizer:
         """
         print("Entraînement de l'optimiseur de vitesse...")
         
+        self.data_fingerprint = self.training_fingerprint(data)
+        
         # Calculer les variables target
         # 1. Production rate (pièces/heure) - basé sur total_pieces
         data['production_rate'] = data['total_pieces']  # Déjà des pièces/heure
@@ -131,6 +141,7 @@ class SpeedOptimizer:
         print(f"  ✓ Score qualité: {qual_score:.3f}")
         
         self.is_trained = True
+        self._build_speed_table()
         print("Optimiseur de vitesse entraîné avec succès!\n")
         
         return {
@@ -138,26 +149,30 @@ class SpeedOptimizer:
             'quality_score': qual_score
         }
     
-    def predict_at_speed(self, line_id, product_type, speed):
-        """Prédit production et qualité pour une vitesse donnée"""
+    def predict_batch(self, line_ids, product_types, speeds):
+        """
+        Prédit production et qualité pour plusieurs points en un seul appel par modèle
+        Args:
+            line_ids, product_types, speeds: séquences de même longueur
+        Returns:
+            (production, quality) sous forme de tableaux numpy
+        """
         if not self.is_trained:
             raise Exception("Modèle non entraîné. Appelez train() d'abord.")
         
-        # Créer un dataframe pour la prédiction
-        test_data = pd.DataFrame([{
-            'line_id': line_id,
-            'product_type': product_type,
-            'machine_speed': speed
-        }])
+        batch = pd.DataFrame({
+            'line_id': line_ids,
+            'product_type': product_types,
+            'machine_speed': speeds
+        })
         
-        # Préparer les features
-        X = self.prepare_features(test_data)
+        X = self.prepare_features(batch)
         X_scaled = self.scaler.transform(X)
         
-        # Prédictions
-        production = self.model_production.predict(X_scaled)[0]
-        quality = self.model_quality.predict(X_scaled)[0]
-        
+        return self.model_production.predict(X_scaled), self.model_quality.predict(X_scaled)
+    
+    def _format_prediction(self, speed, production, quality):
+        """Met en forme une prédiction (production nette et taux de défauts)"""
         # Output net (pièces bonnes par heure)
         net_output = production * (quality / 100)
         
@@ -172,6 +187,76 @@ class SpeedOptimizer:
             'net_output': round(net_output, 1)
         }
     
+    def _build_speed_table(self):
+        """Précalcule production et qualité pour chaque (ligne, produit, vitesse) de la grille"""
+        keys, batch_lines, batch_products, batch_speeds = [], [], [], []
+        for line_id in self.speed_ranges:
+            speeds = self._speed_grid(line_id, self.table_step)
+            for product_type in self.product_characteristics:
+                keys.append((line_id, product_type, speeds))
+                batch_lines.extend([line_id] * len(speeds))
+                batch_products.extend([product_type] * len(speeds))
+                batch_speeds.extend(speeds.tolist())
+        
+        production, quality = self.predict_batch(batch_lines, batch_products, batch_speeds)
+        
+        table = {}
+        offset = 0
+        for line_id, product_type, speeds in keys:
+            end = offset + len(speeds)
+            table[(line_id, product_type)] = {
+                'speeds': speeds.astype(float),
+                'production': production[offset:end],
+                'quality': quality[offset:end]
+            }
+            offset = end
+        
+        # Remplacement en une seule affectation (lecteurs concurrents)
+        self.speed_table = table
+    
+    def _predict_points(self, line_ids, product_types, speeds):
+        """Prédictions lues dans la table (interpolation linéaire), modèles hors grille"""
+        line_ids = np.asarray(line_ids)
+        product_types = np.asarray(product_types)
+        speeds = np.asarray(speeds, dtype=float)
+        
+        production = np.empty(len(speeds))
+        quality = np.empty(len(speeds))
+        missing = np.ones(len(speeds), dtype=bool)
+        
+        table = self.speed_table
+        for key in set(zip(line_ids.tolist(), product_types.tolist())):
+            curve = table.get(key)
+            if curve is None:
+                continue
+            mask = ((line_ids == key[0]) & (product_types == key[1]) &
+                    (speeds >= curve['speeds'][0]) & (speeds <= curve['speeds'][-1]))
+            production[mask] = np.interp(speeds[mask], curve['speeds'], curve['production'])
+            quality[mask] = np.interp(speeds[mask], curve['speeds'], curve['quality'])
+            missing &= ~mask
+        
+        # Combinaisons absentes de la table : appel direct aux modèles
+        if missing.any():
+            production[missing], quality[missing] = self.predict_batch(
+                line_ids[missing], product_types[missing], speeds[missing]
+            )
+        
+        return production, quality
+    
+    def predict_at_speed(self, line_id, product_type, speed):
+        """Prédit production et qualité pour une vitesse donnée"""
+        if not self.is_trained:
+            raise Exception("Modèle non entraîné. Appelez train() d'abord.")
+        
+        production, quality = self._predict_points([line_id], [product_type], [speed])
+        return self._format_prediction(speed, production[0], quality[0])
+    
+    def _speed_grid(self, line_id, step=25):
+        """Plage de vitesses à tester pour une ligne"""
+        min_speed = self.speed_ranges[line_id]['min']
+        max_speed = self.speed_ranges[line_id]['max']
+        return np.arange(min_speed, max_speed + step, step)
+    
     def find_optimal_speed(self, line_id, product_type, step=25):
         """
         Trouve la vitesse optimale (Sweet Spot)
@@ -182,23 +267,50 @@ class SpeedOptimizer:
         Returns:
             dict avec optimal_speed, max_net_output, et courbe complète
         """
+        return self._find_optimal_speeds([line_id], product_type, step)[line_id]
+    
+    def _find_optimal_speeds(self, line_ids, product_type, step=25):
+        """Évalue les courbes de plusieurs lignes en une seule matrice de features"""
         if not self.is_trained:
             raise Exception("Modèle non entraîné. Appelez train() d'abord.")
         
-        # Plage de vitesses à tester
-        min_speed = self.speed_ranges[line_id]['min']
-        max_speed = self.speed_ranges[line_id]['max']
-        speeds = np.arange(min_speed, max_speed + step, step)
+        # Courbe complète + vitesse actuelle estimée de chaque ligne, en un seul lot
+        grids = {line_id: self._speed_grid(line_id, step) for line_id in line_ids}
+        batch_lines, batch_speeds = [], []
+        for line_id, speeds in grids.items():
+            batch_lines.extend([line_id] * (len(speeds) + 1))
+            batch_speeds.extend(speeds.tolist())
+            batch_speeds.append(self.speed_ranges[line_id]['optimal_estimate'])
+        
+        production, quality = self._predict_points(
+            batch_lines, [product_type] * len(batch_lines), batch_speeds
+        )
         
-        results = []
+        results = {}
+        offset = 0
+        for line_id, speeds in grids.items():
+            end = offset + len(speeds)
+            curve = [
+                self._format_prediction(speed, production[i], quality[i])
+                for speed, i in zip(speeds, range(offset, end))
+            ]
+            current_prediction = self._format_prediction(
+                batch_speeds[end], production[end], quality[end]
+            )
+            results[line_id] = self._optimization_result(
+                line_id, product_type, curve, current_prediction
+            )
+            offset = end + 1
+        
+        return results
+    
+    def _optimization_result(self, line_id, product_type, results, current_prediction):
+        """Analyse une courbe vitesse / production nette et construit la recommandation"""
         best_net_output = 0
         optimal_speed = None
         
         # Tester chaque vitesse
-        for speed in speeds:
-            prediction = self.predict_at_speed(line_id, product_type, speed)
-            results.append(prediction)
-            
+        for prediction in results:
             if prediction['net_output'] > best_net_output:
                 best_net_output = prediction['net_output']
                 optimal_speed = prediction['speed']
@@ -206,7 +318,6 @@ class SpeedOptimizer:
         # Calcul du gain potentiel
         # Vitesse actuelle moyenne (estimation)
         current_speed = self.speed_ranges[line_id]['optimal_estimate']
-        current_prediction = self.predict_at_speed(line_id, product_type, current_speed)
         
         improvement_pct = ((best_net_output - current_prediction['net_output']) / 
                           current_prediction['net_output']) * 100
@@ -244,49 +355,78 @@ class SpeedOptimizer:
             'product_type': product_type
         }
     
-    def save_model(self, filepath='models/saved_models/speed_optimizer.pkl'):
-        """Sauvegarde le modèle entraîné"""
+    def training_fingerprint(self, data):
+        """Empreinte des colonnes d'entraînement (détecte un changement de données)"""
+        from data.data_store import frame_fingerprint
+        
+        return frame_fingerprint(data, self.TRAINING_COLUMNS)
+    
+    def save_model(self, filepath=None):
+        """Sauvegarde le modèle entraîné avec l'empreinte de ses données d'entraînement"""
         if not self.is_trained:
             raise Exception("Modèle non entraîné. Rien à sauvegarder.")
         
+        filepath = filepath or os.path.join(self.models_path, 'speed_optimizer.pkl')
+        
         model_data = {
             'model_production': self.model_production,
             'model_quality': self.model_quality,
             'scaler': self.scaler,
             'speed_ranges': self.speed_ranges,
-            'product_characteristics': self.product_characteristics
+            'product_characteristics': self.product_characteristics,
+            'data_fingerprint': self.data_fingerprint
         }
         
+        # Écriture atomique : un autre worker ne lit jamais un fichier partiel
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        joblib.dump(model_data, filepath)
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        joblib.dump(model_data, tmp_path)
+        os.replace(tmp_path, filepath)
         print(f"✓ Modèle sauvegardé: {filepath}")
     
-    def load_model(self, filepath='models/saved_models/speed_optimizer.pkl'):
-        """Charge un modèle sauvegardé"""
+    def load_model(self, filepath=None, expected_fingerprint=None):
+        """
+        Charge un modèle sauvegardé
+        Args:
+            expected_fingerprint: si fourni, le modèle n'est chargé que s'il a été
+                entraîné sur des données de même empreinte
+        """
+        filepath = filepath or os.path.join(self.models_path, 'speed_optimizer.pkl')
         if not os.path.exists(filepath):
             return False
         
-        model_data = joblib.load(filepath)
+        try:
+            model_data = joblib.load(filepath)
+        except Exception as e:
+            print(f"Erreur lors du chargement du modèle: {e}")
+            return False
+        
+        fingerprint = model_data.get('data_fingerprint')
+        if expected_fingerprint is not None and fingerprint != expected_fingerprint:
+            print("Modèle sauvegardé obsolète (données d'entraînement modifiées)")
+            return False
+        
         self.model_production = model_data['model_production']
         self.model_quality = model_data['model_quality']
         self.scaler = model_data['scaler']
         self.speed_ranges = model_data['speed_ranges']
         self.product_characteristics = model_data['product_characteristics']
+        self.data_fingerprint = fingerprint
         self.is_trained = True
+        self._build_speed_table()
         
         print(f"✓ Modèle chargé: {filepath}")
         return True
     
     def get_speed_recommendations_all_lines(self, product_type):
         """Recommandations pour toutes les lignes (comparaison)"""
-        recommendations = {}
-        
-        for line_id in ['L1', 'L2', 'L3']:
-            try:
-                result = self.find_optimal_speed(line_id, product_type)
-                recommendations[line_id] = result
-            except Exception as e:
-                recommendations[line_id] = {'error': str(e)}
+        line_ids = ['L1', 'L2', 'L3']
+        
+        # Les trois courbes sont évaluées dans un seul lot
+        try:
+            recommendations = self._find_optimal_speeds(line_ids, product_type)
+        except Exception as e:
+            recommendations = {line_id: {'error': str(e)} for line_id in line_ids}
         
         # Identifier la meilleure ligne
         best_line = None
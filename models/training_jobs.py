@@ -0,0 +1,244 @@
+"""
+Entraînement en arrière-plan et remplacement à chaud des modèles en service
+Les requêtes continuent d'utiliser l'ancien modèle jusqu'au remplacement atomique.
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+
+class ModelSlot:
+    """Référence vers un modèle en service, remplaçable atomiquement"""
+
+    def __init__(self, model=None):
+        self._model = model
+        self.version = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._watch = None
+        self._token = None
+        self._last_check = 0.0
+        # Mémoïsation par requête fournie par la couche web (app.py : request_memo)
+        self.memo = _no_memo
+
+    def get(self):
+        """Modèle courant (une requête le lit une fois et le garde jusqu'à la fin)"""
+        return self.memo(('model_slot', id(self)), self._current_model)
+
+    def _current_model(self):
+        if self._watch is not None:
+            self._check_persisted()
+        return self._model
+
+    def swap(self, model):
+        """Met en service un nouveau modèle"""
+        with self._lock:
+            self._model = model
+            self.version += 1
+            if self._watch is not None:
+                self._token = self._watch[0]()
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(model)
+
+    def watch(self, current_token, reload, interval=5.0):
+        """
+        Suit la version persistée du modèle (entraînée par un autre processus)
+        Args:
+            current_token: fonction retournant l'identifiant de la version persistée
+            reload: fonction retournant le modèle rechargé depuis le disque
+            interval: délai minimal entre deux vérifications (secondes)
+        """
+        self._watch = (current_token, reload, interval)
+        self._token = current_token()
+        self._last_check = time.monotonic()
+
+    def _check_persisted(self):
+        current_token, reload, interval = self._watch
+        now = time.monotonic()
+        if now - self._last_check < interval:
+            return
+        self._last_check = now
+
+        try:
+            token = current_token()
+            if token is not None and token != self._token:
+                self.swap(reload())
+        except Exception as e:
+            print(f"Erreur lors du rechargement du modèle: {e}")
+
+    def on_swap(self, callback):
+        """Enregistre un callback appelé après chaque remplacement"""
+        self._listeners.append(callback)
+
+
+def _no_memo(key, compute):
+    return compute()
+
+
+class TrainingJobManager:
+    """File de jobs d'entraînement exécutés hors du thread de requête"""
+
+    def __init__(self, max_workers=1, history_size=50):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.jobs = {}
+        self._trainers = {}
+        self._executor = None
+        self._executor_pid = None
+        self._held = False
+        self._pending = []
+        self._leader_lock = None
+        self._lock = threading.Lock()
+
+    def register(self, kind, trainer, slot):
+        """
+        Déclare un type de modèle entraînable
+        Args:
+            trainer: fonction sans argument retournant (nouveau_modele, resultat)
+            slot: ModelSlot dans lequel le nouveau modèle est mis en service
+        """
+        self._trainers[kind] = (trainer, slot)
+
+    @property
+    def kinds(self):
+        return list(self._trainers.keys())
+
+    def submit(self, kind):
+        """Soumet un job (ou retourne le job déjà en attente/en cours pour ce modèle)"""
+        if kind not in self._trainers:
+            raise ValueError(f"Modèle inconnu: {kind}")
+
+        with self._lock:
+            for job in self.jobs.values():
+                if job['model'] == kind and job['status'] in ('queued', 'running'):
+                    return dict(job)
+
+            job = {
+                'job_id': uuid.uuid4().hex[:12],
+                'model': kind,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            self.jobs[job['job_id']] = job
+            self._trim_history()
+            if self._held:
+                self._pending.append(job['job_id'])
+            else:
+                self._get_executor().submit(self._run, job['job_id'])
+            return dict(job)
+
+    def hold(self):
+        """Met les nouveaux jobs en attente (processus maître avant fork)"""
+        with self._lock:
+            self._held = True
+
+    def release(self, run_pending=True):
+        """
+        Reprend l'exécution des jobs
+        Args:
+            run_pending: False pour déléguer les jobs en attente (exécutés par un
+                autre worker, le modèle sera rechargé depuis le disque)
+        """
+        with self._lock:
+            self._held = False
+            pending, self._pending = self._pending, []
+            for job_id in pending:
+                if run_pending:
+                    self._get_executor().submit(self._run, job_id)
+                else:
+                    self.jobs[job_id].update(status='delegated', finished_at=datetime.now().isoformat())
+
+    def release_after_fork(self, lock_path):
+        """
+        Reprend l'exécution dans un worker forké
+        Le worker qui obtient le verrou `lock_path` exécute les jobs mis en attente
+        par le maître et le garde jusqu'à sa fin ; les autres les délèguent. Si ce
+        worker meurt, le verrou est libéré et le worker qui le remplace reprend les
+        jobs du maître (un job déjà terminé est alors réexécuté).
+        """
+        self.release(run_pending=self._acquire_leader_lock(lock_path))
+
+    def _acquire_leader_lock(self, lock_path):
+        if fcntl is None:
+            return True
+        lock_file = open(lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        # Descripteur gardé ouvert : le verrou est libéré à la fin du processus
+        self._leader_lock = lock_file
+        return True
+
+    def get(self, job_id):
+        """État d'un job (copie) ou None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pending(self, kind):
+        """
+        Dernier job de ce modèle s'il n'est pas terminé (copie), sinon None
+        Un job `delegated` est exécuté par un autre worker : le modèle sera rechargé.
+        """
+        with self._lock:
+            jobs = [job for job in self.jobs.values() if job['model'] == kind]
+            if not jobs:
+                return None
+            latest = max(jobs, key=lambda job: job['submitted_at'])
+            return dict(latest) if latest['status'] in ('queued', 'running', 'delegated') else None
+
+    def list_jobs(self):
+        """Jobs du plus récent au plus ancien"""
+        with self._lock:
+            return sorted((dict(job) for job in self.jobs.values()),
+                          key=lambda job: job['submitted_at'], reverse=True)
+
+    def _run(self, job_id):
+        job = self.jobs[job_id]
+        trainer, slot = self._trainers[job['model']]
+        self._update(job, status='running', started_at=datetime.now().isoformat())
+
+        try:
+            model, result = trainer()
+            slot.swap(model)
+            self._update(job, status='succeeded', result=result,
+                         finished_at=datetime.now().isoformat())
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, status='failed', error=str(e),
+                         finished_at=datetime.now().isoformat())
+
+    def _update(self, job, **fields):
+        with self._lock:
+            job.update(fields)
+
+    def _get_executor(self):
+        # Un pool par processus : les threads ne survivent pas à un fork (workers Gunicorn)
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='training')
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _trim_history(self):
+        finished = [job for job in self.jobs.values() if job['status'] in ('succeeded', 'failed', 'delegated')]
+        finished.sort(key=lambda job: job['submitted_at'])
+        for job in finished[:max(0, len(self.jobs) - self.history_size)]:
+            del self.jobs[job['job_id']]
@@ -0,0 +1,116 @@
+"""
+Moteur d'inférence compilé pour ensembles d'arbres (Random Forest / Gradient Boosting)
+Les arbres sklearn sont aplatis une fois en tableaux numpy contigus, puis évalués
+de façon vectorisée sur tous les arbres et toutes les lignes en même temps.
+"""
+
+import numpy as np
+
+
+class CompiledTreeEnsemble:
+    """
+    Somme pondérée d'arbres de régression :
+        prédiction = bias + Σ_t tree_weights[t] * feuille_t(x)
+    """
+
+    ARRAY_FIELDS = ('feature', 'threshold', 'children', 'value', 'roots', 'tree_weights')
+
+    def __init__(self, feature, threshold, children, value, roots, tree_weights, bias, depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # [gauche, droite] entrelacés : enfant = children[2 * noeud + droite]
+        self.value = value
+        self.roots = roots
+        self.tree_weights = tree_weights
+        self.bias = float(bias)
+        self.depth = int(depth)
+
+    @classmethod
+    def from_trees(cls, trees, weights, bias=0.0):
+        """
+        Compile une liste d'arbres sklearn (objets `tree_`) avec leur poids
+        Les feuilles bouclent sur elles-mêmes : chaque parcours fait exactement
+        `depth` itérations, sans masque de fin.
+        """
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        depth = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            children.append(np.column_stack([left, right]).ravel().astype(np.int32))
+            values.append(tree.value.reshape(n_nodes, -1)[:, 0].astype(np.float64))
+            roots.append(offset)
+
+            depth = max(depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            tree_weights=np.asarray(weights, dtype=np.float64),
+            bias=bias,
+            depth=depth
+        )
+
+    @classmethod
+    def from_oee_ensemble(cls, model):
+        """Compile l'ensemble {'rf', 'gb', 'weights'} d'OEEPredictor en une seule structure"""
+        rf, gb = model['rf'], model['gb']
+        w_rf, w_gb = model['weights']
+
+        rf_trees = [estimator.tree_ for estimator in rf.estimators_]
+        gb_trees = [estimator.tree_ for estimator in gb.estimators_[:, 0]]
+
+        # Moyenne des arbres RF ; GB = init + learning_rate × Σ arbres
+        weights = np.concatenate([
+            np.full(len(rf_trees), w_rf / len(rf_trees)),
+            np.full(len(gb_trees), w_gb * gb.learning_rate)
+        ])
+        gb_init = 0.0 if gb.init_ == 'zero' else float(np.ravel(gb.init_.constant_)[0])
+
+        return cls.from_trees(rf_trees + gb_trees, weights, bias=w_gb * gb_init)
+
+    def predict(self, X):
+        """Prédiction vectorisée sur (arbres × lignes)"""
+        # Même conversion que sklearn (float32) pour des comparaisons identiques aux seuils
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = np.arange(n_rows, dtype=np.int64) * n_features
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.depth):
+            x = np.take(flat_X, row_offsets + np.take(self.feature, node))
+            go_right = ~(x <= np.take(self.threshold, node))
+            node = np.take(self.children, 2 * node + go_right)
+
+        return self.bias + self.tree_weights @ np.take(self.value, node)
+
+    def to_arrays(self):
+        """Représentation sérialisable (tableaux numpy, mappables en mémoire)"""
+        arrays = {field: getattr(self, field) for field in self.ARRAY_FIELDS}
+        arrays['bias'] = np.array(self.bias)
+        arrays['depth'] = np.array(self.depth)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            **{field: arrays[field] for field in cls.ARRAY_FIELDS},
+            bias=float(arrays['bias']),
+            depth=int(arrays['depth'])
+        )
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, field).nbytes for field in self.ARRAY_FIELDS)
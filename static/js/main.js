@@ -11,8 +11,8 @@ document.addEventListener('DOMContentLoaded', function() {
     loadDashboardData();
     setupEventListeners();
     
-    // Auto-refresh every 30 seconds
-    setInterval(loadDashboardData, 30000);
+    // Live updates pushed by the server (SSE), polling as fallback
+    subscribeDashboardUpdates();
 });
 
 // Tab Management
@@ -115,6 +115,52 @@ async function loadDashboardData() {
     }
 }
 
+// Dashboard live updates
+let dashboardPollTimer = null;
+
+function subscribeDashboardUpdates() {
+    if (!window.EventSource) {
+        startDashboardPolling();
+        return;
+    }
+    
+    const source = new EventSource('/api/dashboard/stream');
+    
+    source.addEventListener('dashboard', (event) => {
+        const data = JSON.parse(event.data);
+        if (data.success) {
+            dashboardData = data;
+            updateDashboard(data);
+            updateLastUpdateTime();
+        }
+    });
+    
+    // Stream connected: polling no longer needed
+    source.addEventListener('open', stopDashboardPolling);
+    
+    // Connection lost: EventSource reconnects by itself (unless closed), poll meanwhile
+    source.addEventListener('error', () => {
+        startDashboardPolling();
+        // Refused (503: stream limit reached): no automatic reconnection, retry later
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeDashboardUpdates, 300000);
+        }
+    });
+}
+
+function startDashboardPolling() {
+    if (!dashboardPollTimer) {
+        dashboardPollTimer = setInterval(loadDashboardData, 30000);
+    }
+}
+
+function stopDashboardPolling() {
+    if (dashboardPollTimer) {
+        clearInterval(dashboardPollTimer);
+        dashboardPollTimer = null;
+    }
+}
+
 function updateDashboard(data) {
     // Update KPIs
     updateKPIs(data.current);
@@ -545,7 +591,8 @@ function displaySimilarCases(cases) {
 async function loadAnalytics() {
     // Load historical data for chart
     try {
-        const response = await fetch('/api/historical?days=90');
+        // Moyenne journalière de l'OEE calculée côté serveur (un point par jour et par ligne)
+        const response = await fetch('/api/historical?days=30&bucket=daily&agg=mean&columns=oee');
         const data = await response.json();
         
         if (data.success) {
@@ -560,16 +607,14 @@ function updateHistoricalChart(data) {
     const ctx = document.getElementById('historicalChart');
     if (!ctx) return;
     
-    // Group by date and line
+    // Index by date and line (one aggregated point per day and line)
     const groupedData = {};
     data.forEach(record => {
         const date = new Date(record.timestamp).toLocaleDateString('fr-FR');
         if (!groupedData[date]) {
-            groupedData[date] = { L1: [], L2: [], L3: [] };
-        }
-        if (groupedData[date][record.line_id]) {
-            groupedData[date][record.line_id].push(record.oee);
+            groupedData[date] = {};
         }
+        groupedData[date][record.line_id] = record.oee;
     });
     
     const dates = Object.keys(groupedData).slice(-30); // Last 30 days
@@ -583,10 +628,7 @@ function updateHistoricalChart(data) {
         
         return {
             label: line,
-            data: dates.map(date => {
-                const values = groupedData[date][line];
-                return values.length > 0 ? values.reduce((a, b) => a + b) / values.length : null;
-            }),
+            data: dates.map(date => (line in groupedData[date] ? groupedData[date][line] : null)),
             borderColor: colors[idx],
             backgroundColor: colors[idx].replace('1)', '0.1)'),
             tension: 0.3,
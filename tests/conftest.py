@@ -0,0 +1,66 @@
+"""
+Fixtures communes : données OEE synthétiques (schéma de oee_data.csv)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_oee_frame(hours=200, lines=('L1', 'L2', 'L3'), start='2025-01-01 00:20:01', seed=0):
+    """Enregistrements OEE horaires aléatoires, une ligne par (heure, ligne de production)"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=hours, freq='h').astype('datetime64[us]')
+    frame = pd.DataFrame({
+        'timestamp': np.repeat(timestamps.to_numpy(), len(lines)),
+        'line_id': np.tile(list(lines), hours),
+    })
+    count = len(frame)
+    frame['product_type'] = rng.choice(['Fond_Plat', 'Fond_Carre_Sans_Poignees'], count)
+    frame['machine_speed'] = rng.integers(800, 1400, count)
+    for column in ['oee', 'availability', 'performance', 'quality']:
+        frame[column] = rng.uniform(40, 95, count).round(2)
+    frame['production_time'] = rng.integers(30, 60, count)
+    frame['planned_production_time'] = 60
+    frame['good_pieces'] = rng.integers(0, 1000, count)
+    frame['total_pieces'] = frame['good_pieces'] + rng.integers(0, 100, count)
+    return frame
+
+
+@pytest.fixture
+def oee_frame():
+    return make_oee_frame()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Dossier de données (CSV au format du générateur) et dossier de cache"""
+    data_path = tmp_path / 'generated'
+    data_path.mkdir()
+    make_oee_frame(hours=72).to_csv(data_path / 'oee_data.csv', index=False)
+    pd.DataFrame({
+        'stop_id': [1, 2], 'line_id': ['L1', 'L2'], 'machine_id': ['M1-1', 'M2-1'],
+        'stop_type': ['Bourrage', 'Panne'],
+        'start_time': ['2025-01-01 03:00:00', '2025-01-02 05:00:00'],
+        'end_time': ['2025-01-01 03:10:00', '2025-01-02 05:30:00'],
+        'duration_minutes': [10, 30], 'description': ['Bourrage sur M1-1', 'Panne sur M2-1'],
+        'operator': ['OP1', 'OP2'], 'resolved': [True, True]
+    }).to_csv(data_path / 'stops_data.csv', index=False)
+    pd.DataFrame({
+        'timestamp': ['2025-01-01 22:20:01', '2025-01-02 22:20:01'], 'line_id': ['L1', 'L2'],
+        'shift': [1, 1], 'total_produced': [10000, 9000], 'total_defects': [200, 300],
+        'defect_rate': [2.0, 3.33], 'defect_type': ['Contamination', 'Impression'],
+        'rework_count': [50, 80], 'scrap_count': [150, 220]
+    }).to_csv(data_path / 'quality_data.csv', index=False)
+    pd.DataFrame({
+        'anomaly_id': [1], 'timestamp': ['2025-01-01 10:00:00'], 'line_id': ['L1'], 'machine_id': ['M1-1'],
+        'symptom': ['Vibrations anormales'], 'root_cause': ['Roulements usés'],
+        'solution_applied': ['Remplacement des roulements'], 'resolution_time_minutes': [60],
+        'impact_oee': [-5], 'recurrence_count': [1], 'priority': ['Low'], 'status': ['Resolved']
+    }).to_csv(data_path / 'anomalies_data.csv', index=False)
+    return str(data_path), str(tmp_path / 'cache')
@@ -0,0 +1,45 @@
+from data.anomaly_store import AnomalyStore
+from data.data_store import DataStore
+from models.anomaly_expert import AnomalyExpert
+
+
+def _expert(tmp_path):
+    return AnomalyExpert(AnomalyStore(db_path=str(tmp_path / 'anomalies.db'), seed_csv=str(tmp_path / 'none.csv')))
+
+
+def test_alerts_are_installed_in_one_step(tmp_path, monkeypatch):
+    expert = _expert(tmp_path)
+    expert.active_alerts, expert.data_version = [{'id': 1, 'type': 'old'}], 1
+    visible_during_build = []
+
+    def build(loader):
+        visible_during_build.append(expert.active_alerts)
+        return [{'id': 1, 'type': 'new'}, {'id': 2, 'type': 'new'}]
+
+    monkeypatch.setattr(expert, '_build_alerts', build)
+    expert._refresh_alerts(None, 2)
+
+    # Pendant la construction, les lecteurs voient l'ancienne liste complète
+    assert visible_during_build == [[{'id': 1, 'type': 'old'}]]
+    assert [alert['type'] for alert in expert.active_alerts] == ['new', 'new']
+    assert expert.data_version == 2
+
+
+def test_older_version_does_not_replace_newer_alerts(tmp_path, monkeypatch):
+    expert = _expert(tmp_path)
+    monkeypatch.setattr(expert, '_build_alerts', lambda loader: [{'id': 1, 'version': loader}])
+
+    expert._refresh_alerts(3, 3)
+    expert._refresh_alerts(2, 2)
+
+    assert expert.active_alerts == [{'id': 1, 'version': 3}] and expert.data_version == 3
+
+
+def test_build_alerts_numbers_alerts(tmp_path, data_dir):
+    store = DataStore(data_path=data_dir[0], cache_path=data_dir[1])
+    assert store.reload()
+
+    alerts = _expert(tmp_path)._build_alerts(store.loader)
+
+    assert [alert['id'] for alert in alerts] == list(range(1, len(alerts) + 1))
+    assert {alert['line_id'] for alert in alerts} <= {'L1', 'L2', 'L3'}
@@ -0,0 +1,85 @@
+import pytest
+
+from data.anomaly_store import AnomalyStore
+
+
+def _store(tmp_path):
+    return AnomalyStore(db_path=str(tmp_path / 'anomalies.db'), seed_csv=str(tmp_path / 'none.csv'))
+
+
+def _fields(**overrides):
+    fields = {
+        'timestamp': '2026-03-02T08:15:30.250000', 'line_id': 'L1', 'machine_id': 'M1-1',
+        'symptom': 'Vibration', 'root_cause': 'Roulement', 'solution_applied': 'Remplacement',
+        'resolution_time_minutes': 45, 'impact_oee': -4, 'recurrence_count': 1,
+        'priority': 'High', 'status': 'Resolved'
+    }
+    fields.update(overrides)
+    return fields
+
+
+def test_add_returns_iso_timestamp_and_casts_integers(tmp_path):
+    store = _store(tmp_path)
+    anomaly = store.add(_fields(resolution_time_minutes='60', impact_oee=-5.0))
+
+    assert anomaly['timestamp'] == '2026-03-02T08:15:30.250000'
+    assert anomaly['resolution_time_minutes'] == 60
+    assert anomaly['impact_oee'] == -5
+    assert store.get(anomaly['anomaly_id'])['resolution_time_minutes'] == 60
+
+
+def test_ids_are_never_reused(tmp_path):
+    store = _store(tmp_path)
+    ids = [store.add(_fields())['anomaly_id'] for _ in range(3)]
+
+    assert store.delete(ids[-1])
+    assert store.add(_fields())['anomaly_id'] == ids[-1] + 1
+
+
+def test_update_and_delete_missing_id(tmp_path):
+    store = _store(tmp_path)
+    anomaly_id = store.add(_fields())['anomaly_id']
+    revision = store.revision()
+
+    assert store.update(anomaly_id + 1, {'status': 'Open'}) is False
+    assert store.delete(anomaly_id + 1) is False
+    # Aucune révision consommée par une opération sans effet
+    assert store.revision() == revision
+
+
+@pytest.mark.parametrize('value', [None, True, 'abc', 2.5, '2.5', [1]])
+def test_update_validates_integers_like_add(tmp_path, value):
+    store = _store(tmp_path)
+    anomaly_id = store.add(_fields())['anomaly_id']
+
+    with pytest.raises(ValueError):
+        store.update(anomaly_id, {'impact_oee': value})
+    with pytest.raises(ValueError):
+        store.add(_fields(impact_oee=value))
+    assert store.get(anomaly_id)['impact_oee'] == -4
+
+
+def test_update_casts_integers(tmp_path):
+    store = _store(tmp_path)
+    anomaly_id = store.add(_fields())['anomaly_id']
+
+    assert store.update(anomaly_id, {'recurrence_count': '3', 'unknown': 'ignored'})
+    assert store.get(anomaly_id)['recurrence_count'] == 3
+
+
+def test_changes_since_includes_tombstones(tmp_path):
+    store = _store(tmp_path)
+    kept, removed, _ = (store.add(_fields())['anomaly_id'] for _ in range(3))
+    revision = store.revision()
+
+    store.update(kept, {'status': 'Open'})
+    store.delete(removed)
+    frame, deleted, current = store.changes_since(revision)
+
+    assert frame['anomaly_id'].tolist() == [kept]
+    assert frame['status'].tolist() == ['Open']
+    assert deleted == [removed]
+    assert current == store.revision() > revision
+
+    frame, deleted, _ = store.changes_since(current)
+    assert frame.empty and deleted == []
@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_loader import DataLoader
+from data.data_store import DataStore
+from data.ingestion import DataIngestor
+
+
+def _store(data_dir):
+    store = DataStore(check_interval=0, data_path=data_dir[0], cache_path=data_dir[1])
+    assert store.reload()
+    return store
+
+
+def _new_records(loader, hours):
+    last = loader.oee_index.tail('L1', 1).iloc[0]
+    records = []
+    for hour in hours:
+        record = last.to_dict()
+        record['timestamp'] = (last['timestamp'] + pd.Timedelta(hours=hour)).isoformat()
+        record['oee'] = 50.0 + hour
+        records.append(record)
+    return records
+
+
+def _sorted(df):
+    return df.sort_values(['timestamp', 'line_id'], kind='stable').reset_index(drop=True)
+
+
+def test_other_worker_applies_appended_tail(data_dir, monkeypatch):
+    writer, reader = _store(data_dir), _store(data_dir)
+    DataIngestor(writer).ingest({'oee_data': _new_records(writer.loader, [1, 2, 3])})
+
+    # L'autre worker ne relit que la fin du CSV, sans rechargement complet
+    monkeypatch.setattr(reader, 'reload', lambda: pytest.fail('rechargement complet'))
+    version = reader.version
+    assert reader.refresh_if_changed(force=True)
+    assert reader.version == version + 1
+
+    expected, actual = _sorted(writer.loader.oee_data), _sorted(reader.loader.oee_data)
+    pd.testing.assert_frame_equal(actual, expected)
+    assert reader.loader.oee_rollups.window_stats('L1', days=1) == writer.loader.oee_rollups.window_stats('L1', days=1)
+    assert not reader.refresh_if_changed(force=True)
+
+    # L'ingestion suivante de l'autre worker ne duplique pas les lignes déjà lues
+    summary, _ = DataIngestor(reader).ingest({'oee_data': _new_records(reader.loader, [-2, 1])})
+    assert summary['oee_data']['inserted'] == 1
+    assert writer.refresh_if_changed(force=True)
+    assert len(writer.loader.oee_data) == len(reader.loader.oee_data)
+
+
+def test_cache_is_completed_with_csv_tail(data_dir, monkeypatch):
+    writer = _store(data_dir)
+    DataIngestor(writer).ingest({'oee_data': _new_records(writer.loader, [1, 2])})
+
+    loader = DataLoader(*data_dir)
+    assert loader.load_data()
+    pd.testing.assert_frame_equal(_sorted(loader.oee_data), _sorted(writer.loader.oee_data))
+
+    # Cache réécrit depuis la mémoire : le chargement suivant ne lit plus le CSV
+    monkeypatch.setattr(pd, 'read_csv', lambda *args, **kwargs: pytest.fail('CSV relu'))
+    cached = DataLoader(*data_dir)
+    assert cached.load_data()
+    pd.testing.assert_frame_equal(_sorted(cached.oee_data), _sorted(writer.loader.oee_data))
+
+
+def test_rewritten_csv_triggers_full_reload(data_dir):
+    store = _store(data_dir)
+    frame = store.loader.oee_data.iloc[:-3].copy()
+    frame['oee'] = np.round(frame['oee'] + 1, 2)
+    frame.to_csv(f"{data_dir[0]}/oee_data.csv", index=False)
+
+    assert store.refresh_if_changed(force=True)
+    assert len(store.loader.oee_data) == len(frame)
+    assert store.loader.oee_data['oee'].sum() == pytest.approx(frame['oee'].sum())
+
+
+def test_corrupt_cache_is_a_cache_miss(data_dir):
+    _store(data_dir)
+    cache_file = f"{data_dir[1]}/oee_data.npz"
+    with open(cache_file, 'wb') as f:
+        f.write(b'PK\x03\x04 truncated')
+
+    loader = DataLoader(*data_dir)
+    assert loader.load_data()
+    expected = pd.read_csv(f"{data_dir[0]}/oee_data.csv")
+    assert len(loader.oee_data) == len(expected)
+
+    # Cache réécrit, sans fichier temporaire résiduel
+    cached, _ = loader._read_cache(cache_file)
+    assert len(cached) == len(expected)
+    assert not [name for name in os.listdir(data_dir[1]) if name.endswith('.tmp')]
+
+
+def test_data_layer_does_not_import_flask():
+    # Le générateur (python -m data.generator) et les scripts n'ont pas besoin de Flask
+    code = "import sys, data, data.generator; sys.exit('flask' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, '-c', code], cwd=root).returncode == 0
+
+
+def test_loader_memo_is_pluggable(data_dir):
+    store = _store(data_dir)
+    keys = []
+
+    def memo(key, compute):
+        keys.append(key)
+        return compute()
+
+    store.memo = memo
+    assert store.get_loader() is store.loader
+    assert keys == [('data_loader', id(store))]
+
+
+def test_snapshot_pairs_loader_with_its_version(data_dir):
+    store = _store(data_dir)
+    loader, version = store.get_snapshot()
+    assert loader is store.loader and version == store.version
+
+    assert store.reload()
+    new_loader, new_version = store.get_snapshot()
+    assert new_loader is not loader and new_version == version + 1
@@ -0,0 +1,26 @@
+from utils.event_stream import EventBroadcaster
+
+
+def _broadcaster(max_clients):
+    return EventBroadcaster('test', lambda: ('1', b'{}'), max_clients=max_clients)
+
+
+def test_connections_are_capped():
+    events = _broadcaster(max_clients=2)
+
+    assert events.try_connect()
+    assert events.try_connect()
+    assert not events.try_connect()
+
+    events.disconnect()
+    assert events.try_connect()
+
+
+def test_stream_sends_current_event():
+    events = _broadcaster(max_clients=1)
+    stream = events.stream()
+
+    assert next(stream) == b'retry: 5000\n\n'
+    assert next(stream) == b'event: test\nid: 1\ndata: {}\n\n'
+    stream.close()
+    assert events.clients == 0
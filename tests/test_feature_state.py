@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from conftest import make_oee_frame
+from data import data_store
+from data.oee_index import OEETimeIndex
+from models.feature_state import FeatureState
+from models.predictor import OEEPredictor
+
+
+def _observed(history, batch):
+    """(état du prédicteur après observe, état de référence reconstruit depuis l'index)"""
+    predictor = OEEPredictor()
+    predictor._feature_state = FeatureState.from_index(OEETimeIndex(history))
+    predictor._feature_state_version = 1
+    predictor.observe(batch.to_dict('records'), 2)
+    expected = FeatureState.from_index(OEETimeIndex(pd.concat([history, batch], ignore_index=True)))
+    return predictor._feature_state, expected
+
+
+def _new_rows(history, hours):
+    last = history[history['line_id'] == 'L1'].iloc[-1]
+    rows = pd.DataFrame([last] * len(hours)).reset_index(drop=True)
+    rows['timestamp'] = [last['timestamp'] + pd.Timedelta(hours=h) for h in hours]
+    rows['oee'] = [30.0 + h for h in hours]
+    return rows
+
+
+@pytest.mark.parametrize('hours', [[1, 2, 3], [3, 2, 1]], ids=['in_order', 'reversed'])
+def test_observe_matches_rebuilt_state(hours):
+    history = make_oee_frame(hours=48)
+    state, expected = _observed(history, _new_rows(history, hours))
+
+    assert state is not None
+    for line_id in ['L1', 'L2', 'L3']:
+        assert state.features(line_id) == pytest.approx(expected.features(line_id))
+    assert state.features('L1')['hour'] == expected.features('L1')['hour']
+
+
+def test_observe_drops_state_on_backfill():
+    history = make_oee_frame(hours=48)
+    state, _ = _observed(history, _new_rows(history, [-4.5, 1]))
+    assert state is None
+
+
+class _Snapshot:
+    def __init__(self, frame, version):
+        self.loader = SimpleNamespace(oee_index=OEETimeIndex(frame))
+        self.version = version
+
+    def get_snapshot(self):
+        return self.loader, self.version
+
+
+def _serving_predictor(monkeypatch, frame, version=1):
+    monkeypatch.setattr(data_store, 'get_data_store', lambda: _Snapshot(frame, version))
+    predictor = OEEPredictor()
+    predictor.trained = True
+    predictor.model = object()
+    return predictor
+
+
+def test_predict_latest_reads_features_under_lock(monkeypatch):
+    predictor = _serving_predictor(monkeypatch, make_oee_frame(hours=48))
+    locked = []
+    features = FeatureState.features
+    monkeypatch.setattr(FeatureState, 'features',
+                        lambda self, *args: locked.append(predictor._feature_lock.locked()) or features(self, *args))
+
+    def predict(frame):
+        # Inférence hors verrou : observe() n'attend pas le modèle
+        assert not predictor._feature_lock.locked()
+        return [50.0] * len(frame)
+
+    monkeypatch.setattr(predictor, '_predict_features', predict)
+    assert predictor.predict_latest() == {'L1': 50.0, 'L2': 50.0, 'L3': 50.0}
+    assert locked == [True, True, True]
+
+
+def test_feature_state_follows_snapshot_version(monkeypatch):
+    history = make_oee_frame(hours=48)
+    predictor = _serving_predictor(monkeypatch, history)
+    state = predictor.feature_state()
+    assert predictor._feature_state_version == 1
+
+    # État avancé par observe() au-delà de la version lue : conservé
+    predictor.observe(_new_rows(history, [1]).to_dict('records'), 2)
+    assert predictor.feature_state() is state
+
+    # Données plus récentes que l'état : reconstruit depuis le loader de cette version
+    monkeypatch.setattr(data_store, 'get_data_store', lambda: _Snapshot(history, 3))
+    assert predictor.feature_state() is not state
+    assert predictor._feature_state_version == 3
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+from data import data_store
+from models.predictor import OEEPredictor
+
+
+class FakeStore:
+    def __init__(self, lines=('L1', 'L2', 'L3')):
+        self.loader = SimpleNamespace(oee_index=SimpleNamespace(lines=list(lines)))
+        self.version = 1
+
+    def get_snapshot(self):
+        return self.loader, self.version
+
+
+@pytest.fixture
+def predictor(monkeypatch):
+    """Prédicteur « entraîné » dont les prévisions calculées sont comptées par ligne"""
+    store = FakeStore()
+    monkeypatch.setattr(data_store, 'get_data_store', lambda: store)
+
+    predictor = OEEPredictor()
+    predictor.trained = True
+    predictor.model_version = 'v1'
+    predictor.store = store
+    predictor.computed = []
+
+    def forecast(loader, lines, days):
+        predictor.computed.extend((line, days) for line in lines)
+        return {line: [{'date': f'{line}-{i}', 'oee_predicted': 70.0 + i} for i in range(days)]
+                for line in lines}
+
+    monkeypatch.setattr(predictor, '_forecast', forecast)
+    return predictor
+
+
+def test_shorter_horizon_is_sliced_from_cached_forecast(predictor):
+    week = predictor.predict_next_days(days=7, lines=['L1'])
+    assert predictor.computed == [('L1', 7)]
+
+    three = predictor.predict_next_days(days=3, lines=['L1'])
+    assert three == {'L1': week['L1'][:3]}
+    assert predictor.computed == [('L1', 7)]
+
+    # Horizon plus long que le cache : recalcul, puis le plus long est conservé
+    predictor.predict_next_days(days=10, lines=['L1'])
+    predictor.predict_next_days(days=8, lines=['L1'])
+    assert predictor.computed == [('L1', 7), ('L1', 10)]
+
+
+def test_cached_forecasts_are_copies(predictor):
+    predictor.predict_next_days(days=2, lines=['L1'])['L1'][0]['oee_predicted'] = -1
+    assert predictor.predict_next_days(days=2, lines=['L1'])['L1'][0]['oee_predicted'] == 70.0
+
+
+def test_least_recently_used_entry_is_evicted(predictor):
+    predictor.forecast_cache_size = 2
+    predictor.predict_next_days(days=1, lines=['L1'])
+    predictor.predict_next_days(days=1, lines=['L2'])
+    predictor.predict_next_days(days=1, lines=['L1'])  # L1 devient la plus récente
+    predictor.predict_next_days(days=1, lines=['L3'])  # évince L2
+
+    assert len(predictor._forecast_cache) == 2
+    predictor.computed.clear()
+    predictor.predict_next_days(days=1, lines=['L1'])
+    predictor.predict_next_days(days=1, lines=['L3'])
+    assert predictor.computed == []
+    predictor.predict_next_days(days=1, lines=['L2'])
+    assert predictor.computed == [('L2', 1)]
+
+
+def test_model_version_change_invalidates(predictor):
+    predictor.predict_next_days(days=3)
+    predictor.model_version = 'v2'
+    predictor.predict_next_days(days=3)
+
+    assert predictor.computed == [(line, 3) for line in ['L1', 'L2', 'L3']] * 2
+
+
+def test_data_version_change_invalidates(predictor):
+    predictor.predict_next_days(days=3, lines=['L1'])
+    predictor.store.version += 1
+    predictor.predict_next_days(days=3, lines=['L1'])
+
+    assert predictor.computed == [('L1', 3), ('L1', 3)]
@@ -0,0 +1,23 @@
+import pytest
+
+from data.data_store import DataStore
+from data.generator import SyntheticDataGenerator
+
+
+@pytest.mark.parametrize('params', [
+    {'freq_minutes': 0}, {'freq_minutes': 7}, {'freq_minutes': 1440}, {'n_lines': 0},
+    {'machines_per_line': 0}, {'years': 0}, {'years': 0.0001}, {'chunk_days': 0}
+], ids=lambda params: '-'.join(f'{key}={value}' for key, value in params.items()))
+def test_invalid_parameters_are_rejected_up_front(tmp_path, params):
+    with pytest.raises(ValueError):
+        SyntheticDataGenerator(str(tmp_path / 'generated'), **params)
+    assert not (tmp_path / 'generated').exists()
+
+
+def test_metrics_cover_every_generated_line(tmp_path):
+    data_path = str(tmp_path / 'generated')
+    SyntheticDataGenerator(data_path, seed=0, n_lines=5, years=0.1).generate()
+    store = DataStore(data_path=data_path, cache_path=str(tmp_path / 'cache'))
+    assert store.reload()
+
+    assert sorted(store.loader.get_current_metrics()) == ['L1', 'L2', 'L3', 'L4', 'L5']
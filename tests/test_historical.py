@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_oee_frame
+from data.historical import HistoricalQuery, lttb
+from data.oee_index import OEETimeIndex
+
+
+def _index():
+    # Lignes dans le désordre à horodatage égal, pour vérifier le tri (horodatage, ligne)
+    frame = make_oee_frame(hours=24 * 5, lines=('L3', 'L1', 'L2'))
+    return OEETimeIndex(frame.sample(frac=1, random_state=0).sort_values('timestamp', kind='stable'))
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 7, 100, 10000])
+@pytest.mark.parametrize('line_id', ['all', 'L2'])
+def test_page_walk_returns_every_record_once_in_order(limit, line_id):
+    index = _index()
+    expected = index.window(line_id, days=3).sort_values(['timestamp', 'line_id'], kind='stable')
+
+    rows, cursor, pages = [], None, 0
+    while True:
+        page = HistoricalQuery(line_id=line_id, days=3, limit=limit, cursor=cursor, orient='columns').run(index)
+        data = page['data']
+        assert 0 < len(data['oee']) <= limit
+        rows.extend(zip(data['timestamp'], data['line_id'], data['oee'].tolist()))
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert rows == list(zip(np.datetime_as_string(expected['timestamp'].to_numpy()).tolist(),
+                            expected['line_id'].tolist(), expected['oee'].tolist()))
+    assert pages == -(-len(expected) // limit)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        HistoricalQuery(cursor='pas-un-curseur')
+
+
+def _reference_lttb(x, y, threshold):
+    """LTTB d'origine (S. Steinarsson), un point par intervalle, en Python pur"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for i in range(threshold - 2):
+        avg_start, avg_end = int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+@pytest.mark.parametrize('n, threshold', [(10, 3), (100, 10), (1000, 37), (5000, 500), (50, 50), (7, 3)])
+def test_lttb_matches_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(1, 3, n))
+    y = np.sin(x / 10) * 20 + rng.normal(0, 2, n)
+
+    assert lttb(x, y, threshold).tolist() == _reference_lttb(x.tolist(), y.tolist(), threshold)
+
+
+def test_series_is_downsampled_per_line():
+    index = _index()
+    result = HistoricalQuery(line_id='all', days=5, bucket='hourly', max_points=20, orient='columns').run(index)
+
+    assert result['downsampled']
+    assert pd.Series(result['data']['line_id']).value_counts().to_dict() == {'L1': 20, 'L2': 20, 'L3': 20}
@@ -0,0 +1,57 @@
+import pandas as pd
+
+from data.data_store import DataStore
+from data.ingestion import DataIngestor
+
+
+def _ingestor(data_dir):
+    store = DataStore(check_interval=0, data_path=data_dir[0], cache_path=data_dir[1])
+    assert store.reload()
+    return DataIngestor(store), store
+
+
+def _record(loader, hours, **fields):
+    last = loader.oee_index.tail('L1', 1).iloc[0].to_dict()
+    last['timestamp'] = (last['timestamp'] + pd.Timedelta(hours=hours)).isoformat()
+    last.update(fields)
+    return last
+
+
+def test_invalid_values_are_rejected(data_dir):
+    ingestor, store = _ingestor(data_dir)
+    loader = store.loader
+    records = [
+        _record(loader, 1),
+        _record(loader, 2, good_pieces=3.7),
+        _record(loader, 3, timestamp='2030-01-01T10:00:00+02:00'),
+        _record(loader, 4, oee='abc'),
+        _record(loader, 5, machine_speed=True),
+        _record(loader, 6, total_pieces=[1]),
+    ]
+    summary, inserted = ingestor.ingest({'oee_data': records})
+
+    assert summary['oee_data'] == {'received': 6, 'inserted': 1, 'duplicates': 0, 'rejected': 5}
+    assert len(inserted) == 1
+    assert store.loader.oee_data['good_pieces'].dtype == loader.oee_data['good_pieces'].dtype
+
+
+def test_timezone_aware_batch_is_rejected_not_raised(data_dir):
+    ingestor, _ = _ingestor(data_dir)
+    records = [{'timestamp': '2030-01-01T10:00:00Z', 'line_id': 'L1', 'oee': 70}]
+    summary, inserted = ingestor.ingest({'oee_data': records, 'quality_data': []})
+    assert summary['oee_data']['rejected'] == 1
+    assert inserted == []
+
+
+def test_invalid_optional_value_is_rejected(data_dir):
+    ingestor, _ = _ingestor(data_dir)
+    stop = {'stop_id': 10, 'line_id': 'L1', 'machine_id': 'M1-1', 'stop_type': 'Panne',
+            'start_time': '2025-01-03 10:00:00', 'operator': 'OP1'}
+    summary, _ = ingestor.ingest({'stops_data': [
+        dict(stop),
+        dict(stop, stop_id=11, end_time='2025-01-03T10:30:00+01:00'),
+        dict(stop, stop_id=12, duration_minutes=12.5),
+        dict(stop, stop_id=13, resolved='yes'),
+    ]})
+    assert summary['stops_data']['inserted'] == 1
+    assert summary['stops_data']['rejected'] == 3
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from data.generator import ANOMALY_TEMPLATES
+from models.knowledge_index import KnowledgeIndex
+
+
+def test_unique_rows_groups_identical_count_vectors():
+    matrix = sp.csr_matrix(np.array([
+        [1, 0, 2],
+        [0, 0, 0],
+        [1, 0, 2],
+        [0, 3, 0],
+        [0, 0, 0],
+        [2, 0, 1],
+    ], dtype=np.float64))
+
+    representatives, slots = KnowledgeIndex._unique_rows(matrix)
+
+    assert representatives.tolist() == [0, 1, 3, 5]
+    assert slots.tolist() == [0, 1, 0, 2, 1, 3]
+
+
+def test_texts_with_same_vocabulary_vector_share_scores():
+    index = KnowledgeIndex(max_features=2)
+    index.load({1: 'fuite vérin', 2: 'fuite vérin zzz', 3: 'bourrage papier papier'})
+
+    ids, scores = index.top_k('fuite vérin', k=3)
+
+    assert sorted(ids[:2].tolist()) == [1, 2]
+    assert scores[0] == scores[1]
+
+
+def _corpus(n=300, seed=0):
+    """Textes d'anomalies (modèles du générateur, doublons, variantes) et champs filtrables"""
+    rng = np.random.default_rng(seed)
+    docs, fields = {}, {}
+    for doc_id in range(1, n + 1):
+        template = ANOMALY_TEMPLATES[rng.integers(len(ANOMALY_TEMPLATES))]
+        line = int(rng.integers(1, 4))
+        machine = f'M{line}-{int(rng.integers(1, 4))}'
+        extra = f' série {int(rng.integers(50))}' if rng.random() < 0.3 else ''
+        docs[doc_id] = f"{template['symptom']} {template['root_cause']} {machine}{extra}"
+        fields[doc_id] = {'line_id': f'L{line}', 'machine_id': machine}
+    return docs, fields
+
+
+def _brute_force(docs, fields, query, k, min_score=0.0, **filters):
+    """Référence : TfidfVectorizer réentraîné sur tout le corpus, similarité de tous les documents"""
+    ids = np.array(sorted(docs))
+    vectorizer = TfidfVectorizer(max_features=100)
+    matrix = vectorizer.fit_transform([docs[doc_id] for doc_id in ids])
+    scores = cosine_similarity(vectorizer.transform([query]), matrix)[0]
+    keep = np.array([scores[i] > min_score and all(fields[doc_id][field] == value
+                                                   for field, value in filters.items() if value is not None)
+                     for i, doc_id in enumerate(ids)], dtype=bool)
+    # Similarité décroissante, puis identifiant le plus récent d'abord
+    order = np.lexsort((-ids[keep], -scores[keep]))[:k]
+    return ids[keep][order], scores[keep][order]
+
+
+QUERIES = ['vibrations roulements', 'bourrage alimentation M1-2', 'encre impression viscosité',
+           'capteur position série 7', 'aucun terme connu']
+
+
+@pytest.mark.parametrize('filters', [{}, {'line_id': 'L2'}, {'line_id': 'L1', 'machine_id': 'M1-3'}],
+                         ids=['all', 'line', 'machine'])
+def test_top_k_matches_brute_force(filters):
+    docs, fields = _corpus()
+    index = KnowledgeIndex(max_features=100)
+    index.load(docs, fields)
+
+    for query in QUERIES:
+        for k in (1, 5, 50):
+            ids, scores = index.top_k(query, k=k, min_score=0.1, **filters)
+            expected_ids, expected_scores = _brute_force(docs, fields, query, k, min_score=0.1, **filters)
+            assert ids.tolist() == expected_ids.tolist()
+            assert scores == pytest.approx(expected_scores, abs=1e-12)
+
+
+def test_incremental_updates_match_brute_force():
+    docs, fields = _corpus()
+    index = KnowledgeIndex(max_features=100)
+    index.load(docs, fields)
+    rng = np.random.default_rng(1)
+    extra_docs, extra_fields = _corpus(n=60, seed=2)
+    for i, doc_id in enumerate(rng.choice(list(docs), size=60, replace=False).tolist()):
+        if i % 3 == 0:
+            index.remove(doc_id)
+            del docs[doc_id], fields[doc_id]
+        else:
+            docs[doc_id], fields[doc_id] = extra_docs[i + 1], extra_fields[i + 1]
+            index.upsert(doc_id, docs[doc_id], fields[doc_id])
+        index.top_k(QUERIES[i % len(QUERIES)])  # recalcul intermédiaire
+
+    for query in QUERIES:
+        ids, scores = index.top_k(query, k=10)
+        expected_ids, expected_scores = _brute_force(docs, fields, query, 10)
+        assert ids.tolist() == expected_ids.tolist()
+        assert scores == pytest.approx(expected_scores, abs=1e-12)
+
+
+def test_search_matches_individual_top_k():
+    docs, fields = _corpus()
+    index = KnowledgeIndex(max_features=100)
+    index.load(docs, fields)
+    filters = [{'line_id': 'L1'}, {}, {'machine_id': 'M2-1'}, {}, {}]
+
+    results = index.search(QUERIES, k=5, min_score=0.1, filters=filters)
+
+    for query, query_filters, (ids, scores) in zip(QUERIES, filters, results):
+        expected_ids, expected_scores = index.top_k(query, k=5, min_score=0.1, **query_filters)
+        assert ids.tolist() == expected_ids.tolist()
+        assert scores.tolist() == expected_scores.tolist()
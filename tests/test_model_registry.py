@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from models.model_registry import ModelRegistry
+
+
+def _entries(registry):
+    return sorted(os.listdir(registry.root))
+
+
+def test_register_takes_next_free_version(tmp_path):
+    registry = ModelRegistry('oee', root=str(tmp_path))
+
+    assert registry.register({'model': [1, 2]}, {'score': 1.0}) == 'v0001'
+    assert registry.register({'model': [3]}, {'score': 2.0}) == 'v0002'
+    artifacts, metadata = registry.load('v0002')
+    assert artifacts['model'] == [3] and metadata['score'] == 2.0
+
+
+def test_register_retries_a_bounded_number_of_taken_versions(tmp_path, monkeypatch):
+    registry = ModelRegistry('oee', root=str(tmp_path))
+    registry.register({'model': 1}, {})
+    # Version toujours prise par un autre processus
+    monkeypatch.setattr(registry, '_next_version', lambda: 'v0001')
+
+    with pytest.raises(RuntimeError):
+        registry.register({'model': 2}, {})
+    assert _entries(registry) == ['v0001']
+
+
+def test_register_reraises_other_errors_and_removes_tmp_dir(tmp_path, monkeypatch):
+    registry = ModelRegistry('oee', root=str(tmp_path))
+    attempts = []
+
+    def rename(src, dst):
+        attempts.append(dst)
+        raise PermissionError(13, 'Permission denied')
+
+    monkeypatch.setattr(os, 'rename', rename)
+    with pytest.raises(PermissionError):
+        registry.register({'model': 1}, {})
+    assert len(attempts) == 1
+    assert _entries(registry) == []
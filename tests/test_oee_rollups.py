@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_oee_frame
+from data.oee_index import OEETimeIndex
+from data.oee_rollups import OEERollups
+
+WINDOWS = [{'hours': 1}, {'hours': 5}, {'hours': 24}, {'days': 3}, {'days': 7}, {'days': 30}]
+
+
+def _rollups(frame):
+    return OEERollups(OEETimeIndex(frame))
+
+
+def _appended(rollups, rows):
+    return rollups.appended(rows, rollups.index.appended(rows))
+
+
+def _assert_windows_match(rollups, frame):
+    """window_stats doit être identique au calcul pandas sur les enregistrements de la fenêtre"""
+    index = OEETimeIndex(frame)
+    for line_id in ['all', 'L1', 'L2', 'L3']:
+        for window in WINDOWS:
+            expected = index.window(line_id, **window)[OEERollups.METRICS]
+            stats = rollups.window_stats(line_id, **window)
+            assert stats['count'] == len(expected)
+            for column in OEERollups.METRICS:
+                assert stats['mean'][column] == pytest.approx(expected[column].mean(), rel=1e-9)
+                assert stats['std'][column] == pytest.approx(expected[column].std(), rel=1e-6, abs=1e-6, nan_ok=True)
+
+
+def _new_rows(frame, hours):
+    last = frame['timestamp'].max()
+    rows = make_oee_frame(hours=len(hours), seed=len(hours))
+    rows['timestamp'] = np.repeat([last + pd.Timedelta(hours=h) for h in hours], 3)
+    return rows
+
+
+def test_window_stats_match_pandas():
+    frame = make_oee_frame(hours=24 * 20)
+    _assert_windows_match(_rollups(frame), frame)
+
+
+@pytest.mark.parametrize('hours', [[1, 2, 30], [-30, 1, -200]], ids=['in_order', 'backfill'])
+def test_appended_window_stats_match_pandas(hours):
+    frame = make_oee_frame(hours=24 * 20)
+    rollups = _rollups(frame)
+    rows = _new_rows(frame, hours)
+
+    _assert_windows_match(_appended(rollups, rows), pd.concat([frame, rows], ignore_index=True))
+    # La version précédente reste valide
+    _assert_windows_match(rollups, frame)
+
+
+def test_latest_follows_appends():
+    frame = make_oee_frame(hours=48)
+    rollups = _appended(_rollups(frame), _new_rows(frame, [2, -5]))
+
+    for line_id, partition in rollups.index.partitions.items():
+        expected = partition[OEERollups.METRICS].iloc[-1]
+        assert rollups.latest(line_id) == pytest.approx(expected.to_dict())
+    assert rollups.latest('L9') is None
+
+
+@pytest.mark.parametrize('grain', OEERollups.GRAINS)
+def test_rollup_matches_groupby(grain):
+    frame = make_oee_frame(hours=24 * 40)
+    rollups = _appended(_rollups(frame.iloc[:-300]), frame.iloc[-300:])
+    result = rollups.rollup(grain, by=('shift',)).set_index(['line_id', 'shift', 'period'])
+
+    days = frame['timestamp'].dt.floor('D')
+    period = {
+        'day': days,
+        'week': days - pd.to_timedelta(days.dt.dayofweek, unit='D'),
+        'month': days.dt.to_period('M').dt.start_time
+    }[grain]
+    keys = [frame['line_id'], (frame['timestamp'].dt.hour // OEERollups.SHIFT_HOURS).rename('shift'),
+            period.astype('datetime64[ns]').rename('period')]
+    expected = frame.groupby(keys)['oee'].agg(['size', 'mean', 'std'])
+
+    assert len(result) == len(expected)
+    for key, row in expected.iterrows():
+        cell = result.loc[(key[0], key[1], pd.Timestamp(key[2]))]
+        assert cell['count'] == row['size']
+        assert cell['mean_oee'] == pytest.approx(row['mean'])
+        assert cell['std_oee'] == pytest.approx(row['std'], nan_ok=True)
+
+
+def test_rollup_rejects_unknown_grain():
+    with pytest.raises(ValueError):
+        _rollups(make_oee_frame(hours=24)).rollup('year')
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_oee_frame
+from models.predictor import OEEPredictor
+
+
+def _reference_features(df):
+    """Implémentation d'origine (copie, groupby().transform par ligne), référence des valeurs"""
+    features = df.copy()
+    if 'timestamp' in features.columns:
+        features['hour'] = pd.to_datetime(features['timestamp']).dt.hour
+        features['day_of_week'] = pd.to_datetime(features['timestamp']).dt.dayofweek
+        features['month'] = pd.to_datetime(features['timestamp']).dt.month
+        features['day_of_year'] = pd.to_datetime(features['timestamp']).dt.dayofyear
+        features['week_of_year'] = pd.to_datetime(features['timestamp']).dt.isocalendar().week
+    features['line_L1'] = (features['line_id'] == 'L1').astype(int)
+    features['line_L2'] = (features['line_id'] == 'L2').astype(int)
+    features['line_L3'] = (features['line_id'] == 'L3').astype(int)
+    if 'oee' in features.columns:
+        features['oee_ma_7'] = features.groupby('line_id')['oee'].transform(
+            lambda x: x.rolling(window=7, min_periods=1).mean())
+        features['oee_ma_24'] = features.groupby('line_id')['oee'].transform(
+            lambda x: x.rolling(window=24, min_periods=1).mean())
+        features['oee_std_7'] = features.groupby('line_id')['oee'].transform(
+            lambda x: x.rolling(window=7, min_periods=1).std()).fillna(0)
+    if 'availability' in features.columns:
+        features['avail_perf_ratio'] = features['availability'] / (features['performance'] + 0.01)
+        features['perf_quality_ratio'] = features['performance'] / (features['quality'] + 0.01)
+    numeric_features = ['hour', 'day_of_week', 'month', 'day_of_year', 'week_of_year',
+                        'line_L1', 'line_L2', 'line_L3']
+    if 'availability' in features.columns:
+        numeric_features.extend(['availability', 'performance', 'quality', 'oee_ma_7', 'oee_ma_24',
+                                 'oee_std_7', 'avail_perf_ratio', 'perf_quality_ratio'])
+    if 'stop_count' in features.columns:
+        numeric_features.extend(['stop_count', 'stop_duration'])
+        features['stop_count'] = features['stop_count'].fillna(0)
+        features['stop_duration'] = features['stop_duration'].fillna(0)
+    return features[[column for column in numeric_features if column in features.columns]]
+
+
+def _frames():
+    frame = make_oee_frame(hours=24 * 30, lines=('L1', 'L2', 'L3', 'L4'))
+    rng = np.random.default_rng(3)
+    with_stops = frame.assign(stop_count=np.where(rng.random(len(frame)) < 0.2, np.nan, 2.0),
+                              stop_duration=np.where(rng.random(len(frame)) < 0.2, np.nan, 15.0))
+    shuffled = frame.sample(frac=1, random_state=0)
+    return {
+        'training': frame,
+        'with_stops': with_stops,
+        'shuffled': shuffled,
+        'inference': frame.tail(39).drop(columns=['availability', 'performance', 'quality']),
+        'single_row': frame.tail(1)
+    }
+
+
+@pytest.mark.parametrize('name', list(_frames()))
+def test_prepare_features_is_bit_identical_to_reference(name):
+    frame = _frames()[name]
+    features = OEEPredictor().prepare_features(frame)
+    expected = _reference_features(frame)
+
+    assert list(features.columns) == list(expected.columns)
+    assert features.index.equals(expected.index)
+    for column in expected.columns:
+        # Valeurs identiques au bit près ; seuls les types entiers peuvent différer
+        values = features[column].to_numpy(dtype=np.float64)
+        assert np.array_equal(values.view(np.int64), expected[column].to_numpy(dtype=np.float64).view(np.int64))
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_oee_frame
+from data import data_store
+from data.data_store import DataStore
+from data.oee_index import OEETimeIndex, line_sort_key
+from models.predictor import OEEPredictor
+from models.recommender import LineRecommender
+
+LINES = ('L10', 'L2', 'L1', 'L3', 'L11', 'L4', 'L5', 'L6', 'L7', 'L8', 'L9')
+
+
+@pytest.fixture
+def store(data_dir, monkeypatch):
+    """Données à onze lignes : l'ordre lexicographique placerait L10 avant L2"""
+    make_oee_frame(hours=72, lines=LINES).to_csv(f'{data_dir[0]}/oee_data.csv', index=False)
+    store = DataStore(check_interval=0, data_path=data_dir[0], cache_path=data_dir[1])
+    assert store.reload()
+    monkeypatch.setattr(data_store, 'get_data_store', lambda: store)
+    return store
+
+
+def test_line_sort_key_is_natural():
+    assert sorted(['L10', 'L2', 'L1', 'X', 'L'], key=line_sort_key) == ['L', 'L1', 'L2', 'L10', 'X']
+    assert OEETimeIndex(make_oee_frame(hours=2, lines=LINES)).lines == [f'L{i}' for i in range(1, 12)]
+
+
+def test_scenarios_follow_natural_line_order(store):
+    scenarios = LineRecommender().simulate_scenarios()['scenarios']
+
+    assert [scenario['line_id'] for scenario in scenarios] == [f'L{i}' for i in range(1, 12)]
+    assert [scenario['recommendation_rank'] for scenario in scenarios] == list(range(1, 12))
+
+
+def test_forecast_uses_each_line_history(store, monkeypatch):
+    predictor = OEEPredictor()
+    inputs = []
+    monkeypatch.setattr(predictor, 'predict', lambda frame: inputs.append(frame) or np.full(len(frame), 70.0))
+
+    loader = store.get_loader()
+    forecast = predictor._forecast(loader, ['L2', 'L10'], days=2)
+
+    assert list(forecast) == ['L2', 'L10']
+    frame = inputs[0]
+    for line in ['L2', 'L10']:
+        history = loader.oee_data[loader.oee_data['line_id'] == line]
+        rows = frame[frame['line_id'] == line]
+        # Moyenne des 24 dernières heures de la ligne (et non d'un extrait toutes lignes confondues)
+        assert rows['availability'].iloc[0] == pytest.approx(history['availability'].tail(24).mean())
+        assert rows['timestamp'].min() == history['timestamp'].max() + pd.Timedelta(days=1, hours=8)
@@ -0,0 +1,71 @@
+from flask import Flask
+
+from data import data_store
+from data.data_store import DataStore
+from models.recommender import LineRecommender
+from models.training_jobs import ModelSlot
+from utils.request_context import request_memo, request_memoized
+
+app = Flask(__name__)
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    @request_memoized
+    def compute(self, value, scale=1):
+        self.calls += 1
+        return value * scale
+
+
+def test_request_memoized_runs_once_per_request():
+    counter = Counter()
+
+    with app.test_request_context():
+        assert counter.compute(2) == counter.compute(2) == 2
+        assert counter.compute(2, scale=3) == 6
+        assert counter.calls == 2
+    with app.test_request_context():
+        counter.compute(2)
+        assert counter.calls == 3
+
+    # Hors requête : calcul direct à chaque appel
+    counter.compute(2)
+    counter.compute(2)
+    assert counter.calls == 5
+
+
+def test_model_slot_memo_is_injected():
+    slot = ModelSlot('v1')
+    # Par défaut (sans couche web) : le remplacement est visible immédiatement
+    slot.swap('v2')
+    assert slot.get() == 'v2'
+
+    slot.memo = request_memo
+    with app.test_request_context():
+        assert slot.get() == 'v2'
+        slot.swap('v3')
+        # Une requête garde le modèle lu en premier
+        assert slot.get() == 'v2'
+    with app.test_request_context():
+        assert slot.get() == 'v3'
+
+
+def test_recommender_memo_is_injected(data_dir, monkeypatch):
+    store = DataStore(check_interval=0, data_path=data_dir[0], cache_path=data_dir[1])
+    loads = []
+    get_loader = store.get_loader
+    monkeypatch.setattr(store, 'get_loader', lambda: loads.append(1) or get_loader())
+    monkeypatch.setattr(data_store, 'get_data_store', lambda: store)
+
+    recommender = LineRecommender()
+    recommender.get_best_line()
+    recommender.get_best_line()
+    assert len(loads) == 2
+
+    recommender.memo = request_memo
+    with app.test_request_context():
+        first = recommender.get_best_line()
+        assert recommender.get_best_line() is first
+    assert len(loads) == 3
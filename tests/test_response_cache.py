@@ -0,0 +1,64 @@
+import pytest
+from flask import Flask
+
+from utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def client():
+    """Application minimale : une route servie par le cache, version et compteur modifiables"""
+    app = Flask(__name__)
+    cache = ResponseCache()
+    state = {'version': 1, 'calls': 0}
+
+    def payload():
+        state['calls'] += 1
+        return {'version': state['version'], 'calls': state['calls']}
+
+    @app.route('/cached')
+    def cached():
+        return cache.respond('cached', state['version'], payload)
+
+    client = app.test_client()
+    client.cache, client.state = cache, state
+    return client
+
+
+def test_response_carries_etag_and_is_computed_once(client):
+    first = client.get('/cached')
+    second = client.get('/cached')
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] and first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+    assert second.get_json() == first.get_json() == {'version': 1, 'calls': 1}
+    assert client.state['calls'] == 1
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get('/cached').headers['ETag']
+
+    response = client.get('/cached', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    # ETag inconnu : réponse complète
+    assert client.get('/cached', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_version_change_invalidates(client):
+    etag = client.get('/cached').headers['ETag']
+    client.state['version'] = 2
+
+    response = client.get('/cached', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json() == {'version': 2, 'calls': 2}
+
+
+def test_invalidate_forces_recompute(client):
+    client.get('/cached')
+    client.cache.invalidate('cached')
+    client.get('/cached')
+    assert client.state['calls'] == 2
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+import utils.serialization as serialization
+from utils.serialization import NumpyJSONProvider, frame_payload
+
+ENCODERS = ['json', pytest.param('orjson', marks=pytest.mark.skipif(
+    serialization.orjson is None, reason='orjson non installé'))]
+
+
+def _reject_constant(name):
+    raise ValueError(f"Constante JSON invalide: {name}")
+
+
+@pytest.fixture(params=ENCODERS)
+def provider(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return NumpyJSONProvider(Flask(__name__))
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'count': np.array([1, 2, 3], dtype=np.int64),
+        'value': [1.5, np.nan, 3.0],
+        'label': ['a', None, 'c'],
+        'mixed': pd.Series([np.nan, 'x', 2], dtype=object),
+        'date': pd.to_datetime(['2025-01-01 10:00:00', None, '2025-01-03 12:30:00'])
+    })
+
+
+@pytest.mark.parametrize('orient', ['records', 'columns'])
+def test_missing_values_are_encoded_as_null(provider, frame, orient):
+    text = provider.dumps({'data': frame_payload(frame, orient)})
+    data = json.loads(text, parse_constant=_reject_constant)['data']
+
+    if orient == 'records':
+        assert [row['value'] for row in data] == [1.5, None, 3.0]
+        assert [row['label'] for row in data] == ['a', None, 'c']
+        assert [row['mixed'] for row in data] == [None, 'x', 2]
+        assert data[0]['date'] == 'Wed, 01 Jan 2025 10:00:00 GMT' and data[1]['date'] is None
+        assert [row['count'] for row in data] == [1, 2, 3]
+    else:
+        assert data['value'] == [1.5, None, 3.0]
+        assert data['label'] == ['a', None, 'c']
+        assert data['date'][1] is None
+        assert data['count'] == [1, 2, 3]
+
+
+def test_numpy_nan_is_null(provider):
+    text = provider.dumps({'value': np.float32('nan'), 'values': np.array([np.nan, 1.0])})
+    assert json.loads(text, parse_constant=_reject_constant) == {'value': None, 'values': [None, 1.0]}
+
+
+def test_empty_frame_keeps_columns():
+    empty = pd.DataFrame(columns=['id', 'date'])
+    assert frame_payload(empty, 'records') == []
+    assert frame_payload(empty, 'columns') == {'id': [], 'date': []}
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from conftest import make_oee_frame
+from models.speed_optimizer import SpeedOptimizer
+
+
+@pytest.fixture(scope='module')
+def optimizer():
+    optimizer = SpeedOptimizer()
+    optimizer.train(make_oee_frame(hours=200, seed=3))
+    return optimizer
+
+
+def _batch(optimizer, line_id, product_type, speeds):
+    return optimizer.predict_batch([line_id] * len(speeds), [product_type] * len(speeds), speeds)
+
+
+@pytest.mark.parametrize('line_id', ['L1', 'L2', 'L3'])
+def test_optimal_speed_curve_matches_predict_batch(optimizer, line_id):
+    result = optimizer.find_optimal_speed(line_id, 'Fond_Plat')
+    speeds = [point['speed'] for point in result['curve_data']]
+    production, quality = _batch(optimizer, line_id, 'Fond_Plat', speeds)
+
+    assert speeds == optimizer._speed_grid(line_id).tolist()
+    for point, prod, qual in zip(result['curve_data'], production, quality):
+        assert point['production_rate'] == pytest.approx(prod, abs=0.05)
+        assert point['quality_rate'] == pytest.approx(qual, abs=0.005)
+
+    best = max(result['curve_data'], key=lambda point: point['net_output'])
+    assert result['optimal_speed'] == best['speed']
+
+
+def test_compare_evaluates_lines_like_single_calls(optimizer):
+    compared = optimizer.get_speed_recommendations_all_lines('Fond_Carre_Sans_Poignees')
+
+    for line_id, result in compared['recommendations'].items():
+        assert result == optimizer.find_optimal_speed(line_id, 'Fond_Carre_Sans_Poignees')
+
+
+def test_table_matches_predict_batch(optimizer):
+    for (line_id, product_type), curve in optimizer.speed_table.items():
+        production, quality = _batch(optimizer, line_id, product_type, curve['speeds'])
+        np.testing.assert_allclose(curve['production'], production, rtol=1e-9)
+        np.testing.assert_allclose(curve['quality'], quality, rtol=1e-9)
+
+
+def test_lookup_interpolates_between_grid_points(optimizer):
+    speeds = np.array([700.0, 700.5, 1012.25, 1299.75, 1300.0])
+    production, quality = optimizer._predict_points(['L1'] * 5, ['Fond_Plat'] * 5, speeds)
+    below, below_quality = _batch(optimizer, 'L1', 'Fond_Plat', np.floor(speeds))
+    above, above_quality = _batch(optimizer, 'L1', 'Fond_Plat', np.ceil(speeds))
+
+    # Valeurs encadrées par les prédictions des deux points de grille voisins
+    assert np.all(production >= np.minimum(below, above) - 1e-9)
+    assert np.all(production <= np.maximum(below, above) + 1e-9)
+    assert np.all(quality >= np.minimum(below_quality, above_quality) - 1e-9)
+    assert np.all(quality <= np.maximum(below_quality, above_quality) + 1e-9)
+    assert production[0] == pytest.approx(below[0])
+    assert production[-1] == pytest.approx(below[-1])
+
+
+def test_out_of_grid_points_fall_back_to_models(optimizer, monkeypatch):
+    line_ids = ['L1', 'L1', 'L2', 'L3']
+    products = ['Fond_Plat', 'Fond_Plat', 'Inconnu', 'Fond_Plat']
+    speeds = [650.0, 1000.0, 1000.0, 1250.0]  # sous la plage, grille, produit absent, au-dessus
+    expected = optimizer.predict_batch(line_ids, products, speeds)
+
+    calls = []
+    predict_batch = optimizer.predict_batch
+    monkeypatch.setattr(optimizer, 'predict_batch',
+                        lambda *args: calls.append(list(args[2])) or predict_batch(*args))
+    production, quality = optimizer._predict_points(line_ids, products, speeds)
+
+    # Seuls les points hors table sont prédits par les modèles, en un seul appel
+    assert calls == [[650.0, 1000.0, 1250.0]]
+    np.testing.assert_allclose(production, expected[0], rtol=1e-9)
+    np.testing.assert_allclose(quality, expected[1], rtol=1e-9)
+
+
+def test_fingerprint_mismatch_rejects_saved_model(optimizer, tmp_path):
+    path = str(tmp_path / 'speed_optimizer.pkl')
+    optimizer.save_model(path)
+
+    stale = SpeedOptimizer()
+    assert not stale.load_model(path, expected_fingerprint='autre')
+    assert not stale.is_trained and stale.speed_table == {}
+
+    loaded = SpeedOptimizer()
+    assert loaded.load_model(path, expected_fingerprint=optimizer.data_fingerprint)
+    assert loaded.data_fingerprint == optimizer.data_fingerprint
+    # Table reconstruite au chargement, identique à celle de l'entraînement
+    assert loaded.speed_table.keys() == optimizer.speed_table.keys()
+    for key, curve in optimizer.speed_table.items():
+        np.testing.assert_array_equal(loaded.speed_table[key]['production'], curve['production'])
+
+
+def test_fingerprint_follows_training_columns():
+    optimizer = SpeedOptimizer()
+    frame = make_oee_frame(hours=48, seed=3)
+    fingerprint = optimizer.training_fingerprint(frame)
+
+    changed = frame.copy()
+    changed.loc[5, 'machine_speed'] += 1
+    assert optimizer.training_fingerprint(changed) != fingerprint
+
+    # Colonnes hors entraînement : même empreinte, pas de réentraînement
+    unrelated = frame.copy()
+    unrelated['oee'] = 0.0
+    assert optimizer.training_fingerprint(unrelated) == fingerprint
+    assert optimizer.training_fingerprint(frame.copy()) == fingerprint
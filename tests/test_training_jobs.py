@@ -0,0 +1,54 @@
+from models.training_jobs import ModelSlot, TrainingJobManager
+
+
+def _held_manager():
+    manager = TrainingJobManager()
+    manager.register('model', lambda: ('new', {}), ModelSlot('old'))
+    manager.hold()
+    return manager, manager.submit('model')['job_id']
+
+
+def _wait(manager, job_id):
+    manager._get_executor().shutdown(wait=True)
+    return manager.get(job_id)
+
+
+def test_lock_holder_runs_held_jobs_and_others_delegate(tmp_path):
+    lock_path = str(tmp_path / '.training.lock')
+    leader, leader_job = _held_manager()
+    follower, follower_job = _held_manager()
+
+    leader.release_after_fork(lock_path)
+    follower.release_after_fork(lock_path)
+
+    assert _wait(leader, leader_job)['status'] == 'succeeded'
+    delegated = follower.get(follower_job)
+    assert delegated['status'] == 'delegated'
+    assert delegated['error'] is None
+
+
+def test_lock_is_taken_over_when_leader_exits(tmp_path):
+    lock_path = str(tmp_path / '.training.lock')
+    leader, _ = _held_manager()
+    leader.release_after_fork(lock_path)
+    # Fin du worker élu : son descripteur est fermé
+    leader._leader_lock.close()
+
+    replacement, job_id = _held_manager()
+    replacement.release_after_fork(lock_path)
+
+    assert _wait(replacement, job_id)['status'] == 'succeeded'
+
+
+def test_pending_reports_unfinished_job():
+    manager, job_id = _held_manager()
+    assert manager.pending('model')['job_id'] == job_id
+    assert manager.pending('other') is None
+
+    # Job délégué : entraîné par un autre worker, toujours en cours
+    manager.release(run_pending=False)
+    assert manager.pending('model')['status'] == 'delegated'
+
+    finished = manager.submit('model')['job_id']
+    assert _wait(manager, finished)['status'] == 'succeeded'
+    assert manager.pending('model') is None
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+from models.tree_engine import CompiledTreeEnsemble
+
+
+@pytest.fixture(scope='module')
+def ensemble():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6))
+    # Valeurs répétées : de nombreux seuils tombent entre deux valeurs exactes
+    X[:, 0] = rng.integers(0, 24, 400)
+    y = 60 + 10 * np.sin(X[:, 0] / 4) + 5 * X[:, 1] - 3 * X[:, 2] * X[:, 3] + rng.normal(0, 1, 400)
+    rf = RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+    gb = GradientBoostingRegressor(n_estimators=25, max_depth=4, learning_rate=0.1, random_state=0).fit(X, y)
+    return {'rf': rf, 'gb': gb, 'weights': [0.6, 0.4]}, X
+
+
+def _threshold_rows(model, X):
+    """Lignes dont une variable vaut exactement un seuil de coupure d'un arbre"""
+    rows = []
+    for estimator in list(model['rf'].estimators_) + list(model['gb'].estimators_[:, 0]):
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1)[:5]:
+            row = X[len(rows) % len(X)].copy()
+            # Seuil représentable en float32, comme les entrées comparées par sklearn
+            row[tree.feature[node]] = np.float32(tree.threshold[node])
+            rows.append(row)
+    return np.array(rows)
+
+
+def _reference(model, X):
+    return 0.6 * model['rf'].predict(X) + 0.4 * model['gb'].predict(X)
+
+
+def test_engine_matches_sklearn(ensemble):
+    model, X = ensemble
+    engine = CompiledTreeEnsemble.from_oee_ensemble(model)
+    X_new = np.random.default_rng(1).normal(size=(200, 6))
+
+    for rows in (X, X_new, _threshold_rows(model, X)):
+        assert engine.predict(rows) == pytest.approx(_reference(model, rows), rel=1e-9, abs=1e-9)
+
+
+def test_threshold_rows_follow_the_left_branch(ensemble):
+    model, X = ensemble
+    rows = _threshold_rows(model, X)
+    engine = CompiledTreeEnsemble.from_oee_ensemble(model)
+
+    # x <= seuil part à gauche dans sklearn : le moteur doit suivre le même chemin
+    tree = model['rf'].estimators_[0].tree_
+    leaves = model['rf'].estimators_[0].apply(rows.astype(np.float32))
+    single = CompiledTreeEnsemble.from_trees([tree], [1.0])
+    assert single.predict(rows) == pytest.approx(tree.value[leaves, 0, 0])
+    assert engine.predict(rows) == pytest.approx(_reference(model, rows), rel=1e-9, abs=1e-9)
+
+
+def test_arrays_round_trip(ensemble):
+    model, X = ensemble
+    engine = CompiledTreeEnsemble.from_oee_ensemble(model)
+
+    restored = CompiledTreeEnsemble.from_arrays(engine.to_arrays())
+
+    assert np.array_equal(restored.predict(X), engine.predict(X))
@@ -0,0 +1,11 @@
+"""
+Module d'initialisation pour le package utils
+"""
+
+from .response_cache import ResponseCache
+from .request_context import request_memo, request_memoized
+from .event_stream import EventBroadcaster
+from .serialization import NumpyJSONProvider, frame_payload, parse_format
+
+__all__ = ['ResponseCache', 'request_memo', 'request_memoized', 'EventBroadcaster',
+           'NumpyJSONProvider', 'frame_payload', 'parse_format']
@@ -0,0 +1,110 @@
+"""
+Canal Server-Sent Events (SSE) diffusé à tous les clients connectés
+Un seul thread par processus calcule l'événement quand son contenu change ;
+chaque connexion ne fait que renvoyer les mêmes octets. Une connexion occupe un
+thread du worker pendant toute sa durée : leur nombre est plafonné par processus.
+"""
+
+import os
+import threading
+import time
+
+
+class EventBroadcaster:
+    def __init__(self, event, snapshot, poll_interval=2.0, heartbeat=15.0, max_connection=300.0,
+                 max_clients=16):
+        """
+        Args:
+            event: nom de l'événement SSE (ex: 'dashboard')
+            snapshot: fonction retournant (etag, corps JSON en octets) de l'état courant
+            poll_interval: délai entre deux vérifications de changement (secondes)
+            heartbeat: délai maximal sans message (commentaire keep-alive)
+            max_connection: durée d'une connexion avant reconnexion du client
+            max_clients: connexions simultanées par processus (les autres sont refusées)
+        """
+        self.event = event
+        self.snapshot = snapshot
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.max_connection = max_connection
+        self.clients = 0
+        self._slots = threading.BoundedSemaphore(max_clients)
+        self._etag = None
+        self._body = None
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._publisher_pid = None
+
+    def publish_now(self):
+        """Demande une vérification immédiate (nouvelles données, nouveau modèle)"""
+        self._wake.set()
+
+    def try_connect(self):
+        """Réserve une place de connexion (False si max_clients est atteint)"""
+        return self._slots.acquire(blocking=False)
+
+    def disconnect(self):
+        """Libère la place réservée par try_connect (à la fermeture de la réponse)"""
+        self._slots.release()
+
+    def stream(self, last_event_id=None):
+        """
+        Générateur du flux SSE d'un client
+        Args:
+            last_event_id: en-tête Last-Event-ID envoyé à la reconnexion ; l'événement
+                n'est pas renvoyé si le client l'a déjà reçu
+        """
+        self._ensure_publisher()
+        sent = last_event_id
+        deadline = time.monotonic() + self.max_connection
+
+        with self._condition:
+            self.clients += 1
+        self.publish_now()
+        try:
+            yield b'retry: 5000\n\n'
+            while time.monotonic() < deadline:
+                with self._condition:
+                    if self._etag is None or self._etag == sent:
+                        self._condition.wait(timeout=self.heartbeat)
+                    etag, body = self._etag, self._body
+
+                if etag is not None and etag != sent:
+                    sent = etag
+                    yield self._format(etag, body)
+                else:
+                    yield b': keep-alive\n\n'
+        finally:
+            with self._condition:
+                self.clients -= 1
+
+    def _format(self, etag, body):
+        data = b''.join(b'data: ' + line + b'\n' for line in body.split(b'\n'))
+        return b'event: ' + self.event.encode() + b'\nid: ' + etag.encode() + b'\n' + data + b'\n'
+
+    def _ensure_publisher(self):
+        # Un thread par processus : les threads ne survivent pas à un fork (workers Gunicorn)
+        with self._condition:
+            if self._publisher_pid == os.getpid():
+                return
+            self._publisher_pid = os.getpid()
+        threading.Thread(target=self._publish_loop, name=f'sse-{self.event}', daemon=True).start()
+
+    def _publish_loop(self):
+        while True:
+            try:
+                # Aucun calcul tant que personne n'écoute
+                if self.clients == 0:
+                    self._wake.wait()
+                    self._wake.clear()
+                    continue
+                etag, body = self.snapshot()
+                if etag != self._etag:
+                    with self._condition:
+                        self._etag, self._body = etag, body
+                        self._condition.notify_all()
+            except Exception as e:
+                print(f"Erreur lors de la publication SSE ({self.event}): {e}")
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
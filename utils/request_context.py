@@ -0,0 +1,35 @@
+"""
+Mémoïsation à l'échelle d'une requête HTTP (flask.g)
+Les résultats intermédiaires partagés (données chargées, prévisions, scores)
+sont calculés une seule fois par requête et réutilisés par tous les composants.
+Hors requête (entraînement en arrière-plan, scripts), le calcul est direct.
+"""
+
+import functools
+
+from flask import g, has_request_context
+
+
+def request_memo(key, compute):
+    """
+    Retourne le résultat de `compute()` mémorisé pour la requête en cours
+    Args:
+        key: clé hashable identifiant le résultat
+        compute: fonction sans argument
+    """
+    if not has_request_context():
+        return compute()
+
+    memo = g.setdefault('_request_memo', {})
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def request_memoized(method):
+    """Décorateur : mémoïse une méthode par (instance, arguments) pour la requête en cours"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__qualname__, id(self), args, tuple(sorted(kwargs.items())))
+        return request_memo(key, lambda: method(self, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,68 @@
+"""
+Cache de réponses JSON versionné (ETag / If-None-Match)
+Une réponse est recalculée uniquement quand la version des données ou des
+modèles dont elle dépend change ; sinon le corps déjà sérialisé est renvoyé,
+ou un 304 si le client possède déjà cette version.
+"""
+
+import hashlib
+import threading
+
+from flask import Response, jsonify, request
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries = {}  # clé -> (version, corps, etag)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def respond(self, key, version, compute):
+        """
+        Réponse JSON pour `key`, recalculée seulement si `version` a changé
+        Args:
+            key: nom de la réponse (ex: 'dashboard')
+            version: valeur hashable identifiant l'état des dépendances
+            compute: fonction sans argument retournant le dict à sérialiser
+        """
+        body, etag = self.get(key, version, compute)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Le navigateur garde la réponse mais revalide à chaque requête
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def get(self, key, version, compute):
+        """Corps JSON sérialisé et ETag pour `key` (hors requête : contexte d'application requis)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            entry = self._compute(key, version, compute)
+        return entry[1], entry[2]
+
+    def invalidate(self, key=None):
+        """Supprime une entrée (ou toutes)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _compute(self, key, version, compute):
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        # Un seul calcul par clé : les requêtes concurrentes attendent son résultat
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                return entry
+
+            body = jsonify(compute()).get_data()
+            etag = hashlib.sha1(body).hexdigest()[:20]
+            entry = (version, body, etag)
+            with self._lock:
+                self._entries[key] = entry
+            return entry
@@ -0,0 +1,123 @@
+"""
+Sérialisation JSON des réponses
+- NumpyJSONProvider : fournisseur JSON de Flask qui accepte directement les
+  scalaires et tableaux numpy, les Timestamp pandas et NaN (-> null). Utilise
+  orjson s'il est installé (encodage en C, tableaux numpy lus sans conversion),
+  sinon le module json standard.
+- frame_payload : DataFrame -> liste d'enregistrements, ou colonnes
+  (format=columns) construites à partir des tableaux numpy, sans dict par ligne.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # encodeur optionnel
+    orjson = None
+
+
+FORMATS = ('records', 'columns')
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    if orjson is not None:
+        ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                          | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS)
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.ndarray):
+            return _array_to_list(o)
+        if o is pd.NaT:
+            return None
+        if isinstance(o, np.datetime64):
+            return None if np.isnat(o) else DefaultJSONProvider.default(pd.Timestamp(o).to_pydatetime())
+        if isinstance(o, np.generic):
+            return _float_or_none(o.item())
+        # Dates (dont Timestamp) au format HTTP, comme le fournisseur par défaut
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        # Sortie compacte : orjson (les options de mise en forme passent par json)
+        if orjson is not None and set(kwargs) <= {'separators'} and self.sort_keys:
+            return orjson.dumps(obj, default=self.default, option=self.ORJSON_OPTIONS).decode()
+        return super().dumps(obj, **kwargs)
+
+
+def parse_format(value):
+    """Valide le paramètre `format` d'une requête ('records' par défaut)"""
+    value = value or 'records'
+    if value not in FORMATS:
+        raise ValueError(f"Format inconnu: {value} ({', '.join(FORMATS)})")
+    return value
+
+
+def frame_payload(df, orient='records'):
+    """
+    DataFrame -> données JSON
+    Args:
+        orient: 'records' (liste de dicts) ou 'columns' ({colonne: valeurs})
+    """
+    if orient == 'columns':
+        return {column: column_values(df[column]) for column in df.columns}
+
+    # Enregistrements assemblés à partir des colonnes ; dates déjà formatées
+    # comme le ferait l'encodeur (date HTTP), en une passe par colonne
+    columns = list(df.columns)
+    values = [_record_values(df[column]) for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def column_values(series):
+    """Valeurs d'une colonne : tableau numpy si le type le permet, sinon liste"""
+    values = series.to_numpy()
+    kind = values.dtype.kind
+    if kind in 'iubf':
+        return np.ascontiguousarray(values)
+    if kind == 'M':
+        strings = np.datetime_as_string(values)
+        missing = np.isnat(values)
+        if missing.any():
+            strings = np.where(missing, None, strings.astype(object))
+        return strings.tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _record_values(series):
+    """Valeurs d'une colonne en objets Python (NaN/NaT -> None, dates HTTP)"""
+    values = series.to_numpy()
+    kind = values.dtype.kind
+    if kind == 'M':
+        return _http_dates(values)
+    if kind in 'iubf':
+        return _array_to_list(values)
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _array_to_list(values):
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            return np.where(missing, None, values.astype(object)).tolist()
+    elif values.dtype.kind == 'M':
+        return column_values(pd.Series(values))
+    return values.tolist()
+
+
+def _http_dates(values):
+    """datetime64 -> 'Sun, 31 Dec 2023 22:20:01 GMT' (format de flask.json pour les dates)"""
+    seconds = values.astype('datetime64[s]')
+    weekdays = (seconds.astype('datetime64[D]').view(np.int64) + 3) % 7
+    return [None if text == 'NaT' else
+            f"{WEEKDAYS[weekday]}, {text[8:10]} {MONTHS[int(text[5:7]) - 1]} {text[:4]} {text[11:19]} GMT"
+            for weekday, text in zip(weekdays.tolist(), np.datetime_as_string(seconds).tolist())]
+
+
+def _float_or_none(value):
+    return None if isinstance(value, float) and math.isnan(value) else value